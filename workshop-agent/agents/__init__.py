@@ -1,4 +1,13 @@
-from .stakeholder import StakeholderAgent
+from .stakeholder import StakeholderAgent, get_cached_intro, prefetch_intro, set_context_mode
 from .analyzer import AnalyzerAgent
+from .turns import Turn, TurnStore
 
-__all__ = ["StakeholderAgent", "AnalyzerAgent"]
+__all__ = [
+    "StakeholderAgent",
+    "AnalyzerAgent",
+    "Turn",
+    "TurnStore",
+    "get_cached_intro",
+    "prefetch_intro",
+    "set_context_mode"
+]
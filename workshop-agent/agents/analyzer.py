@@ -1,9 +1,16 @@
 """
 Analyzer Sub-Agent - Evaluates question quality and provides feedback.
+
+Analyses are kept on the session's turns (see agents.turns); feedback
+history and scores are read back from there.
+
+When the analysis model fails, its circuit is open, or its output cannot be
+used, questions are scored by the local heuristic scorer instead and the
+analysis is marked "degraded".
 """
 
 import json
-import google.generativeai as genai
+import uuid
 from typing import Optional
 
 from prompts.analyzer_prompts import (
@@ -12,25 +19,283 @@ from prompts.analyzer_prompts import (
     FRAMEWORK_COVERAGE_AREAS,
     COVERAGE_DESCRIPTIONS
 )
+from llm import (
+    STRONG,
+    ModelRouter,
+    Priority,
+    RateLimitedError,
+    RequestCancelledError,
+    estimate_tokens,
+    get_router,
+    get_token_budget
+)
+from llm.client import EXPECTED_OUTPUT_TOKENS
+from .context_selector import CONTEXT_TOKEN_BUDGET, prior_exchanges, select_context
+from .heuristic_scorer import BACK_REFERENCE_MARKERS, score_question
+from .turns import TurnStore
+
+# Most deferred questions scored in one request
+MAX_BATCH_SIZE = 5
+
+# Analyses the light tier reports less confidence in are redone on the strong tier
+ESCALATION_CONFIDENCE = 0.6
+
+# Questions this long, or referring back to earlier answers
+# (BACK_REFERENCE_MARKERS), go straight to the strong tier
+HIGH_VALUE_LENGTH = 200
+
+# Tokens of transcript sent for the session summary (see _fit_transcript)
+TRANSCRIPT_TOKEN_BUDGET = 8000
+# Longest stakeholder answer kept in a trimmed transcript, in characters
+TRIMMED_ANSWER_CHARS = 300
+
+_REQUIRED_FIELDS = ("score", "coverage_areas", "strengths", "improvement", "follow_up_suggestion", "tip")
+
+
+def _is_high_value(question: str) -> bool:
+    """Whether a question deserves the strong tier from the start."""
+    lowered = question.lower()
+    return len(question) >= HIGH_VALUE_LENGTH or any(marker in lowered for marker in BACK_REFERENCE_MARKERS)
+
+
+def _is_usable(analysis) -> bool:
+    """Whether an analysis is well-formed enough to record and display."""
+    if not isinstance(analysis, dict) or any(field not in analysis for field in _REQUIRED_FIELDS):
+        return False
+    score = analysis["score"]
+    if not isinstance(score, int) or isinstance(score, bool) or not 1 <= score <= 5:
+        return False
+    areas = analysis["coverage_areas"]
+    return isinstance(areas, list) and bool(areas) and all(area in FRAMEWORK_COVERAGE_AREAS for area in areas)
+
+
+def _is_acceptable(analysis) -> bool:
+    """Whether an analysis is well-formed and confident enough to keep."""
+    if not _is_usable(analysis):
+        return False
+    confidence = analysis.get("confidence", 1.0)
+    return not isinstance(confidence, (int, float)) or confidence >= ESCALATION_CONFIDENCE
+
+
+def _parse_batch(text: str, count: int) -> list:
+    """
+    Split a batched analysis response into one analysis per question.
+
+    Returns:
+        A list of `count` analyses, None where an item was missing or malformed
+    """
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError:
+        items = []
+    if isinstance(items, dict):
+        if "score" in items:
+            # A single bare analysis
+            items = [items]
+        else:
+            # A wrapper such as {"analyses": [...]}
+            items = next((value for value in items.values() if isinstance(value, list)), [])
+    if not isinstance(items, list):
+        items = []
+
+    analyses = [None] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("index", position + 1)
+        try:
+            index = int(index)
+        except (TypeError, ValueError):
+            continue
+        if 1 <= index <= count and analyses[index - 1] is None:
+            analyses[index - 1] = item
+    return analyses
+
+
+def _format_uncovered(uncovered: Optional[list], heading: str = "##") -> str:
+    """Render the hidden facts a question got the stakeholder to reveal."""
+    if not uncovered:
+        return ""
+    facts = "\n".join(f"- {fact}" for fact in uncovered)
+    return f"""
+{heading} Hidden Facts This Question Uncovered
+{facts}
+(Reward questions that get the stakeholder to reveal concrete hidden facts.)
+"""
+
+
+def _format_context(conversation_context: list) -> str:
+    """Render selected earlier conversation (see select_context) for an analysis prompt."""
+    context_str = ""
+    previous = None
+    for entry in conversation_context:
+        role = entry.get("role", "unknown")
+        content = entry.get("content", "")
+        turn = entry.get("turn")
+        if turn is not None and previous is not None and turn > previous + 1:
+            context_str += "\n(...)\n"
+        label = f"[Turn {turn}] " if turn is not None else ""
+        context_str += f"\n{label}{role.upper()}: {content}\n"
+        previous = turn
+    return context_str
+
+
+def _fit_transcript(conversation_history: list, allowance: int) -> tuple:
+    """
+    Render the session transcript for the summary prompt within `allowance` tokens.
+
+    When the full transcript is too big, stakeholder answers are shortened
+    first (the practitioner's questions are what is being assessed); if it
+    is still too big, the start of the conversation is kept with as many of
+    the latest messages as fit, and the gap is marked.
+
+    Returns:
+        (transcript, whether anything was left out)
+    """
+    def render(entries):
+        return "".join(
+            f"\n**{entry.get('role', 'unknown').upper()}**: {entry.get('content', '')}\n" for entry in entries
+        )
+
+    transcript = render(conversation_history)
+    if estimate_tokens(transcript) <= allowance:
+        return transcript, False
+
+    entries = [
+        dict(entry, content=entry.get("content", "")[:TRIMMED_ANSWER_CHARS].rsplit(" ", 1)[0] + " …")
+        if entry.get("role") == "stakeholder" and len(entry.get("content", "")) > TRIMMED_ANSWER_CHARS else entry
+        for entry in conversation_history
+    ]
+    transcript = render(entries)
+    if estimate_tokens(transcript) <= allowance:
+        return transcript, True
+
+    head = render(entries[:1])
+    used = estimate_tokens(head)
+    tail = []
+    for entry in reversed(entries[1:]):
+        text = render([entry])
+        used += estimate_tokens(text)
+        if used > allowance:
+            break
+        tail.insert(0, text)
+    omitted = len(entries) - 1 - len(tail)
+    return f"{head}\n(... {omitted} earlier messages omitted ...)\n{''.join(tail)}", True
 
 
 class AnalyzerAgent:
     """Sub-agent that analyzes question quality and tracks coverage."""
 
-    def __init__(self, api_key: str):
-        """Initialize the analyzer agent with Google API key."""
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+    def __init__(
+        self,
+        api_key: str,
+        session_id: Optional[str] = None,
+        router: Optional[ModelRouter] = None,
+        turns: Optional[TurnStore] = None
+    ):
+        """
+        Initialize the analyzer agent with Google API key.
+
+        Args:
+            api_key: Google API key
+            session_id: Session the agent's calls belong to
+            router: Model router (the process-wide one if None)
+            turns: Turn store shared with the session's stakeholder (a new one if None)
+        """
+        self.api_key = api_key
+        self.session_id = session_id
+        self._router = router
         self.system_prompt = get_analyzer_prompt()
+        self.turns = turns if turns is not None else TurnStore()
         self.coverage_tracker = {area: 0 for area in FRAMEWORK_COVERAGE_AREAS}
-        self.question_scores = []
-        self.feedbacks = []
+        # Questions whose analysis was deferred for lack of quota, in order,
+        # as {"id", "turn", "uncovered"}
+        self.deferred = []
+
+    @property
+    def router(self) -> ModelRouter:
+        """The model router (the process-wide one unless given)."""
+        return self._router or get_router()
+
+    @property
+    def question_scores(self) -> list:
+        """Score of each analyzed question, in order."""
+        return [turn.analysis.get("score", 3) for turn in self.turns.analyzed()]
+
+    @property
+    def feedbacks(self) -> list:
+        """Each analyzed question with its analysis, as {"question", "analysis"}."""
+        return [{"question": turn.question, "analysis": turn.analysis} for turn in self.turns.analyzed()]
+
+    def last_analysis(self) -> Optional[dict]:
+        """The most recent question's analysis, if it has been scored."""
+        for turn in reversed(self.turns[:]):
+            if turn.analysis is not None:
+                return turn.analysis
+        return None
+
+    def _turn_for(self, question: str, stakeholder_response: str = "") -> int:
+        """
+        Index of the turn a question was asked in: the latest turn if it is
+        this question and not yet scored, otherwise a new turn (an analyzer
+        used without a stakeholder keeps its own turns).
+        """
+        if self.turns:
+            last = self.turns[-1]
+            if last.question == question and last.analysis is None:
+                return len(self.turns) - 1
+        return self.turns.add(question, stakeholder_response)
+
+    def _select_context(self, conversation_context: list, question: str) -> list:
+        """Earlier conversation for analyzing `question`, within the session's allowance."""
+        budget = get_token_budget()
+        selected = select_context(
+            conversation_context,
+            question,
+            budget.allowance(self.session_id, CONTEXT_TOKEN_BUDGET)
+        )
+        if len(selected) < sum(len(exchange) for exchange in prior_exchanges(conversation_context, question)):
+            budget.note_trim("analysis")
+        return selected
+
+    def _generate_with_escalation(self, prompt: str, tier: str, parse, accept, **kwargs):
+        """
+        Run an analysis prompt, escalating to stronger tiers until the result
+        is accepted or there is no stronger tier.
+
+        If a stronger tier cannot get quota in time or fails, the weaker
+        tier's result is kept.
+
+        Args:
+            prompt: Analysis prompt
+            tier: Tier to start on
+            parse: Turns response text into a result
+            accept: Whether a parsed result is good enough
+            **kwargs: Passed through to the router's generate()
+
+        Returns:
+            The last parsed result (callers check it is usable: the last
+            tier may still have returned something malformed)
+        """
+        result = parse(self.router.generate(tier, self.api_key, prompt, **kwargs).text)
+        while not accept(result):
+            tier = self.router.escalate(tier)
+            if tier is None:
+                break
+            try:
+                result = parse(self.router.generate(tier, self.api_key, prompt, **kwargs).text)
+            except RequestCancelledError:
+                raise
+            except Exception:
+                break
+        return result
 
     def analyze_question(
         self,
         question: str,
         stakeholder_response: str,
-        conversation_context: list
+        conversation_context: list,
+        uncovered: Optional[list] = None
     ) -> dict:
         """
         Analyze a question and provide feedback.
@@ -39,67 +304,271 @@ class AnalyzerAgent:
             question: The question asked by the practitioner
             stakeholder_response: The stakeholder's answer
             conversation_context: Previous conversation for context
+            uncovered: Hidden facts the stakeholder revealed in the answer
 
         Returns:
             Dictionary with score, coverage areas, and feedback
+
+        Raises:
+            RateLimitedError: If no analysis quota was available in time
         """
-        # Build context from conversation history
-        context_str = ""
-        if conversation_context:
-            recent = conversation_context[-6:]  # Last 3 exchanges
-            for entry in recent:
-                role = entry.get("role", "unknown")
-                content = entry.get("content", "")
-                context_str += f"\n{role.upper()}: {content}\n"
+        analysis = self.request_analysis(question, stakeholder_response, conversation_context, uncovered=uncovered)
+        self.record_analysis(question, analysis, self._turn_for(question, stakeholder_response))
+        return analysis
+
+    def request_analysis(
+        self,
+        question: str,
+        stakeholder_response: str,
+        conversation_context: list,
+        max_wait: Optional[float] = None,
+        uncovered: Optional[list] = None
+    ) -> dict:
+        """
+        Get the analysis for a question without updating session state.
+
+        Runs on the analysis tier, escalating to the strong tier when the
+        result is malformed or low-confidence; high-value questions start
+        on the strong tier. If the model fails or its circuit is open, the
+        question is scored locally (a "degraded" analysis).
+
+        Args:
+            question: The question asked by the practitioner
+            stakeholder_response: The stakeholder's answer
+            conversation_context: Previous conversation for context
+            max_wait: Seconds to wait for analysis quota (scheduler default if None)
+            uncovered: Hidden facts the stakeholder revealed in the answer
 
+        Returns:
+            Dictionary with score, coverage areas, and feedback
+
+        Raises:
+            RateLimitedError: If no analysis quota was available in time
+        """
         prompt = f"""{self.system_prompt}
 
 ## Current Conversation Context
-{context_str}
+{_format_context(self._select_context(conversation_context, question))}
 
 ## Question to Analyze
 "{question}"
 
 ## Stakeholder's Response
 "{stakeholder_response}"
-
+{_format_uncovered(uncovered)}
 Analyze this question and provide your evaluation in JSON format.
 Consider the conversation context - reward questions that build on previous answers.
 """
 
-        response = self.model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                response_mime_type="application/json"
+        def parse(text):
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                return None
+
+        tier = STRONG if _is_high_value(question) else self.router.tier_for("analysis")
+        try:
+            analysis = self._generate_with_escalation(
+                prompt,
+                tier,
+                parse,
+                _is_acceptable,
+                site="analysis",
+                session_id=self.session_id,
+                priority=Priority.ANALYSIS,
+                generation_config={"response_mime_type": "application/json"},
+                max_wait=max_wait
             )
-        )
+        except (RateLimitedError, RequestCancelledError):
+            raise
+        except Exception:
+            # Upstream error, timeout or open circuit
+            analysis = None
+
+        if not _is_usable(analysis):
+            # Even the strongest tier's output was malformed (or the model failed)
+            analysis = score_question(question, conversation_context, uncovered, self.coverage_tracker)
+        analysis["facts_uncovered"] = len(uncovered or [])
+
+        return analysis
 
+    def request_batch_analysis(self, entries: list, max_wait: Optional[float] = None) -> list:
+        """
+        Get analyses for several deferred questions in one request.
+
+        The rubric is sent once for the whole batch and the model returns a
+        JSON array with one evaluation per question, which is fanned back
+        out in order. Session state is not updated.
+
+        Args:
+            entries: Deferred entries, as created by defer(); their
+                questions, answers and context are read from the turn store
+            max_wait: Seconds to wait for analysis quota (scheduler default if None)
+
+        Returns:
+            One analysis dict per entry, in the same order (scored locally
+            if the model fails)
+
+        Raises:
+            RateLimitedError: If no analysis quota was available in time
+        """
+        turns = [self.turns[entry["turn"]] for entry in entries]
+        contexts = [self.turns.messages(entry["turn"]) for entry in entries]
+        if len(entries) == 1:
+            return [self.request_analysis(
+                turns[0].question,
+                turns[0].answer,
+                contexts[0],
+                max_wait=max_wait,
+                uncovered=entries[0].get("uncovered")
+            )]
+
+        sections = ""
+        for i, (entry, turn, context) in enumerate(zip(entries, turns, contexts), 1):
+            sections += f"""
+## Question {i}
+
+### Conversation Context
+{_format_context(self._select_context(context, turn.question))}
+
+### Question to Analyze
+"{turn.question}"
+
+### Stakeholder's Response
+"{turn.answer}"
+{_format_uncovered(entry.get("uncovered"), heading="###")}"""
+
+        prompt = f"""{self.system_prompt}
+
+The practitioner asked the following {len(entries)} questions in this order.
+{sections}
+Analyze each question separately and respond with a JSON array containing
+exactly {len(entries)} evaluation objects, one per question, in the same order.
+Add an "index" field (1 to {len(entries)}) to each object. Use the format above
+for every object, and reward questions that build on previous answers.
+"""
+
+        high_value = any(_is_high_value(turn.question) for turn in turns)
+        tier = STRONG if high_value else self.router.tier_for("analysis")
         try:
-            analysis = json.loads(response.text)
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            analysis = {
-                "score": 3,
-                "coverage_areas": ["process_mapping"],
-                "strengths": "Question received",
-                "improvement": "Try to be more specific",
-                "follow_up_suggestion": "Can you tell me more about the specific steps involved?",
-                "tip": "Ask follow-up questions to dig deeper"
-            }
+            analyses = self._generate_with_escalation(
+                prompt,
+                tier,
+                lambda text: _parse_batch(text, len(entries)),
+                lambda results: all(_is_acceptable(analysis) for analysis in results),
+                site="analysis_batch",
+                session_id=self.session_id,
+                priority=Priority.ANALYSIS,
+                generation_config={"response_mime_type": "application/json"},
+                max_wait=max_wait,
+                output_tokens=EXPECTED_OUTPUT_TOKENS * len(entries)
+            )
+        except (RateLimitedError, RequestCancelledError):
+            raise
+        except Exception:
+            analyses = [None] * len(entries)
+
+        for position, entry in enumerate(entries):
+            if not _is_usable(analyses[position]):
+                analyses[position] = score_question(
+                    turns[position].question,
+                    contexts[position],
+                    entry.get("uncovered"),
+                    self.coverage_tracker
+                )
+            analyses[position]["facts_uncovered"] = len(entry.get("uncovered") or [])
+        return analyses
+
+    def record_analysis(self, question: str, analysis: dict, turn: Optional[int] = None):
+        """
+        Apply an analysis to the coverage tracker and keep it on its turn.
 
+        Args:
+            question: The question analyzed
+            analysis: Its analysis
+            turn: Index of the question's turn (found or added if None)
+        """
         # Update coverage tracker
         for area in analysis.get("coverage_areas", []):
             if area in self.coverage_tracker:
                 self.coverage_tracker[area] += 1
 
-        # Track scores
-        score = analysis.get("score", 3)
-        self.question_scores.append(score)
-        self.feedbacks.append({
-            "question": question,
-            "analysis": analysis
-        })
+        if turn is None:
+            turn = self._turn_for(question)
+        self.turns[turn].analysis = analysis
+
+    def defer(self, question: str, stakeholder_response: str, uncovered: Optional[list] = None) -> dict:
+        """
+        Queue a question for later analysis, behind any already deferred.
+
+        The entry refers to the question's turn; its context is the turns
+        before it.
+
+        Returns:
+            The queued entry (its "id" identifies it when completing it)
+        """
+        entry = {
+            "id": uuid.uuid4().hex,
+            "turn": self._turn_for(question, stakeholder_response),
+            "uncovered": list(uncovered or [])
+        }
+        self.deferred.append(entry)
+        return entry
+
+    def complete_deferred(self, entry_id: str, analysis: dict) -> bool:
+        """
+        Record the analysis for the oldest deferred question.
+
+        Results are only accepted for the head of the queue, so analyses
+        completed out of band still apply in question order, and results
+        for questions dropped by reset() are ignored.
 
+        Returns:
+            True if the analysis was recorded
+        """
+        if not self.deferred or self.deferred[0]["id"] != entry_id:
+            return False
+        entry = self.deferred.pop(0)
+        self.record_analysis(self.turns[entry["turn"]].question, analysis, entry["turn"])
+        return True
+
+    def analyze_or_defer(
+        self,
+        question: str,
+        stakeholder_response: str,
+        uncovered: Optional[list] = None
+    ) -> Optional[dict]:
+        """
+        Analyze a question, deferring it if analysis quota is unavailable.
+
+        Previously deferred questions are analyzed first, so coverage and
+        scores are always updated in question order.
+
+        Returns:
+            The analysis, or None if the question was deferred
+        """
+        self.defer(question, stakeholder_response, uncovered)
+        return self.process_deferred()
+
+    def process_deferred(self) -> Optional[dict]:
+        """
+        Analyze deferred questions in order until done or rate limited.
+
+        Questions are sent in batches of up to MAX_BATCH_SIZE.
+
+        Returns:
+            The analysis of the last deferred question, or None if any
+            question is still waiting
+        """
+        analysis = None
+        while self.deferred:
+            batch = self.deferred[:MAX_BATCH_SIZE]
+            try:
+                analyses = self.request_batch_analysis(batch)
+            except RateLimitedError:
+                return None
+            for entry, analysis in zip(batch, analyses):
+                self.complete_deferred(entry["id"], analysis)
         return analysis
 
     def get_coverage_status(self) -> dict:
@@ -174,37 +643,68 @@ Consider the conversation context - reward questions that build on previous answ
 
     def get_average_score(self) -> float:
         """Get the average question score for the session."""
-        if not self.question_scores:
+        scores = self.question_scores
+        if not scores:
             return 0.0
-        return sum(self.question_scores) / len(self.question_scores)
+        return sum(scores) / len(scores)
 
-    def get_session_summary(self, conversation_history: list) -> str:
+    def get_session_summary(
+        self,
+        conversation_history: list,
+        disclosure_status: Optional[dict] = None,
+        revealed_facts: Optional[list] = None
+    ) -> str:
         """
         Generate a comprehensive session summary.
 
         Args:
             conversation_history: Full conversation from the session
+            disclosure_status: Hidden facts revealed per area, from the
+                stakeholder's disclosure tracking
+            revealed_facts: Text of the hidden facts revealed so far
 
         Returns:
             Markdown formatted summary
         """
-        # Build conversation transcript
-        transcript = ""
-        for entry in conversation_history:
-            role = entry.get("role", "unknown")
-            content = entry.get("content", "")
-            transcript += f"\n**{role.upper()}**: {content}\n"
+        # Build conversation transcript, trimmed to the session's allowance
+        budget = get_token_budget()
+        transcript, trimmed = _fit_transcript(
+            conversation_history,
+            budget.allowance(self.session_id, TRANSCRIPT_TOKEN_BUDGET)
+        )
+        if trimmed:
+            budget.note_trim("summary")
 
         # Build summary of all feedback
         feedback_summary = ""
-        for i, fb in enumerate(self.feedbacks, 1):
-            analysis = fb["analysis"]
+        analyzed = self.turns.analyzed()
+        for i, turn in enumerate(analyzed, 1):
+            analysis = turn.analysis
             feedback_summary += f"""
-Question {i}: "{fb['question'][:50]}..."
+Question {i}: "{turn.question[:50]}..."
 - Score: {analysis.get('score', 'N/A')}/5
 - Areas: {', '.join(analysis.get('coverage_areas', []))}
+- Hidden facts uncovered: {analysis.get('facts_uncovered', 0)}
 """
 
+        # Disclosure counts are tracked per turn, so the summary need not
+        # re-derive them from the transcript
+        disclosure_text = ""
+        if disclosure_status:
+            lines = [
+                f"- {area.replace('_', ' ').title()}: {counts['revealed']}/{counts['total']}"
+                for area, counts in disclosure_status.items()
+            ]
+            revealed = "\n".join(f"- {fact}" for fact in revealed_facts or []) or "- None"
+            disclosure_text = f"""
+## Hidden Facts Uncovered (precomputed - use these rather than re-deriving them)
+{chr(10).join(lines)}
+
+Facts uncovered:
+{revealed}
+"""
+
+        scores = [turn.analysis.get("score", 3) for turn in analyzed]
         prompt = f"""{get_session_summary_prompt()}
 
 ## Session Transcript
@@ -217,22 +717,42 @@ Question {i}: "{fb['question'][:50]}..."
 {self.get_coverage_summary_text()}
 
 ## Overall Statistics
-- Total Questions: {len(self.question_scores)}
-- Average Score: {self.get_average_score():.1f}/5
-- Highest Score: {max(self.question_scores) if self.question_scores else 0}
-- Lowest Score: {min(self.question_scores) if self.question_scores else 0}
-
+- Total Questions: {len(scores)}
+- Average Score: {sum(scores) / len(scores) if scores else 0.0:.1f}/5
+- Highest Score: {max(scores) if scores else 0}
+- Lowest Score: {min(scores) if scores else 0}
+{disclosure_text}
 Generate a comprehensive, encouraging but honest summary of this session.
 """
 
-        response = self.model.generate_content(prompt)
+        response = self.router.generate(
+            self.router.tier_for("summary"),
+            self.api_key,
+            prompt,
+            site="summary",
+            session_id=self.session_id,
+            priority=Priority.BACKGROUND
+        )
         return response.text
 
     def reset(self):
         """Reset the analyzer for a new session."""
         self.coverage_tracker = {area: 0 for area in FRAMEWORK_COVERAGE_AREAS}
-        self.question_scores = []
-        self.feedbacks = []
+        self.deferred = []
+        self.turns.clear_analyses()
+
+    def get_state(self) -> dict:
+        """Get the session state as a JSON-serializable dict."""
+        return {
+            "coverage_tracker": self.coverage_tracker,
+            "deferred": self.deferred,
+        }
+
+    def load_state(self, state: dict):
+        """Restore session state produced by get_state() (analyses come with the turns)."""
+        self.coverage_tracker = {area: 0 for area in FRAMEWORK_COVERAGE_AREAS}
+        self.coverage_tracker.update(state.get("coverage_tracker", {}))
+        self.deferred = state.get("deferred", [])
 
     def format_feedback_for_display(self, analysis: dict) -> str:
         """Format analysis results for Gradio display."""
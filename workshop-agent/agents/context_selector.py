@@ -0,0 +1,113 @@
+"""
+Context Selector - Picks the earlier conversation turns worth sending with a question.
+
+Instead of a fixed window of recent messages, prior exchanges are scored
+for lexical relevance to the question being analyzed (BM25 over stemmed
+words) and the best ones are included up to a token budget, always keeping
+the exchange just before the question. A question that refers back to
+something said many turns ago gets that turn in its context, and long
+irrelevant turns are left out.
+"""
+
+import math
+from collections import Counter
+
+from llm import estimate_tokens
+from prompts.hidden_facts import BM25_B, BM25_K1, tokenize
+
+# Tokens of earlier conversation sent with each analyzed question
+CONTEXT_TOKEN_BUDGET = 600
+
+# Longest a single message may be in the context, in characters
+MAX_MESSAGE_CHARS = 1200
+
+
+def _clip(entry: dict, turn: int) -> dict:
+    content = entry.get("content", "")
+    if len(content) > MAX_MESSAGE_CHARS:
+        content = content[:MAX_MESSAGE_CHARS].rsplit(" ", 1)[0] + " …"
+    return {"role": entry.get("role", "unknown"), "content": content, "turn": turn}
+
+
+def prior_exchanges(conversation_context: list, question: str) -> list:
+    """
+    Group a conversation into exchanges that came before `question`.
+
+    The conversation may end with the question and its answer (as the
+    session history does); that exchange is dropped, since the analysis
+    prompt shows it on its own.
+
+    Returns:
+        List of exchanges, oldest first; each a list of clipped entries
+        tagged with their turn number (the introduction is turn 0)
+    """
+    entries = list(conversation_context)
+    for position in range(len(entries) - 1, -1, -1):
+        entry = entries[position]
+        if entry.get("role") == "practitioner":
+            if entry.get("content", "").strip() == question.strip():
+                entries = entries[:position]
+            break
+
+    exchanges = []
+    turn = 0
+    for entry in entries:
+        if entry.get("turn") is not None:
+            turn = entry["turn"]
+        elif entry.get("role") == "practitioner":
+            turn += 1
+        if entry.get("role") == "practitioner" or not exchanges or exchanges[-1][0]["turn"] != turn:
+            exchanges.append([])
+        exchanges[-1].append(_clip(entry, turn))
+    return exchanges
+
+
+def select_context(conversation_context: list, question: str, budget: int = CONTEXT_TOKEN_BUDGET) -> list:
+    """
+    Choose the earlier conversation to send with a question for analysis.
+
+    Everything is kept if it fits the budget. Otherwise the exchange right
+    before the question is kept, then the exchanges most relevant to the
+    question, while they fit.
+
+    Args:
+        conversation_context: Conversation entries ({"role", "content"}),
+            possibly ending with the question being analyzed and its answer
+        question: The question being analyzed
+        budget: Tokens of context to send
+
+    Returns:
+        Selected entries in conversation order, each tagged with "turn"
+    """
+    exchanges = prior_exchanges(conversation_context, question)
+    sizes = [estimate_tokens(" ".join(entry["content"] for entry in exchange)) for exchange in exchanges]
+    if sum(sizes) <= budget:
+        return [entry for exchange in exchanges for entry in exchange]
+
+    terms = [tokenize(" ".join(entry["content"] for entry in exchange)) for exchange in exchanges]
+    average = sum(len(words) for words in terms) / len(terms)
+    frequencies = Counter(term for words in terms for term in set(words))
+    query = set(tokenize(question))
+
+    def relevance(words: list) -> float:
+        counts = Counter(words)
+        norm = 1 - BM25_B + BM25_B * len(words) / (average or 1)
+        score = 0.0
+        for term in query:
+            count = counts.get(term)
+            if count:
+                idf = math.log(1 + (len(terms) - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+                score += idf * count * (BM25_K1 + 1) / (count + BM25_K1 * norm)
+        return score
+
+    scores = [relevance(words) for words in terms]
+    last = len(exchanges) - 1
+    ranked = sorted((position for position in range(last) if scores[position] > 0), key=lambda position: -scores[position])
+
+    chosen, used = set(), 0
+    for position in [last] + ranked:
+        if used + sizes[position] <= budget or not chosen:
+            chosen.add(position)
+            used += sizes[position]
+
+    return [entry for position in sorted(chosen) for entry in exchanges[position]]
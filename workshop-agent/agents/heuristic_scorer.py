@@ -0,0 +1,149 @@
+"""
+Heuristic Scorer - Local question scoring for when the analysis model is down.
+
+Coverage areas are matched against the vocabulary of each area's key
+questions in FRAMEWORK_KNOWLEDGE, and the score follows the rubric's
+question quality indicators: asking why/how, quantifying, and building on
+earlier answers score up; yes/no and very short questions score down. The
+result has the same shape as a model analysis but is marked "degraded" so
+it can be shown as approximate.
+"""
+
+import re
+from collections import Counter
+from typing import Optional
+
+from data.use_cases import FRAMEWORK_KNOWLEDGE
+from prompts.analyzer_prompts import COVERAGE_DESCRIPTIONS, FRAMEWORK_COVERAGE_AREAS
+from prompts.hidden_facts import tokenize
+from .context_selector import prior_exchanges
+
+# Confidence reported for heuristic analyses
+HEURISTIC_CONFIDENCE = 0.3
+
+# Phrases that refer back to an earlier answer (the analyzer also sends these
+# questions straight to the strong tier)
+BACK_REFERENCE_MARKERS = ("you mentioned", "you said", "earlier", "going back to", "you described", "as you noted")
+
+# Words shared by this many areas say nothing about which one a question is in
+_SHARED_AREAS = 3
+
+_QUANTIFIERS = ("how many", "how much", "how often", "how long", "what percentage", "what percent", "how fast")
+_CLOSED_OPENERS = ("is", "are", "do", "does", "did", "can", "could", "will", "would", "should", "has", "have")
+
+
+def _build_vocabulary() -> dict:
+    """Distinctive stemmed words for each coverage area."""
+    areas = FRAMEWORK_KNOWLEDGE["coverage_areas"]
+    terms = {}
+    for area in FRAMEWORK_COVERAGE_AREAS:
+        info = areas.get(area, {})
+        text = " ".join([info.get("name", ""), info.get("description", ""), COVERAGE_DESCRIPTIONS.get(area, "")]
+                        + info.get("key_questions", []))
+        terms[area] = set(tokenize(text))
+
+    spread = Counter(term for area_terms in terms.values() for term in area_terms)
+    return {area: {term for term in area_terms if spread[term] < _SHARED_AREAS} for area, area_terms in terms.items()}
+
+
+_VOCABULARY = _build_vocabulary()
+
+
+def match_areas(question: str) -> list:
+    """Coverage areas whose key-question vocabulary a question uses, best first."""
+    words = set(tokenize(question))
+    overlap = {area: len(words & terms) for area, terms in _VOCABULARY.items()}
+    best = max(overlap.values())
+    if not best:
+        return []
+    return [area for area in FRAMEWORK_COVERAGE_AREAS if overlap[area] == best] + [
+        area for area in FRAMEWORK_COVERAGE_AREAS if 2 <= overlap[area] < best
+    ][:1]
+
+
+def _builds_on_context(question: str, conversation_context: list) -> bool:
+    """Whether a question refers back to, or reuses words from, earlier answers."""
+    lowered = question.lower()
+    if any(marker in lowered for marker in BACK_REFERENCE_MARKERS):
+        return True
+    earlier = [
+        entry["content"]
+        for exchange in prior_exchanges(conversation_context, question)
+        for entry in exchange
+        if entry["role"] == "stakeholder"
+    ]
+    if not earlier:
+        return False
+    shared = set(tokenize(question)) & set(tokenize(" ".join(earlier[-2:])))
+    return len(shared) >= 3
+
+
+def _follow_up(areas: list, coverage: Optional[dict]) -> str:
+    """A key question from the least covered area (or the question's own area)."""
+    candidates = FRAMEWORK_COVERAGE_AREAS
+    if coverage:
+        candidates = sorted(candidates, key=lambda area: coverage.get(area, 0))
+    elif areas:
+        candidates = areas
+    key_questions = FRAMEWORK_KNOWLEDGE["coverage_areas"].get(candidates[0], {}).get("key_questions", [])
+    return key_questions[0] if key_questions else "Can you walk me through that step by step?"
+
+
+def score_question(
+    question: str,
+    conversation_context: list,
+    uncovered: Optional[list] = None,
+    coverage: Optional[dict] = None
+) -> dict:
+    """
+    Score a question without calling a model.
+
+    Args:
+        question: The question asked by the practitioner
+        conversation_context: Previous conversation for context
+        uncovered: Hidden facts the stakeholder revealed in the answer
+        coverage: Questions asked so far per area (steers the follow-up)
+
+    Returns:
+        An analysis dict like the model's, with "degraded": True
+    """
+    lowered = question.lower().strip()
+    words = re.findall(r"[a-z0-9']+", lowered)
+    strengths, improvements = [], []
+
+    score = 2
+    if "why" in words or "how" in words or lowered.startswith(("why", "how")):
+        score += 1
+        strengths.append("asks why/how rather than just what")
+    if any(marker in lowered for marker in _QUANTIFIERS) or any(char.isdigit() for char in lowered):
+        score += 1
+        strengths.append("asks for something measurable")
+    else:
+        improvements.append("Quantify where you can (how many, how often, what percentage).")
+    if _builds_on_context(question, conversation_context):
+        score += 1
+        strengths.append("builds on an earlier answer")
+    else:
+        improvements.append("Build on something the stakeholder already told you.")
+    if uncovered:
+        score += 1
+        strengths.append("got the stakeholder to reveal a hidden detail")
+    if words and words[0] in _CLOSED_OPENERS and score < 4:
+        score -= 1
+        improvements.insert(0, "Rephrase as an open question - this one can be answered with yes or no.")
+    if len(words) < 6:
+        score -= 1
+        improvements.insert(0, "Be more specific about what you want to learn.")
+    score = max(1, min(5, score))
+
+    areas = match_areas(question) or ["process_mapping"]
+    return {
+        "score": score,
+        "coverage_areas": areas,
+        "strengths": ("Good: " + "; ".join(strengths) + ".") if strengths else "Question received.",
+        "improvement": " ".join(improvements[:2]) or "Keep probing for specifics and edge cases.",
+        "follow_up_suggestion": _follow_up(areas, coverage),
+        "tip": "Quick automatic check only - the detailed coach is temporarily unavailable.",
+        "confidence": HEURISTIC_CONFIDENCE,
+        "degraded": True,
+    }
@@ -0,0 +1,87 @@
+"""
+Turn Store - The one record of a session's conversation.
+
+Each turn is stored once, as a slotted record of the practitioner's
+question, the stakeholder's answer and (once scored) the analysis. The
+stakeholder's LLM chat history, the conversation shown in the transcript
+and the analyzer's context and feedback are all views built from it, so a
+turn is never copied into several parallel lists. The store is shared by a
+session's stakeholder and analyzer, and serializes as compact
+[question, answer, analysis] triples.
+
+Turns are only appended between a clear() or load(); `generation` changes
+when either replaces them, so views can be extended instead of rebuilt.
+"""
+
+from typing import Iterator, Optional
+
+
+class Turn:
+    """One exchange; the introduction is a turn with no question."""
+
+    __slots__ = ("question", "answer", "analysis")
+
+    def __init__(self, question: Optional[str], answer: str, analysis: Optional[dict] = None):
+        self.question = question
+        self.answer = answer
+        self.analysis = analysis
+
+
+class TurnStore:
+    """A session's turns in order, with the views the agents and UI need."""
+
+    __slots__ = ("_turns", "generation")
+
+    def __init__(self):
+        self._turns = []
+        # Bumped whenever existing turns are replaced rather than appended to
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Turn]:
+        return iter(self._turns)
+
+    def __getitem__(self, index: int) -> Turn:
+        return self._turns[index]
+
+    def add(self, question: Optional[str], answer: str) -> int:
+        """Append a turn; returns its index (the introduction is turn 0)."""
+        self._turns.append(Turn(question, answer))
+        return len(self._turns) - 1
+
+    def clear(self):
+        self._turns.clear()
+        self.generation += 1
+
+    def clear_analyses(self):
+        for turn in self._turns:
+            turn.analysis = None
+
+    def messages(self, end: Optional[int] = None) -> list:
+        """
+        The conversation as {"role", "content", "turn"} messages.
+
+        Args:
+            end: Only include turns before this index (all if None)
+        """
+        messages = []
+        for number, turn in enumerate(self._turns[:end]):
+            if turn.question is not None:
+                messages.append({"role": "practitioner", "content": turn.question, "turn": number})
+            messages.append({"role": "stakeholder", "content": turn.answer, "turn": number})
+        return messages
+
+    def analyzed(self) -> list:
+        """Turns that have an analysis, in order."""
+        return [turn for turn in self._turns if turn.analysis is not None]
+
+    def to_list(self) -> list:
+        """Get the turns as JSON-serializable [question, answer, analysis] triples."""
+        return [[turn.question, turn.answer, turn.analysis] for turn in self._turns]
+
+    def load(self, turns: list):
+        """Replace the turns in place with to_list() output (views sharing the store see them)."""
+        self._turns[:] = [Turn(*turn) for turn in turns]
+        self.generation += 1
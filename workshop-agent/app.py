@@ -5,26 +5,130 @@ A Gradio-based web UI for practicing discovery questions
 with AI-powered stakeholder roleplay and feedback.
 """
 
+import functools
+import hashlib
+import json
 import os
-import gradio as gr
+import time
+from typing import Optional
 from dotenv import load_dotenv
 
-from agents.stakeholder import StakeholderAgent
 from agents.analyzer import AnalyzerAgent
+from agents.stakeholder import prefetch_intro, set_context_mode
+from llm import (
+    CircuitOpenError,
+    RateLimitedError,
+    RequestCancelledError,
+    cancellation,
+    configure_hedging,
+    configure_router,
+    configure_scheduler,
+    configure_token_budget,
+    get_coalescer,
+    get_hedger,
+    get_token_registry,
+    is_sdk_loaded,
+    warm_up,
+)
+from sessions import (
+    AnalysisWorker,
+    SessionBusyError,
+    SessionManager,
+    SessionNotFoundError,
+    Speculator,
+    create_backend,
+    new_session_id
+)
 # Load environment variables
 load_dotenv()
 
-# Get API key from environment (required)
+# Get API key from environment (required for LLM calls, checked on first use
+# and reported by the readiness check)
 API_KEY = os.getenv("GOOGLE_API_KEY")
-if not API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable is required. Set it in a .env file or environment.")
 
-# Initialize agents
-stakeholder_agent = StakeholderAgent(API_KEY)
-analyzer_agent = AnalyzerAgent(API_KEY)
-
-# Store current generated use case
-current_use_case = {"use_case": None}
+# Per-session agents live in the session backend: memory:// for a single
+# process, sqlite:///path or redis://host for several processes or nodes
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory://")
+# memory:// sessions idle this many seconds are compressed to disk until
+# their next request (0 keeps everything in memory)
+session_manager = SessionManager(
+    create_backend(
+        SESSION_BACKEND,
+        hibernate_after=float(os.getenv("SESSION_HIBERNATE_AFTER", "900")),
+        hibernate_dir=os.getenv("SESSION_HIBERNATE_DIR") or None,
+    ),
+    API_KEY
+)
+
+# "full" gives the stakeholder every hidden detail up front; "retrieval"
+# sends only the facts relevant to each question
+set_context_mode(os.getenv("STAKEHOLDER_CONTEXT", "full"))
+
+# "inline" scores each question before the turn returns; "background"
+# returns the stakeholder reply immediately and pushes feedback when ready
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "inline")
+
+# Answers to the suggested follow-up are prepared in the background once a
+# question has been scored (SPECULATION_WORKERS=0 turns this off)
+speculator = Speculator(session_manager, max_workers=int(os.getenv("SPECULATION_WORKERS", "2")))
+analysis_worker = AnalysisWorker(
+    session_manager,
+    max_workers=int(os.getenv("ANALYSIS_WORKERS", "4")),
+    on_drained=speculator.schedule
+)
+
+# Gemini quota for this process (divide the project quota by the number of
+# workers/nodes); requests beyond it queue by priority instead of failing
+configure_scheduler(
+    rpm=int(os.getenv("GEMINI_RPM", "60")),
+    tpm=int(os.getenv("GEMINI_TPM", "1000000")),
+)
+
+# Analysis runs on the light model and escalates to the strong model when
+# needed; stakeholder replies, use cases and summaries use the strong model
+router = configure_router(
+    light_model=os.getenv("GEMINI_LIGHT_MODEL", "gemini-2.0-flash-lite"),
+    strong_model=os.getenv("GEMINI_STRONG_MODEL", "gemini-2.0-flash"),
+)
+
+# A stakeholder reply still running past this percentile of recent reply
+# latency gets a duplicate request; duplicates are capped at HEDGE_BUDGET
+# of recent calls (HEDGE_PERCENTILE=0 turns this off)
+configure_hedging(
+    percentile=float(os.getenv("HEDGE_PERCENTILE", "0.95")),
+    budget=float(os.getenv("HEDGE_BUDGET", "0.05")),
+)
+
+# Tokens a session, and the whole cohort per 24 hours, may use before the
+# context sent with each call is trimmed (0 means no limit)
+token_budget = configure_token_budget(
+    session_tokens=int(os.getenv("SESSION_TOKEN_BUDGET", "400000")),
+    cohort_tokens=int(os.getenv("COHORT_TOKEN_BUDGET", "0")),
+)
+
+# Shown when the upstream quota is exhausted for a live request
+BUSY_MESSAGE = "The workshop is very busy right now - please try again in a moment."
+
+# Shown when the model keeps failing and its circuit breaker is open
+UNAVAILABLE_MESSAGE = "The AI service is having problems right now - please try again shortly."
+
+# Events that may run at once per worker (sessions are isolated, so this is
+# bounded by upstream LLM quota rather than by shared state)
+CONCURRENCY_LIMIT = int(os.getenv("CONCURRENCY_LIMIT", "16"))
+
+# How long the streaming API waits for a turn's analysis, and how often it checks
+API_ANALYSIS_WAIT = 120.0
+API_POLL_INTERVAL = 0.25
+
+# Set once create_ui() has built the Gradio interface
+ui_state = {"built": False}
+
+# Per-session cancel tokens: renewed when a session's work is superseded,
+# cancelled when its browser tab goes away
+session_tokens = get_token_registry()
+
+# Gradio connection (session_hash) -> our session id, for the unload handler
+browser_sessions = {}
 
 # Light Theme Colors
 COLORS = {
@@ -45,17 +149,174 @@ COLORS = {
     "border_dark": "#CBD5E1",
 }
 
+# Styles shared by the per-turn fragments (feedback, coverage, stats). They
+# are sent once with the page instead of inline on every update.
+SHARED_CSS = "\n".join(
+    [f".ws-c-{name} {{ color: {value}; }}" for name, value in COLORS.items()]
+    + [f".ws-bg-{name} {{ background: {value}; }}" for name, value in COLORS.items()]
+) + f"""
+.ws-panel {{ font-family: system-ui, sans-serif; color: {COLORS["text_dark"]}; }}
+.ws-score-box {{ text-align: center; padding: 20px; background: {COLORS["primary_light"]}; border-radius: 12px; margin-bottom: 16px; border: 1px solid {COLORS["border"]}; }}
+.ws-score-label {{ font-size: 0.9em; color: {COLORS["text_medium"]}; margin-bottom: 8px; font-weight: 500; }}
+.ws-stars {{ font-size: 1.6em; }}
+.ws-score-value {{ font-weight: bold; font-size: 1.1em; }}
+.ws-card {{ background: {COLORS["bg_white"]}; border-radius: 10px; padding: 16px; margin-bottom: 14px; border: 1px solid {COLORS["border"]}; }}
+.ws-card:last-child {{ margin-bottom: 0; }}
+.ws-callout {{ background: {COLORS["primary_light"]}; border: none; border-left: 4px solid {COLORS["primary"]}; }}
+.ws-card-title {{ font-weight: 600; font-size: 0.9em; margin-bottom: 8px; }}
+.ws-card-body {{ color: {COLORS["text_dark"]}; font-size: 0.95em; }}
+.ws-italic {{ font-style: italic; }}
+.ws-cov-group {{ margin-bottom: 20px; }}
+.ws-cov-heading {{ margin: 0 0 12px 0; font-size: 0.95em; font-weight: 600; }}
+.ws-bar {{ margin-bottom: 12px; }}
+.ws-bar-head {{ display: flex; justify-content: space-between; margin-bottom: 4px; }}
+.ws-bar-name {{ font-size: 0.9em; color: {COLORS["text_dark"]}; font-weight: 500; }}
+.ws-bar-count {{ font-size: 0.85em; color: {COLORS["text_light"]}; }}
+.ws-bar-track {{ background: {COLORS["bg_gray"]}; border-radius: 6px; height: 10px; overflow: hidden; }}
+.ws-bar-fill {{ height: 100%; border-radius: 6px; transition: width 0.3s; }}
+.ws-stats {{ display: flex; justify-content: center; gap: 40px; padding: 16px; background: {COLORS["bg_light"]}; border-radius: 10px; border: 1px solid {COLORS["border"]}; }}
+.ws-stat {{ text-align: center; }}
+.ws-stat-label {{ color: {COLORS["text_light"]}; font-size: 0.85em; margin-bottom: 4px; font-weight: 500; }}
+.ws-stat-value {{ font-size: 1.5em; font-weight: 700; }}
+.ws-chat-log {{ height: 450px; overflow-y: auto; display: flex; flex-direction: column; gap: 10px; padding: 12px; background: {COLORS["bg_light"]}; border-radius: 12px; border: 1px solid {COLORS["border"]}; }}
+.ws-msg {{ max-width: 85%; padding: 10px 14px; border-radius: 12px; line-height: 1.5; color: {COLORS["text_dark"]}; }}
+.ws-msg p {{ margin: 0 0 6px 0; }}
+.ws-msg p:last-child {{ margin-bottom: 0; }}
+.ws-msg-user {{ align-self: flex-end; background: {COLORS["primary_light"]}; border: 1px solid {COLORS["border"]}; }}
+.ws-turn {{ display: contents; }}
+.ws-msg-assistant {{ align-self: flex-start; background: {COLORS["bg_white"]}; border: 1px solid {COLORS["border"]}; }}
+"""
+
+# Precompiled fragment templates (str.format placeholders, styles via SHARED_CSS)
+SCORE_TEMPLATE = '<span class="ws-stars ws-c-{color}">{stars}</span> <span class="ws-score-value ws-c-{color}">({score}/5)</span>'
+
+PROGRESS_BAR_TEMPLATE = '''
+        <div class="ws-bar">
+            <div class="ws-bar-head">
+                <span class="ws-bar-name">{name}</span>
+                <span class="ws-bar-count">{count} questions</span>
+            </div>
+            <div class="ws-bar-track">
+                <div class="ws-bar-fill ws-bg-{color}" style="width: {pct}%;"></div>
+            </div>
+        </div>'''
+
+COVERAGE_GROUP_TEMPLATE = '<div class="ws-cov-group"><h4 class="ws-cov-heading ws-c-{color}">{heading}</h4>'
+
+# (level, heading, color) in display order
+COVERAGE_GROUPS = [
+    ("well_covered", "✓ Well Covered", "primary"),
+    ("partially_covered", "◐ Partially Covered", "success"),
+    ("lightly_covered", "○ Needs More Depth", "warning"),
+    ("not_covered", "○ Not Yet Explored", "text_light"),
+]
+
+CHAT_MESSAGE_TEMPLATE = '<div class="ws-msg ws-msg-{role}">{body}</div>'
+
+# Runs in the browser after each question: appends the new message pair to
+# the transcript, so only that pair crosses the wire instead of the history
+APPEND_TURN_JS = r"""
+(turnHtml) => {
+    const log = document.querySelector('#ws-transcript .ws-chat-log');
+    if (log && turnHtml) {
+        // A replayed (duplicate) turn is already in the transcript
+        const turn = turnHtml.match(/data-turn="(\d+)"/);
+        if (turn && log.querySelector(`[data-turn="${turn[1]}"]`)) {
+            return;
+        }
+        log.insertAdjacentHTML('beforeend', turnHtml);
+        log.scrollTop = log.scrollHeight;
+    }
+}
+"""
+
+FEEDBACK_TEMPLATE = '''
+<div class="ws-panel">
+{degraded}    <div class="ws-score-box">
+        <div class="ws-score-label">Question Quality</div>
+        {score_html}
+    </div>
+
+    <div class="ws-card">
+        <div class="ws-card-title ws-c-primary">📍 Areas Covered</div>
+        <div class="ws-card-body">{areas}</div>
+    </div>
+
+    <div class="ws-card">
+        <div class="ws-card-title ws-c-success">✓ Strengths</div>
+        <div class="ws-card-body">{strengths}</div>
+    </div>
+
+    <div class="ws-card">
+        <div class="ws-card-title ws-c-accent">↑ How to Improve</div>
+        <div class="ws-card-body">{improvement}</div>
+    </div>
+
+    <div class="ws-card ws-callout">
+        <div class="ws-card-title ws-c-primary">💡 Suggested Follow-up</div>
+        <div class="ws-card-body ws-italic">"{follow_up}"</div>
+    </div>
 
-def generate_new_use_case(role: str):
-    """Generate a new use case and display it."""
-    # Use the stakeholder agent to generate a use case
-    use_case = stakeholder_agent._generate_use_case(role=role)
-    current_use_case["use_case"] = use_case
+    <div class="ws-card">
+        <div class="ws-card-title ws-c-purple">📝 Tip</div>
+        <div class="ws-card-body">{tip}</div>
+    </div>
+{uncovered}</div>
+'''
 
-    name = use_case.get("name", "Generated Use Case")
-    brief = use_case.get("brief_description", "A dynamically generated scenario for practice.")
+# Shown above feedback from the local heuristic scorer
+DEGRADED_TEMPLATE = '''
+    <div class="ws-card ws-callout">
+        <div class="ws-card-title ws-c-warning">⚠ Approximate Feedback</div>
+        <div class="ws-card-body">The AI coach is temporarily unavailable, so this question was scored by a quick automatic check.</div>
+    </div>
+'''
 
-    use_case_html = f'''
+UNCOVERED_TEMPLATE = '''
+    <div class="ws-card ws-callout">
+        <div class="ws-card-title ws-c-success">🔓 Uncovered {count} hidden fact(s)</div>
+    </div>
+'''
+
+DEFERRED_FEEDBACK_TEMPLATE = '''
+<div class="ws-panel">
+    <div class="ws-card ws-callout">
+        <div class="ws-card-title ws-c-primary">⏳ Feedback Pending</div>
+        <div class="ws-card-body">Feedback for {pending} question(s) is on its way and will appear here, in order, as soon as it is ready.</div>
+    </div>
+</div>
+'''
+
+STATS_TEMPLATE = '''
+<div class="ws-stats">
+    <div class="ws-stat">
+        <div class="ws-stat-label">Questions</div>
+        <div class="ws-stat-value ws-c-text_dark">{num_questions}</div>
+    </div>
+    <div class="ws-stat">
+        <div class="ws-stat-label">Avg Score</div>
+        <div class="ws-stat-value ws-c-{color}">{avg_score:.1f}/5</div>
+    </div>
+{facts}</div>
+'''
+
+FACTS_STAT_TEMPLATE = '''    <div class="ws-stat">
+        <div class="ws-stat-label">Facts Uncovered</div>
+        <div class="ws-stat-value ws-c-success">{revealed}/{total}</div>
+    </div>
+'''
+
+
+def render_use_case_html(use_case: dict, ready: bool) -> str:
+    """Render a (possibly still generating) use case card."""
+    name = use_case.get("name") or "Generated Use Case"
+    brief = use_case.get("brief_description") or "A dynamically generated scenario for practice."
+    if ready:
+        status = '✓ Ready to start! Click "Start Session" to begin the interview.'
+    else:
+        status = "⏳ Preparing the stakeholder's background details..."
+
+    return f'''
 <div style="font-family: system-ui, sans-serif; padding: 20px; background: {COLORS["bg_white"]}; border-radius: 12px; border: 2px solid {COLORS["primary"]};">
     <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 12px;">
         <span style="font-size: 1.5em;">🎲</span>
@@ -63,144 +324,245 @@ def generate_new_use_case(role: str):
     </div>
     <div style="color: {COLORS["text_dark"]}; line-height: 1.6; font-size: 0.95em;">{brief}</div>
     <div style="margin-top: 16px; padding: 12px; background: {COLORS["primary_light"]}; border-radius: 8px; border-left: 4px solid {COLORS["primary"]};">
-        <div style="color: {COLORS["primary"]}; font-size: 0.85em; font-weight: 500;">✓ Ready to start! Click "Start Session" to begin the interview.</div>
+        <div style="color: {COLORS["primary"]}; font-size: 0.85em; font-weight: 500;">{status}</div>
     </div>
 </div>
 '''
+
+
+def generate_new_use_case(role: str, session_id: str):
+    """
+    Generate a new use case and display it.
+
+    Streams: the name and description are shown as soon as the model has
+    written them, and Start Session is enabled once the hidden details are
+    complete.
+
+    A new use case supersedes the session's outstanding work, which is
+    cancelled; this generation is in turn abandoned if another one (or a
+    session start) supersedes it before it finishes.
+    """
+    import gradio as gr
+
+    token = session_tokens.renew(session_id)
+    speculator.reset(session_id)
+
+    # Use the session's stakeholder agent to generate a use case; the
+    # session is not locked while the model writes
+    with session_manager.session(session_id, save=False) as session:
+        stakeholder = session.stakeholder
+
+    use_case = None
+    shown = None
+    try:
+        for use_case in stakeholder.stream_use_case(role=role):
+            if token.cancelled:
+                return
+            visible = (use_case.get("name"), use_case.get("brief_description"))
+            if visible[0] and visible != shown:
+                shown = visible
+                yield render_use_case_html(use_case, ready=False), gr.update(interactive=False, visible=True)
+    except RateLimitedError:
+        raise gr.Error(BUSY_MESSAGE)
+
+    if not _store_use_case(role, session_id, use_case, token):
+        return
+
     # Show start button (visible and interactive)
-    return use_case_html, gr.update(interactive=True, visible=True)
+    yield render_use_case_html(use_case, ready=True), gr.update(interactive=True, visible=True)
+
+
+def _store_use_case(role: str, session_id: str, use_case: dict, token) -> bool:
+    """
+    Make a generated use case the one the session starts next.
+
+    Returns:
+        False if the generation was superseded (nothing is stored)
+    """
+    if token.cancelled:
+        return False
+    with session_manager.session(session_id) as session:
+        session.pending_use_case = use_case
+
+    # Prepare the stakeholder's introduction while the trainee reads the brief
+    prefetch_intro(API_KEY, role, use_case, session_id=session_id)
+    return True
 
 
 def get_score_html(score: int) -> str:
     """Generate HTML for score display with color coding."""
+    return _render_score(score)
+
+
+@functools.lru_cache(maxsize=16)
+def _render_score(score: int) -> str:
     colors = {
-        1: COLORS["error"],
-        2: COLORS["accent"],
-        3: COLORS["warning"],
-        4: COLORS["success"],
-        5: COLORS["primary"],
+        1: "error",
+        2: "accent",
+        3: "warning",
+        4: "success",
+        5: "primary",
     }
-    color = colors.get(score, COLORS["text_light"])
+    color = colors.get(score, "text_light")
     filled = "★" * score
     empty = "☆" * (5 - score)
-    return f'<span style="color: {color}; font-size: 1.6em;">{filled}{empty}</span> <span style="color: {color}; font-weight: bold; font-size: 1.1em;">({score}/5)</span>'
+    return SCORE_TEMPLATE.format(color=color, stars=f"{filled}{empty}", score=score)
 
 
 def get_coverage_html(coverage_status: dict) -> str:
-    """Generate HTML for coverage display with progress bars."""
-    html_parts = [f'<div style="font-family: system-ui, sans-serif; color: {COLORS["text_dark"]};">']
+    """
+    Generate HTML for coverage display with progress bars.
 
-    well_covered = []
-    partial = []
-    light = []
-    not_covered = []
+    The fragment only depends on each area's count and level, so it is
+    cached on that vector and reused until coverage actually changes.
+    """
+    key = tuple((area, info["count"], info["level"]) for area, info in coverage_status.items())
+    return _render_coverage(key)
 
-    for area, info in coverage_status.items():
+
+@functools.lru_cache(maxsize=1024)
+def _render_coverage(coverage_key: tuple) -> str:
+    groups = {level: [] for level, _, _ in COVERAGE_GROUPS}
+
+    for area, count, level in coverage_key:
         display_name = area.replace("_", " ").title()
-        count = info["count"]
-        level = info["level"]
-
-        if level == "well_covered":
-            well_covered.append((display_name, count))
-        elif level == "partially_covered":
-            partial.append((display_name, count))
-        elif level == "lightly_covered":
-            light.append((display_name, count))
-        else:
-            not_covered.append((display_name, count))
+        groups.get(level, groups["not_covered"]).append((display_name, count))
 
     def make_progress_bar(name, count, color, max_count=4):
         pct = min(100, (count / max_count) * 100)
-        return f'''
-        <div style="margin-bottom: 12px;">
-            <div style="display: flex; justify-content: space-between; margin-bottom: 4px;">
-                <span style="font-size: 0.9em; color: {COLORS["text_dark"]}; font-weight: 500;">{name}</span>
-                <span style="font-size: 0.85em; color: {COLORS["text_light"]};">{count} questions</span>
-            </div>
-            <div style="background: {COLORS["bg_gray"]}; border-radius: 6px; height: 10px; overflow: hidden;">
-                <div style="background: {color}; width: {pct}%; height: 100%; border-radius: 6px; transition: width 0.3s;"></div>
-            </div>
-        </div>'''
-
-    if well_covered:
-        html_parts.append(f'<div style="margin-bottom: 20px;"><h4 style="color: {COLORS["primary"]}; margin: 0 0 12px 0; font-size: 0.95em; font-weight: 600;">✓ Well Covered</h4>')
-        for name, count in well_covered:
-            html_parts.append(make_progress_bar(name, count, COLORS["primary"]))
+        return PROGRESS_BAR_TEMPLATE.format(name=name, count=count, color=color, pct=pct)
+
+    html_parts = ['<div class="ws-panel">']
+    for level, heading, color in COVERAGE_GROUPS:
+        if not groups[level]:
+            continue
+        bar_color = "border_dark" if level == "not_covered" else color
+        html_parts.append(COVERAGE_GROUP_TEMPLATE.format(color=color, heading=heading))
+        for name, count in groups[level]:
+            html_parts.append(make_progress_bar(name, count, bar_color))
         html_parts.append('</div>')
 
-    if partial:
-        html_parts.append(f'<div style="margin-bottom: 20px;"><h4 style="color: {COLORS["success"]}; margin: 0 0 12px 0; font-size: 0.95em; font-weight: 600;">◐ Partially Covered</h4>')
-        for name, count in partial:
-            html_parts.append(make_progress_bar(name, count, COLORS["success"]))
-        html_parts.append('</div>')
+    html_parts.append('</div>')
+    return ''.join(html_parts)
 
-    if light:
-        html_parts.append(f'<div style="margin-bottom: 20px;"><h4 style="color: {COLORS["warning"]}; margin: 0 0 12px 0; font-size: 0.95em; font-weight: 600;">○ Needs More Depth</h4>')
-        for name, count in light:
-            html_parts.append(make_progress_bar(name, count, COLORS["warning"]))
-        html_parts.append('</div>')
 
-    if not_covered:
-        html_parts.append(f'<div style="margin-bottom: 20px;"><h4 style="color: {COLORS["text_light"]}; margin: 0 0 12px 0; font-size: 0.95em; font-weight: 600;">○ Not Yet Explored</h4>')
-        for name, count in not_covered:
-            html_parts.append(make_progress_bar(name, count, COLORS["border_dark"]))
-        html_parts.append('</div>')
+@functools.lru_cache(maxsize=1)
+def _markdown():
+    """Markdown renderer for chat messages (raw HTML in messages is escaped)."""
+    from markdown_it import MarkdownIt
 
-    html_parts.append('</div>')
-    return ''.join(html_parts)
+    return MarkdownIt("commonmark", {"html": False}).enable("table")
 
 
-def format_feedback_html(analysis: dict) -> str:
-    """Format analysis as styled HTML."""
-    score = analysis.get("score", 0)
-    areas = analysis.get("coverage_areas", [])
-    areas_display = ", ".join(a.replace("_", " ").title() for a in areas)
+def render_message_html(role: str, content: str, role_display: str = "Stakeholder") -> str:
+    """
+    Render one chat message.
 
-    score_html = get_score_html(score)
+    Args:
+        role: "practitioner"/"user" for the trainee, anything else for the stakeholder
+        content: Message text (markdown)
+        role_display: Stakeholder name shown before their messages
+    """
+    if role in ("practitioner", "user"):
+        return CHAT_MESSAGE_TEMPLATE.format(role="user", body=_markdown().render(content))
+    body = _markdown().render(f"**[{role_display}]**: {content}")
+    return CHAT_MESSAGE_TEMPLATE.format(role="assistant", body=body)
 
-    return f'''
-<div style="font-family: system-ui, sans-serif; color: {COLORS["text_dark"]};">
-    <div style="text-align: center; padding: 20px; background: {COLORS["primary_light"]}; border-radius: 12px; margin-bottom: 16px; border: 1px solid {COLORS["border"]};">
-        <div style="font-size: 0.9em; color: {COLORS["text_medium"]}; margin-bottom: 8px; font-weight: 500;">Question Quality</div>
-        {score_html}
-    </div>
 
-    <div style="background: {COLORS["bg_white"]}; border-radius: 10px; padding: 16px; margin-bottom: 14px; border: 1px solid {COLORS["border"]};">
-        <div style="color: {COLORS["primary"]}; font-weight: 600; font-size: 0.9em; margin-bottom: 8px;">📍 Areas Covered</div>
-        <div style="color: {COLORS["text_dark"]}; font-size: 0.95em;">{areas_display or "None identified"}</div>
-    </div>
+def render_turn_html(question: str, response: str, role_display: str, turn: int) -> str:
+    """Render the message pair for one question - the per-turn chat delta."""
+    messages = render_message_html("user", question) + render_message_html("assistant", response, role_display)
+    return f'<div class="ws-turn" data-turn="{turn}">{messages}</div>'
 
-    <div style="background: {COLORS["bg_white"]}; border-radius: 10px; padding: 16px; margin-bottom: 14px; border: 1px solid {COLORS["border"]};">
-        <div style="color: {COLORS["success"]}; font-weight: 600; font-size: 0.9em; margin-bottom: 8px;">✓ Strengths</div>
-        <div style="color: {COLORS["text_dark"]}; font-size: 0.95em;">{analysis.get('strengths', 'N/A')}</div>
-    </div>
 
-    <div style="background: {COLORS["bg_white"]}; border-radius: 10px; padding: 16px; margin-bottom: 14px; border: 1px solid {COLORS["border"]};">
-        <div style="color: {COLORS["accent"]}; font-weight: 600; font-size: 0.9em; margin-bottom: 8px;">↑ How to Improve</div>
-        <div style="color: {COLORS["text_dark"]}; font-size: 0.95em;">{analysis.get('improvement', 'N/A')}</div>
-    </div>
+def turn_key(seen_turn: int, question: str) -> str:
+    """
+    Idempotency key for a submission: the turn the browser had last seen
+    plus the question. A double submit or client retry repeats the key; the
+    same question asked again later does not, because the turn has moved on.
+    """
+    return hashlib.sha1(f"{seen_turn}:{question.strip()}".encode("utf-8")).hexdigest()
 
-    <div style="background: {COLORS["primary_light"]}; border-radius: 10px; padding: 16px; margin-bottom: 14px; border-left: 4px solid {COLORS["primary"]};">
-        <div style="color: {COLORS["primary"]}; font-weight: 600; font-size: 0.9em; margin-bottom: 8px;">💡 Suggested Follow-up</div>
-        <div style="color: {COLORS["text_dark"]}; font-size: 0.95em; font-style: italic;">"{analysis.get('follow_up_suggestion', 'N/A')}"</div>
-    </div>
 
-    <div style="background: {COLORS["bg_white"]}; border-radius: 10px; padding: 16px; border: 1px solid {COLORS["border"]};">
-        <div style="color: {COLORS["purple"]}; font-weight: 600; font-size: 0.9em; margin-bottom: 8px;">📝 Tip</div>
-        <div style="color: {COLORS["text_dark"]}; font-size: 0.95em;">{analysis.get('tip', 'N/A')}</div>
-    </div>
-</div>
-'''
+def render_transcript_html(conversation_history: list, role_display: str) -> str:
+    """Render the full transcript from the session's conversation history."""
+    messages = "".join(
+        render_message_html(entry.get("role", ""), entry.get("content", ""), role_display)
+        for entry in conversation_history
+    )
+    return f'<div class="ws-chat-log">{messages}</div>'
 
 
-def start_session(role: str):
-    """Start a new practice session."""
-    analyzer_agent.reset()
+def format_feedback_html(analysis: dict) -> str:
+    """Format analysis as styled HTML."""
+    score = analysis.get("score", 0)
+    areas = analysis.get("coverage_areas", [])
+    areas_display = ", ".join(a.replace("_", " ").title() for a in areas)
+    uncovered = analysis.get("facts_uncovered", 0)
+
+    return FEEDBACK_TEMPLATE.format(
+        degraded=DEGRADED_TEMPLATE if analysis.get("degraded") else "",
+        score_html=get_score_html(score),
+        areas=areas_display or "None identified",
+        strengths=analysis.get('strengths', 'N/A'),
+        improvement=analysis.get('improvement', 'N/A'),
+        follow_up=analysis.get('follow_up_suggestion', 'N/A'),
+        tip=analysis.get('tip', 'N/A'),
+        uncovered=UNCOVERED_TEMPLATE.format(count=uncovered) if uncovered else "",
+    )
+
+
+def _start_practice(session, role: str) -> bool:
+    """
+    Start a locked session's generated use case, clearing any previous practice.
+
+    Returns:
+        False if no use case has been generated yet
+
+    Raises:
+        RateLimitedError, CircuitOpenError: If the introduction could not be generated
+    """
+    session.analyzer.reset()
+    session.last_key = None
+    if session.pending_use_case is None:
+        return False
+    session.stakeholder.start_session(role, use_case=session.pending_use_case)
+    return True
+
+
+def start_session(role: str, session_id: str):
+    """
+    Start a new practice session.
+
+    Work still running for the previous one (a turn, background analysis,
+    speculation) is cancelled first, so nothing from it can land in the
+    new session.
+    """
+    import gradio as gr
+
+    token = session_tokens.renew(session_id)
+    speculator.reset(session_id)
+
+    try:
+        with session_manager.session(session_id) as session, cancellation(token):
+            try:
+                started = _start_practice(session, role)
+            except RateLimitedError:
+                raise gr.Error(BUSY_MESSAGE)
+            except CircuitOpenError:
+                raise gr.Error(UNAVAILABLE_MESSAGE)
+            role_display = session.stakeholder.get_role_display()
+            use_case_brief = session.stakeholder.get_use_case_brief()
+            coverage_status = session.analyzer.get_coverage_status()
+            transcript_html = render_transcript_html(session.stakeholder.get_conversation_history(), role_display)
+    except RequestCancelledError:
+        # Superseded by another start; the session was not saved
+        return (gr.update(),) * 8
 
     # Check if we have a generated use case
-    if current_use_case["use_case"] is None:
+    if not started:
         return (
-            [],
+            transcript_html,
             f'''
 <div style="text-align: center; padding: 40px; color: {COLORS["error"]}; font-family: system-ui, sans-serif;">
     <div style="font-size: 2em; margin-bottom: 16px;">⚠️</div>
@@ -217,14 +579,6 @@ def start_session(role: str):
             gr.update(visible=False),  # tips_section
         )
 
-    # Start session with the generated use case
-    intro = stakeholder_agent.start_session(role, use_case=current_use_case["use_case"])
-
-    role_display = stakeholder_agent.get_role_display()
-    use_case_brief = stakeholder_agent.get_use_case_brief()
-
-    chat_history = [{"role": "assistant", "content": f"**[{role_display}]**: {intro}"}]
-
     initial_feedback = f'''
 <div style="font-family: system-ui, sans-serif; color: {COLORS["text_dark"]};">
     <div style="text-align: center; padding: 24px; background: linear-gradient(135deg, {COLORS["primary_light"]} 0%, {COLORS["bg_white"]} 100%); border-radius: 12px; margin-bottom: 16px; border: 1px solid {COLORS["border"]};">
@@ -244,11 +598,10 @@ def start_session(role: str):
 </div>
 '''
 
-    coverage_status = analyzer_agent.get_coverage_status()
     coverage_html = get_coverage_html(coverage_status)
 
     return (
-        chat_history,
+        transcript_html,
         initial_feedback,
         coverage_html,
         "",
@@ -260,34 +613,171 @@ def start_session(role: str):
     )
 
 
-def submit_question(question: str, chat_history: list):
-    """Process a question and get response + feedback."""
-    if not question.strip():
-        coverage_status = analyzer_agent.get_coverage_status()
-        return chat_history, "Please enter a question.", get_coverage_html(coverage_status), get_stats_html()
+def submit_question(question: str, session_id: str, seen_turn: int = 0):
+    """
+    Process a question and get response + feedback.
+
+    The conversation itself stays server-side in the session; only the new
+    message pair is returned, for the browser to append to the transcript.
+    In background analysis mode, or if analysis quota is exhausted, the
+    reply is returned straight away and the feedback timer is started to
+    deliver the analysis once the background worker has it. Questions that
+    match the last suggested follow-up are answered from the speculator.
+
+    Turns are numbered per session. A submission with the same idempotency
+    key as the last turn (see turn_key) is a duplicate - e.g. Enter and Ask
+    both fired - and gets that turn's result again without any model calls.
+    A duplicate of a turn still in flight waits on the session lock and
+    then gets the finished result.
+
+    If the session's work is cancelled mid-turn (a new use case or session
+    was started, or the tab closed), the turn is dropped without saving.
+
+    Args:
+        question: The practitioner's question
+        session_id: Browser session id
+        seen_turn: The last turn number the browser has received
+    """
+    import gradio as gr
+
+    try:
+        with cancellation(session_tokens.current(session_id)):
+            return _answer_question(question, session_id, seen_turn)
+    except RequestCancelledError:
+        return (gr.update(),) * 6
+
+
+def _answer_question(question: str, session_id: str, seen_turn: int):
+    """submit_question() under the session's cancel token."""
+    import gradio as gr
+
+    key = turn_key(seen_turn, question)
+    # A matching speculation still in flight is waited for before locking
+    speculator.wait(session_id, question)
+
+    with session_manager.session(session_id) as session:
+        stakeholder_agent = session.stakeholder
+        analyzer_agent = session.analyzer
+
+        if not question.strip():
+            coverage_status = analyzer_agent.get_coverage_status()
+            stats_html = get_stats_html(analyzer_agent, stakeholder_agent.get_disclosure_status())
+            return (
+                "", "Please enter a question.", get_coverage_html(coverage_status), stats_html,
+                gr.update(), session.turn_seq
+            )
 
-    response = stakeholder_agent.respond(question)
+        try:
+            turn, replayed = _run_turn(session, question, key)
+        except RateLimitedError:
+            raise gr.Error(BUSY_MESSAGE)
+        except CircuitOpenError:
+            raise gr.Error(UNAVAILABLE_MESSAGE)
+        pending = bool(analyzer_agent.deferred)
+        turn_html = render_turn_html(turn.question, turn.answer, stakeholder_agent.get_role_display(), session.turn_seq)
+        feedback_html = _turn_feedback_html(turn, analyzer_agent)
+        coverage_html = get_coverage_html(analyzer_agent.get_coverage_status())
+        stats_html = get_stats_html(analyzer_agent, stakeholder_agent.get_disclosure_status())
+        seq = session.turn_seq
+
+    if not replayed:
+        _after_turn(session_id, pending)
+
+    return turn_html, feedback_html, coverage_html, stats_html, gr.Timer(active=pending), seq
+
+
+def _run_turn(session, question: str, key: str, defer: bool = False) -> tuple:
+    """
+    Answer a question in a locked session.
+
+    A submission repeating the last turn's idempotency key gets that turn
+    back without any model calls. Questions that match the last suggested
+    follow-up are answered from the speculator; callers wait for it with
+    speculator.wait() before locking the session.
+
+    Args:
+        session: The locked session
+        question: The practitioner's question
+        key: The submission's idempotency key (see turn_key)
+        defer: Leave the analysis to the background worker even in inline mode
+
+    Returns:
+        (the turn record, whether it was replayed)
+
+    Raises:
+        RateLimitedError, CircuitOpenError: If the stakeholder could not answer
+    """
+    if session.last_key == key:
+        return session.turns[-1], True
+
+    stakeholder_agent = session.stakeholder
+    analyzer_agent = session.analyzer
+    response = speculator.take(session.session_id, question, stakeholder_agent)
+    if response is None:
+        response = stakeholder_agent.respond(question)
+
+    # Questions already waiting are scored first, by the worker, in order
+    if defer or ANALYSIS_MODE == "background" or analyzer_agent.deferred:
+        analyzer_agent.defer(question, response, stakeholder_agent.last_revealed)
+    else:
+        analyzer_agent.analyze_or_defer(question, response, stakeholder_agent.last_revealed)
 
-    analysis = analyzer_agent.analyze_question(
-        question,
-        response,
-        stakeholder_agent.get_conversation_history()
-    )
+    session.last_key = key
+    return session.turns[-1], False
 
-    role_display = stakeholder_agent.get_role_display()
-    chat_history.append({"role": "user", "content": question})
-    chat_history.append({"role": "assistant", "content": f"**[{role_display}]**: {response}"})
 
-    feedback_html = format_feedback_html(analysis)
-    coverage_status = analyzer_agent.get_coverage_status()
-    coverage_html = get_coverage_html(coverage_status)
-    stats_html = get_stats_html()
+def _after_turn(session_id: str, pending: bool):
+    """Once a turn is saved: score it in the background, or speculate on its follow-up."""
+    if pending:
+        analysis_worker.submit(session_id)
+    else:
+        speculator.schedule(session_id)
+
+
+def _turn_feedback_html(turn, analyzer_agent: AnalyzerAgent) -> str:
+    """Feedback for a turn: its analysis, or the pending notice while it waits to be scored."""
+    if turn.analysis is None:
+        return DEFERRED_FEEDBACK_TEMPLATE.format(pending=len(analyzer_agent.deferred))
+    return format_feedback_html(turn.analysis)
+
+
+def poll_feedback(session_id: str, seen_version: int):
+    """
+    Deliver feedback produced by the background analysis worker.
 
-    return chat_history, feedback_html, coverage_html, stats_html
+    Runs on the feedback timer while analysis is pending. Returns no-op
+    updates until a new analysis has been recorded, and stops the timer
+    once the session's queue is drained.
+    """
+    import gradio as gr
 
+    # Check for pending work before reading the version, so a result that
+    # lands in between is still delivered on the final tick
+    busy = analysis_worker.is_pending(session_id)
+    version = analysis_worker.version(session_id)
+    if version == seen_version:
+        return gr.update(), gr.update(), gr.update(), seen_version, gr.Timer(active=busy)
 
-def get_stats_html() -> str:
-    """Generate stats HTML."""
+    with session_manager.session(session_id, save=False) as session:
+        analyzer_agent = session.analyzer
+        if analyzer_agent.deferred:
+            feedback_html = DEFERRED_FEEDBACK_TEMPLATE.format(pending=len(analyzer_agent.deferred))
+        else:
+            feedback_html = format_feedback_html(analyzer_agent.last_analysis())
+        coverage_html = get_coverage_html(analyzer_agent.get_coverage_status())
+        stats_html = get_stats_html(analyzer_agent, session.stakeholder.get_disclosure_status())
+
+    return feedback_html, coverage_html, stats_html, version, gr.Timer(active=busy)
+
+
+def get_stats_html(analyzer_agent: AnalyzerAgent, disclosure_status: Optional[dict] = None) -> str:
+    """
+    Generate stats HTML for a session's analyzer.
+
+    Args:
+        analyzer_agent: The session's analyzer
+        disclosure_status: Hidden facts revealed per area (adds a "Facts Uncovered" stat)
+    """
     avg_score = analyzer_agent.get_average_score()
     num_questions = len(analyzer_agent.question_scores)
 
@@ -295,197 +785,628 @@ def get_stats_html() -> str:
         return ""
 
     if avg_score >= 4:
-        color = COLORS["primary"]
+        color = "primary"
     elif avg_score >= 3:
-        color = COLORS["success"]
+        color = "success"
     elif avg_score >= 2:
-        color = COLORS["warning"]
+        color = "warning"
     else:
-        color = COLORS["accent"]
+        color = "accent"
 
-    return f'''
-<div style="display: flex; justify-content: center; gap: 40px; padding: 16px; background: {COLORS["bg_light"]}; border-radius: 10px; border: 1px solid {COLORS["border"]};">
-    <div style="text-align: center;">
-        <div style="color: {COLORS["text_light"]}; font-size: 0.85em; margin-bottom: 4px; font-weight: 500;">Questions</div>
-        <div style="color: {COLORS["text_dark"]}; font-size: 1.5em; font-weight: 700;">{num_questions}</div>
-    </div>
-    <div style="text-align: center;">
-        <div style="color: {COLORS["text_light"]}; font-size: 0.85em; margin-bottom: 4px; font-weight: 500;">Avg Score</div>
-        <div style="color: {color}; font-size: 1.5em; font-weight: 700;">{avg_score:.1f}/5</div>
-    </div>
-</div>
-'''
+    facts = ""
+    if disclosure_status:
+        facts = FACTS_STAT_TEMPLATE.format(
+            revealed=sum(counts["revealed"] for counts in disclosure_status.values()),
+            total=sum(counts["total"] for counts in disclosure_status.values()),
+        )
 
+    return STATS_TEMPLATE.format(num_questions=num_questions, avg_score=avg_score, color=color, facts=facts)
 
-def get_summary():
-    """Generate session summary."""
-    if not stakeholder_agent.conversation_history:
-        return "No session to summarize. Start a session first."
 
-    summary = analyzer_agent.get_session_summary(
-        stakeholder_agent.get_conversation_history()
+def _summarize(session) -> str:
+    """The session summary for a locked session (one model call)."""
+    return session.analyzer.get_session_summary(
+        session.stakeholder.get_conversation_history(),
+        disclosure_status=session.stakeholder.get_disclosure_status(),
+        revealed_facts=session.stakeholder.get_revealed_facts()
     )
+
+
+def get_summary(session_id: str):
+    """Generate session summary."""
+    import gradio as gr
+
+    with session_manager.session(session_id) as session:
+        if not session.turns:
+            return "No session to summarize. Start a session first."
+
+        try:
+            with cancellation(session_tokens.current(session_id)):
+                summary = _summarize(session)
+        except RateLimitedError:
+            return BUSY_MESSAGE
+        except CircuitOpenError:
+            return UNAVAILABLE_MESSAGE
+        except RequestCancelledError:
+            return gr.update()
     return summary
 
 
-# Build the Gradio interface with Light Theme
-with gr.Blocks(
-    title="Agentic Thinking Workshop",
-    theme=gr.themes.Soft(
-        primary_hue="blue",
-        secondary_hue="slate",
-    )
-) as app:
-
-    gr.Markdown("""
-    # 🎯 Agentic Thinking Workshop
-
-    Practice discovery questioning by interviewing AI stakeholders. Get real-time feedback and track your coverage.
-    """)
-
-    with gr.Row():
-        with gr.Column(scale=3):
-            # Phase 1: Setup (always visible)
-            with gr.Group():
-                gr.Markdown("### Setup Your Session")
-                with gr.Row():
-                    role_dropdown = gr.Dropdown(
-                        choices=[
-                            ("Agent Owner", "agent_owner"),
-                            ("Business Owner", "business_owner")
-                        ],
-                        value="agent_owner",
-                        label="Stakeholder Role",
-                        info="Who do you want to interview?",
-                        scale=2
-                    )
-                    generate_btn = gr.Button("🎲 Generate Use Case", variant="secondary", scale=1)
+def end_browser_session(session_id: str):
+    """Cancel a session's outstanding LLM work once its tab has gone away."""
+    session_tokens.cancel(session_id)
+    speculator.reset(session_id)
+    analysis_worker.forget(session_id)
 
-                use_case_display = gr.HTML(
-                    value=f'''
+
+def create_ui():
+    """
+    Build the Gradio interface with Light Theme.
+
+    Returns:
+        The gr.Blocks app
+    """
+    import gradio as gr
+
+    with gr.Blocks(
+        title="Agentic Thinking Workshop",
+        css=SHARED_CSS,
+        theme=gr.themes.Soft(
+            primary_hue="blue",
+            secondary_hue="slate",
+        )
+    ) as app:
+
+        # Per-browser-session id; the state itself lives in session_manager
+        session_id = gr.State(new_session_id)
+        # Background analyses already shown, and the timer that polls for more
+        feedback_version = gr.State(0)
+        feedback_timer = gr.Timer(1.0, active=False)
+        # Last turn number received, sent with each question as part of its
+        # idempotency key
+        turn_seq = gr.State(0)
+
+        gr.Markdown("""
+        # 🎯 Agentic Thinking Workshop
+
+        Practice discovery questioning by interviewing AI stakeholders. Get real-time feedback and track your coverage.
+        """)
+
+        with gr.Row():
+            with gr.Column(scale=3):
+                # Phase 1: Setup (always visible)
+                with gr.Group():
+                    gr.Markdown("### Setup Your Session")
+                    with gr.Row():
+                        role_dropdown = gr.Dropdown(
+                            choices=[
+                                ("Agent Owner", "agent_owner"),
+                                ("Business Owner", "business_owner")
+                            ],
+                            value="agent_owner",
+                            label="Stakeholder Role",
+                            info="Who do you want to interview?",
+                            scale=2
+                        )
+                        generate_btn = gr.Button("🎲 Generate Use Case", variant="secondary", scale=1)
+
+                    use_case_display = gr.HTML(
+                        value=f'''
 <div style="text-align: center; padding: 30px; color: {COLORS["text_light"]}; font-family: system-ui, sans-serif; background: {COLORS["bg_gray"]}; border-radius: 12px; border: 2px dashed {COLORS["border_dark"]};">
     <div style="font-size: 2em; margin-bottom: 12px;">🎲</div>
     <div style="font-size: 1em;">Click <strong>"Generate Use Case"</strong> to create a practice scenario</div>
 </div>
 ''',
-                    label="Generated Use Case"
-                )
-
-                start_btn = gr.Button("🚀 Start Session", variant="primary", size="lg", interactive=False, visible=False)
-
-            # Phase 2: Conversation (hidden until session starts)
-            conversation_section = gr.Column(visible=False)
-            with conversation_section:
-                chatbot = gr.Chatbot(
-                    label="Discovery Conversation",
-                    height=450,
-                    show_copy_button=True,
-                    type="messages"
-                )
-
-                with gr.Row():
-                    question_input = gr.Textbox(
-                        placeholder="Ask a discovery question... (Press Enter to submit)",
-                        label="Your Question",
-                        scale=5,
-                        interactive=True,
-                        lines=1
+                        label="Generated Use Case"
                     )
-                    submit_btn = gr.Button("Ask", variant="primary", scale=1, interactive=True)
-
-        # Phase 2: Right sidebar (hidden until session starts)
-        feedback_column = gr.Column(scale=2, visible=False)
-        with feedback_column:
-            stats_output = gr.HTML(value="")
 
-            gr.Markdown("### 📊 Question Feedback")
-            feedback_output = gr.HTML(
-                value=f'''
+                    start_btn = gr.Button("🚀 Start Session", variant="primary", size="lg", interactive=False, visible=False)
+
+                # Phase 2: Conversation (hidden until session starts)
+                conversation_section = gr.Column(visible=False)
+                with conversation_section:
+                    gr.Markdown("### 💬 Discovery Conversation")
+                    # Rendered in full on session start; each question then
+                    # appends only its message pair (chat_delta) client-side
+                    transcript = gr.HTML(value=render_transcript_html([], ""), elem_id="ws-transcript")
+                    chat_delta = gr.Textbox(visible=False)
+
+                    with gr.Row():
+                        question_input = gr.Textbox(
+                            placeholder="Ask a discovery question... (Press Enter to submit)",
+                            label="Your Question",
+                            scale=5,
+                            interactive=True,
+                            lines=1
+                        )
+                        submit_btn = gr.Button("Ask", variant="primary", scale=1, interactive=True)
+
+            # Phase 2: Right sidebar (hidden until session starts)
+            feedback_column = gr.Column(scale=2, visible=False)
+            with feedback_column:
+                stats_output = gr.HTML(value="")
+
+                gr.Markdown("### 📊 Question Feedback")
+                feedback_output = gr.HTML(
+                    value=f'''
 <div style="text-align: center; padding: 50px 20px; color: {COLORS["text_light"]}; font-family: system-ui, sans-serif;">
     <div style="font-size: 3em; margin-bottom: 16px;">🎯</div>
     <div style="font-size: 1.1em;">Ask your first question to get feedback!</div>
 </div>
 '''
-            )
+                )
 
-            gr.Markdown("### 📈 Framework Coverage")
-            coverage_output = gr.HTML(
-                value=f'''
+                gr.Markdown("### 📈 Framework Coverage")
+                coverage_output = gr.HTML(
+                    value=f'''
 <div style="text-align: center; padding: 30px; color: {COLORS["text_light"]}; font-family: system-ui, sans-serif;">
     No session active
 </div>
 '''
+                )
+
+                summary_btn = gr.Button("📋 Get Session Summary", variant="secondary", interactive=True)
+
+        # Phase 3: Summary section (hidden until session starts)
+        summary_section = gr.Accordion("📝 Session Summary", open=False, visible=False)
+        with summary_section:
+            summary_output = gr.Markdown(
+                value="Complete a session and click 'Get Session Summary' to see your results."
             )
 
-            summary_btn = gr.Button("📋 Get Session Summary", variant="secondary", interactive=True)
+        # Tips section (hidden until session starts)
+        tips_section = gr.Markdown(visible=False, value="""
+        ---
+        ### 💡 Tips for Better Questions
+
+        | Strategy | Example |
+        |----------|---------|
+        | **Start broad, then narrow** | "Walk me through the process" → "What happens when X fails?" |
+        | **Ask "why" and "how"** | "Why is it done this way?" "How do you handle exceptions?" |
+        | **Quantify everything** | "How many per day?" "What percentage fail?" |
+        | **Build on answers** | Reference what they just said in your follow-up |
+        | **Explore edge cases** | "What's the worst case scenario?" |
+
+        *Built with Google Gemini 2.0 Flash and Gradio*
+        """)
+
+        # Enter and Ask share one listener, so a turn in progress ignores
+        # further triggers; the controls are also locked until it finishes
+        answered = gr.on(
+            triggers=[submit_btn.click, question_input.submit],
+            fn=lambda: (gr.update(interactive=False), gr.update(interactive=False)),
+            outputs=[question_input, submit_btn],
+            queue=False,
+            trigger_mode="once"
+        ).then(
+            fn=submit_question,
+            inputs=[question_input, session_id, turn_seq],
+            outputs=[chat_delta, feedback_output, coverage_output, stats_output, feedback_timer, turn_seq]
+        )
+        answered.success(
+            fn=None,
+            inputs=[chat_delta],
+            js=APPEND_TURN_JS
+        ).then(
+            fn=lambda: "",
+            outputs=[question_input]
+        )
+        answered.then(
+            fn=lambda: (gr.update(interactive=True), gr.update(interactive=True)),
+            outputs=[question_input, submit_btn]
+        )
 
-    # Phase 3: Summary section (hidden until session starts)
-    summary_section = gr.Accordion("📝 Session Summary", open=False, visible=False)
-    with summary_section:
-        summary_output = gr.Markdown(
-            value="Complete a session and click 'Get Session Summary' to see your results."
+        # A new use case or practice session supersedes the turn in progress
+        # (and its background work, via the session's cancel token)
+        generated = generate_btn.click(
+            fn=generate_new_use_case,
+            inputs=[role_dropdown, session_id],
+            outputs=[use_case_display, start_btn],
+            cancels=[answered]
         )
 
-    # Tips section (hidden until session starts)
-    tips_section = gr.Markdown(visible=False, value="""
-    ---
-    ### 💡 Tips for Better Questions
-
-    | Strategy | Example |
-    |----------|---------|
-    | **Start broad, then narrow** | "Walk me through the process" → "What happens when X fails?" |
-    | **Ask "why" and "how"** | "Why is it done this way?" "How do you handle exceptions?" |
-    | **Quantify everything** | "How many per day?" "What percentage fail?" |
-    | **Build on answers** | Reference what they just said in your follow-up |
-    | **Explore edge cases** | "What's the worst case scenario?" |
-
-    *Built with Google Gemini 2.0 Flash and Gradio*
-    """)
-
-    generate_btn.click(
-        fn=generate_new_use_case,
-        inputs=[role_dropdown],
-        outputs=[use_case_display, start_btn]
-    )
+        start_btn.click(
+            fn=start_session,
+            inputs=[role_dropdown, session_id],
+            outputs=[
+                transcript,
+                feedback_output,
+                coverage_output,
+                stats_output,
+                conversation_section,
+                feedback_column,
+                summary_section,
+                tips_section
+            ],
+            cancels=[answered, generated]
+        ).then(
+            fn=lambda: (gr.update(interactive=True), gr.update(interactive=True)),
+            outputs=[question_input, submit_btn]
+        )
 
-    start_btn.click(
-        fn=start_session,
-        inputs=[role_dropdown],
-        outputs=[
-            chatbot,
-            feedback_output,
-            coverage_output,
-            stats_output,
-            conversation_section,
-            feedback_column,
-            summary_section,
-            tips_section
-        ]
-    )
+        feedback_timer.tick(
+            fn=poll_feedback,
+            inputs=[session_id, feedback_version],
+            outputs=[feedback_output, coverage_output, stats_output, feedback_version, feedback_timer]
+        )
 
-    submit_btn.click(
-        fn=submit_question,
-        inputs=[question_input, chatbot],
-        outputs=[chatbot, feedback_output, coverage_output, stats_output]
-    ).then(
-        fn=lambda: "",
-        outputs=[question_input]
-    )
+        summary_btn.click(
+            fn=get_summary,
+            inputs=[session_id],
+            outputs=[summary_output]
+        )
 
-    question_input.submit(
-        fn=submit_question,
-        inputs=[question_input, chatbot],
-        outputs=[chatbot, feedback_output, coverage_output, stats_output]
-    ).then(
-        fn=lambda: "",
-        outputs=[question_input]
-    )
+        def track_browser_session(session_id: str, request: gr.Request):
+            browser_sessions[request.session_hash] = session_id
+
+        def end_tab(request: gr.Request):
+            session_id = browser_sessions.pop(request.session_hash, None)
+            if session_id is not None:
+                end_browser_session(session_id)
+
+        app.load(fn=track_browser_session, inputs=[session_id])
+        app.unload(end_tab)
+
+    app.queue(default_concurrency_limit=CONCURRENCY_LIMIT)
+    ui_state["built"] = True
+    return app
+
+
+def _use_case_brief(use_case: Optional[dict]) -> Optional[dict]:
+    """The part of a use case the trainee may see (hidden details stay server-side)."""
+    if not use_case:
+        return None
+    return {"name": use_case.get("name"), "brief_description": use_case.get("brief_description")}
+
+
+def session_progress(session) -> dict:
+    """A session's coverage, scores and uncovered facts as plain data (the UI's side panels)."""
+    analyzer = session.analyzer
+    scores = analyzer.question_scores
+    disclosure = session.stakeholder.get_disclosure_status()
+    return {
+        "coverage": {
+            area: {"count": info["count"], "level": info["level"]}
+            for area, info in analyzer.get_coverage_status().items()
+        },
+        "questions": len(scores),
+        "average_score": round(sum(scores) / len(scores), 2) if scores else 0.0,
+        "facts_revealed": sum(counts["revealed"] for counts in disclosure.values()),
+        "facts_total": sum(counts["total"] for counts in disclosure.values()),
+        "pending_analyses": len(analyzer.deferred),
+    }
 
-    summary_btn.click(
-        fn=get_summary,
-        outputs=[summary_output]
-    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def create_api():
+    """
+    Build the headless JSON API, mounted at /api next to the Gradio UI.
+
+    Machine clients (LMS integrations, load tests) drive sessions with JSON
+    requests instead of the UI: no Gradio queue and no rendered HTML. The
+    handlers share sessions, cancellation and background analysis with the
+    UI. Endpoints, relative to /api:
+
+        POST   /sessions                          create a session (other
+                                                  endpoints answer 404 for unknown ids)
+        GET    /sessions/{id}                     transcript and progress
+        DELETE /sessions/{id}                     cancel its work and delete it
+        POST   /sessions/{id}/use-case            generate a use case {"role"}
+        POST   /sessions/{id}/start               start practising it {"role"}
+        POST   /sessions/{id}/questions           ask {"question", "seen_turn"}
+        POST   /sessions/{id}/questions/stream    the same as server-sent events:
+                                                  "answer", then "analysis", then "done"
+        GET    /sessions/{id}/progress            coverage and scores
+        POST   /sessions/{id}/summary             the session summary
+
+    Quota exhaustion answers 429, an open circuit 503 and work superseded by
+    a newer request for the same session 409.
+    """
+    from typing import Literal
+
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import JSONResponse, StreamingResponse
+    from pydantic import BaseModel
+
+    api = FastAPI(title="Workshop Practice API")
+
+    class RoleRequest(BaseModel):
+        role: Literal["agent_owner", "business_owner"] = "agent_owner"
+
+    class QuestionRequest(BaseModel):
+        question: str
+        # Last turn number the client has received (0 after start); a retry
+        # with the same value and question is answered once, not twice
+        seen_turn: int
+
+    @api.exception_handler(RateLimitedError)
+    def rate_limited(_request, _error):
+        return JSONResponse({"detail": BUSY_MESSAGE}, status_code=429)
+
+    @api.exception_handler(CircuitOpenError)
+    def circuit_open(_request, _error):
+        return JSONResponse({"detail": UNAVAILABLE_MESSAGE}, status_code=503)
+
+    @api.exception_handler(SessionNotFoundError)
+    def session_not_found(_request, _error):
+        return JSONResponse({"detail": "No such session"}, status_code=404)
+
+    @api.exception_handler(SessionBusyError)
+    def session_busy(_request, _error):
+        return JSONResponse({"detail": "This session is busy with another request"}, status_code=409)
+
+    @api.exception_handler(RequestCancelledError)
+    def cancelled(_request, _error):
+        return JSONResponse({"detail": "Superseded by a newer request for this session"}, status_code=409)
+
+    def require_session(session_id: str):
+        """Raise SessionNotFoundError for an unknown id, before any work is set up for it."""
+        with session_manager.session(session_id, save=False, create=False):
+            pass
+
+    def require_started(session):
+        if not session.turns:
+            raise HTTPException(409, "No practice session started - generate a use case and start one first")
+
+    def ask(session_id: str, body: QuestionRequest, defer: bool) -> tuple:
+        """Run a turn; returns (turn data, index of the turn, whether analysis is pending, replayed)."""
+        if not body.question.strip():
+            raise HTTPException(422, "Please enter a question.")
+        speculator.wait(session_id, body.question)
+        with session_manager.session(session_id, create=False) as session:
+            with cancellation(session_tokens.current(session_id)):
+                require_started(session)
+                key = turn_key(body.seen_turn, body.question)
+                turn, replayed = _run_turn(session, body.question, key, defer=defer)
+                data = {
+                    "turn": session.turn_seq,
+                    "question": turn.question,
+                    "answer": turn.answer,
+                    "analysis": turn.analysis,
+                    "replayed": replayed,
+                    "progress": session_progress(session),
+                }
+                index = len(session.turns) - 1
+                pending = bool(session.analyzer.deferred)
+        if not replayed:
+            _after_turn(session_id, pending)
+        return data, index, pending, replayed
+
+    @api.post("/sessions", status_code=201)
+    def create_session():
+        return {"session_id": session_manager.create()}
+
+    @api.get("/sessions/{session_id}")
+    def get_session(session_id: str):
+        with session_manager.session(session_id, save=False, create=False) as session:
+            stakeholder = session.stakeholder
+            return {
+                "session_id": session_id,
+                "started": bool(session.turns),
+                "role": stakeholder.role,
+                "use_case": _use_case_brief(stakeholder.use_case if session.turns else session.pending_use_case),
+                "turn": session.turn_seq,
+                "transcript": [
+                    {"role": entry["role"], "content": entry["content"], "turn": entry["turn"]}
+                    for entry in stakeholder.get_conversation_history()
+                ],
+                "progress": session_progress(session),
+            }
+
+    @api.delete("/sessions/{session_id}", status_code=204)
+    def delete_session(session_id: str):
+        require_session(session_id)
+        end_browser_session(session_id)
+        session_manager.delete(session_id)
+
+    @api.post("/sessions/{session_id}/use-case")
+    def generate_use_case(session_id: str, body: RoleRequest):
+        with session_manager.session(session_id, save=False, create=False) as session:
+            stakeholder = session.stakeholder
+        token = session_tokens.renew(session_id)
+        speculator.reset(session_id)
+        use_case = None
+        with cancellation(token):
+            for partial in stakeholder.stream_use_case(role=body.role):
+                token.check()
+                use_case = partial
+        if not _store_use_case(body.role, session_id, use_case, token):
+            raise RequestCancelledError("Superseded")
+        return {"session_id": session_id, "use_case": _use_case_brief(use_case)}
+
+    @api.post("/sessions/{session_id}/start")
+    def start(session_id: str, body: RoleRequest):
+        require_session(session_id)
+        token = session_tokens.renew(session_id)
+        speculator.reset(session_id)
+        with session_manager.session(session_id, create=False) as session, cancellation(token):
+            if not _start_practice(session, body.role):
+                raise HTTPException(409, "Generate a use case first")
+            stakeholder = session.stakeholder
+            return {
+                "session_id": session_id,
+                "role": body.role,
+                "role_display": stakeholder.get_role_display(),
+                "use_case": _use_case_brief(stakeholder.use_case),
+                "introduction": session.turns[0].answer,
+                "turn": session.turn_seq,
+                "progress": session_progress(session),
+            }
+
+    @api.post("/sessions/{session_id}/questions")
+    def ask_question(session_id: str, body: QuestionRequest):
+        return ask(session_id, body, defer=False)[0]
+
+    @api.post("/sessions/{session_id}/questions/stream")
+    def ask_question_stream(session_id: str, body: QuestionRequest):
+        # The turn runs before the response starts, so errors keep their status codes
+        data, index, pending, replayed = ask(session_id, body, defer=True)
+        token = session_tokens.current(session_id)
+
+        def events():
+            yield _sse("answer", {key: data[key] for key in ("turn", "question", "answer", "replayed")})
+            analysis, progress = data["analysis"], data["progress"]
+            deadline = time.monotonic() + API_ANALYSIS_WAIT
+            seen = None
+            while analysis is None and time.monotonic() < deadline and not token.cancelled:
+                busy = analysis_worker.is_pending(session_id)
+                version = analysis_worker.version(session_id)
+                if version != seen or not busy:
+                    seen = version
+                    with session_manager.session(session_id, save=False) as session:
+                        if index < len(session.turns):
+                            analysis = session.turns[index].analysis
+                        progress = session_progress(session)
+                    if analysis is not None or not busy:
+                        break
+                time.sleep(API_POLL_INTERVAL)
+            if analysis is not None:
+                yield _sse("analysis", {"turn": data["turn"], "analysis": analysis, "progress": progress})
+            yield _sse("done", {"turn": data["turn"], "analyzed": analysis is not None})
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @api.get("/sessions/{session_id}/progress")
+    def progress(session_id: str):
+        with session_manager.session(session_id, save=False, create=False) as session:
+            return dict(session_progress(session), turn=session.turn_seq)
+
+    @api.post("/sessions/{session_id}/summary")
+    def summary(session_id: str):
+        with session_manager.session(session_id, create=False) as session:
+            require_started(session)
+            with cancellation(session_tokens.current(session_id)):
+                return {"session_id": session_id, "summary": _summarize(session)}
+
+    return api
+
+
+def get_readiness() -> dict:
+    """
+    Report whether this process can serve practice sessions.
+
+    Returns:
+        Dictionary with an overall "ready" flag and the individual checks
+    """
+    checks = {
+        "ui_built": ui_state["built"],
+        "api_key_configured": bool(API_KEY),
+        "llm_sdk_loaded": is_sdk_loaded(),
+    }
+    return {
+        "ready": checks["ui_built"] and checks["api_key_configured"],
+        "checks": checks,
+    }
+
+
+def create_server():
+    """
+    Build the ASGI server: the Gradio UI at "/" plus health endpoints.
+
+    /healthz answers as soon as the process is up; /readyz returns 503
+    until the UI is built and an API key is configured. /metrics/models
+    reports calls, escalations, tokens and latency per model tier,
+    /metrics/speculation the follow-up speculation hit rate,
+    /metrics/coalescing how many calls were shared or served from cache,
+    /metrics/hedging per-call-site latency and duplicate requests,
+    /metrics/circuits the state of each call site's circuit breaker,
+    /metrics/tokens token usage against the session and cohort budgets, and
+    /metrics/sessions how many sessions are resident in memory or hibernated.
+    The headless JSON API (see create_api) is mounted at /api.
+    """
+    import contextlib
+
+    import gradio as gr
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_server):
+        # Load the SDK off the request path once the server is up, and
+        # start hibernating idle sessions
+        warm_up(API_KEY, tuple(set(router.models.values())))
+        session_manager.backend.start()
+        yield
+
+    server = FastAPI(lifespan=lifespan)
+
+    @server.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    @server.get("/readyz")
+    def readyz():
+        readiness = get_readiness()
+        return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+    @server.get("/metrics/models")
+    def model_metrics():
+        return router.metrics()
+
+    @server.get("/metrics/speculation")
+    def speculation_metrics():
+        return speculator.stats()
+
+    @server.get("/metrics/coalescing")
+    def coalescing_metrics():
+        return get_coalescer().stats()
+
+    @server.get("/metrics/hedging")
+    def hedging_metrics():
+        return get_hedger().stats()
+
+    @server.get("/metrics/circuits")
+    def circuit_metrics():
+        return router.circuits()
+
+    @server.get("/metrics/tokens")
+    def token_metrics():
+        return token_budget.stats()
+
+    @server.get("/metrics/sessions")
+    def session_metrics():
+        return session_manager.backend.stats()
+
+    server.mount("/api", create_api())
+
+    return gr.mount_gradio_app(server, create_ui(), path="/")
+
+
+def main():
+    """
+    Run the server: one process on one port.
+
+    Several processes sharing a port cannot work for the UI. Gradio's event
+    queue and each browser's session id live in the process that served the
+    page, and nothing routes a browser's later requests back to it. To scale
+    out, run one process per port (on one host or several) with a shared
+    SESSION_BACKEND, behind a load balancer with sticky sessions.
+    """
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Agentic Thinking Workshop")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "7860")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "1")))
+    args = parser.parse_args()
+
+    if args.workers != 1:
+        parser.error(
+            "--workers must be 1: run one process per port behind a sticky load balancer, "
+            "with a shared SESSION_BACKEND (see README, Deployment)"
+        )
+
+    uvicorn.run(create_server(), host=args.host, port=args.port)
 
 
 if __name__ == "__main__":
-    app.launch(share=False)
+    main()
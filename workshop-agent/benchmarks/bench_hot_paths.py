@@ -0,0 +1,163 @@
+"""
+Micro-benchmarks for the prompt building and HTML rendering hot paths.
+
+Every turn of a practice session assembles prompts and re-renders the
+feedback, coverage and stats panels. This script times those functions at
+realistic session sizes (1, 30 and 200 turns) and compares the results
+against a locally stored baseline so regressions fail the run.
+
+Usage (from the workshop-agent directory):
+
+    python benchmarks/bench_hot_paths.py            # compare against baseline
+    python benchmarks/bench_hot_paths.py --save     # record a new baseline
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import app  # noqa: E402
+from agents.analyzer import AnalyzerAgent  # noqa: E402
+from data.use_cases import SAMPLE_USE_CASES  # noqa: E402
+from prompts.analyzer_prompts import FRAMEWORK_COVERAGE_AREAS, get_analyzer_prompt  # noqa: E402
+from prompts.stakeholder_prompts import build_stakeholder_prompt, get_stakeholder_prompt  # noqa: E402
+
+BASELINE_PATH = ROOT / "benchmarks" / ".baseline.json"
+SESSION_SIZES = (1, 30, 200)
+ROLES = ("agent_owner", "business_owner")
+
+
+def _make_analysis(rng: random.Random) -> dict:
+    """Build an analysis dict shaped like a real analyzer response."""
+    return {
+        "score": rng.randint(1, 5),
+        "coverage_areas": rng.sample(FRAMEWORK_COVERAGE_AREAS, rng.randint(1, 3)),
+        "strengths": "Builds on the previous answer and asks for a concrete number.",
+        "improvement": "Ask how the misrouting rate differs between ticket categories.",
+        "follow_up_suggestion": "What happens to a ticket after it has been misrouted twice?",
+        "tip": "Quantify the impact before moving on to the next area.",
+    }
+
+
+def _load_session(turns: int) -> tuple:
+    """
+    Build an analyzer in the state it would have after `turns` questions.
+
+    Returns:
+        (analyzer, the last analysis produced in the simulated session)
+    """
+    rng = random.Random(turns)
+    analyzer = AnalyzerAgent(api_key=None)
+
+    analysis = {}
+    for i in range(turns):
+        analysis = _make_analysis(rng)
+        analyzer.record_analysis(f"Question {i}: how does the team handle escalations today?", analysis)
+    return analyzer, analysis
+
+
+def _build_cases() -> list:
+    """Return (name, callable) pairs for every benchmark case."""
+    cases = [
+        ("get_analyzer_prompt", get_analyzer_prompt),
+        (
+            "get_stakeholder_prompt[catalog]",
+            lambda: [
+                get_stakeholder_prompt(role, use_case)
+                for use_case in SAMPLE_USE_CASES
+                for role in ROLES
+            ],
+        ),
+        (
+            "build_stakeholder_prompt[catalog]",
+            lambda: [
+                build_stakeholder_prompt(role, use_case)
+                for use_case in SAMPLE_USE_CASES
+                for role in ROLES
+            ],
+        ),
+    ]
+
+    for turns in SESSION_SIZES:
+        analyzer, analysis = _load_session(turns)
+        coverage_status = analyzer.get_coverage_status()
+
+        cases.extend([
+            (f"format_feedback_html[{turns}]", lambda a=analysis: app.format_feedback_html(a)),
+            (f"get_coverage_html[{turns}]", lambda s=coverage_status: app.get_coverage_html(s)),
+            (f"get_stats_html[{turns}]", lambda a=analyzer: app.get_stats_html(a)),
+        ])
+
+    return cases
+
+
+def run_benchmarks(repeat: int, number: int) -> dict:
+    """
+    Time every case.
+
+    Args:
+        repeat: Number of timing rounds per case
+        number: Calls per round
+
+    Returns:
+        Dictionary mapping case name to median microseconds per call
+    """
+    results = {}
+    for name, fn in _build_cases():
+        timings = timeit.repeat(fn, repeat=repeat, number=number)
+        results[name] = statistics.median(timings) / number * 1e6
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return the names of cases slower than `tolerance` x their baseline."""
+    regressions = []
+    for name, micros in results.items():
+        base = baseline.get(name)
+        if base and micros > base * tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--save", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.3, help="Allowed slowdown factor (default 1.3)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeat, args.number)
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+
+    width = max(len(name) for name in results)
+    for name, micros in results.items():
+        base = baseline.get(name)
+        change = f"  ({micros / base:.2f}x baseline)" if base else ""
+        print(f"{name:<{width}}  {micros:10.2f} us{change}")
+
+    if args.save:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline saved to {BASELINE_PATH.relative_to(ROOT)}")
+        return 0
+
+    if not baseline:
+        print("\nNo baseline found - run with --save to record one.")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.2f}x: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
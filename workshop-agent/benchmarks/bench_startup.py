@@ -0,0 +1,108 @@
+"""
+Startup benchmark for app.py based on `python -X importtime`.
+
+Importing the app must stay cheap so autoscaled replicas come up quickly:
+the Gemini SDK and Gradio are loaded lazily, after the module is imported.
+This script fails if either shows up in the import graph of `app`, or if
+the import takes longer than the budget or the stored baseline allows.
+
+Usage (from the workshop-agent directory):
+
+    python benchmarks/bench_startup.py            # check budget and baseline
+    python benchmarks/bench_startup.py --save     # record a new baseline
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = ROOT / "benchmarks" / ".startup_baseline.json"
+
+# Modules that must only be imported on first use, never by `import app`
+DEFERRED_MODULES = ("gradio", "google.generativeai", "fastapi", "uvicorn")
+
+
+def measure_import(module: str = "app") -> tuple:
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns:
+        (cumulative import time in ms, dict of every module it imported -> cumulative ms)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Each line is "import time: self | cumulative | <indent>name", in post-order
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        entries.append((name, depth, int(cumulative_us) / 1000))
+
+    index = max(i for i, (name, depth, _) in enumerate(entries) if name == module and depth == 0)
+    total_ms = entries[index][2]
+
+    # Everything imported while importing `module` precedes it at a deeper level
+    dependencies = {}
+    for name, depth, ms in reversed(entries[:index]):
+        if depth == 0:
+            break
+        dependencies[name] = ms
+
+    return total_ms, dependencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--save", action="store_true", help="Store the result as the new baseline")
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Hard limit for `import app` (default 300)")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Allowed slowdown vs baseline (default 1.5)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # The first run warms the bytecode cache
+    measure_import()
+    runs = [measure_import() for _ in range(args.runs)]
+    total_ms = statistics.median(ms for ms, _ in runs)
+    timings = runs[-1][1]
+
+    print(f"import app: {total_ms:.1f} ms (median of {args.runs})")
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+    for name, ms in slowest[:8]:
+        print(f"  {name:<32} {ms:8.1f} ms")
+
+    failures = []
+    leaked = [name for name in DEFERRED_MODULES if name in timings]
+    if leaked:
+        failures.append(f"deferred modules imported eagerly: {', '.join(leaked)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"over budget ({total_ms:.1f} ms > {args.budget_ms:.0f} ms)")
+
+    if args.save:
+        BASELINE_PATH.write_text(json.dumps({"import_app_ms": total_ms}, indent=2) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH.relative_to(ROOT)}")
+    elif BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text())["import_app_ms"]
+        print(f"baseline: {baseline:.1f} ms ({total_ms / baseline:.2f}x)")
+        if total_ms > baseline * args.tolerance:
+            failures.append(f"regressed beyond {args.tolerance:.2f}x baseline")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+from .breaker import CircuitOpenError
+from .budget import TokenBudget, configure_token_budget, get_token_budget
+from .cancel import CancelToken, RequestCancelledError, cancellation, current_token, get_token_registry
+from .client import DEFAULT_MODEL, estimate_tokens, generate, get_model, is_sdk_loaded, warm_up
+from .coalesce import get_coalescer
+from .hedging import Hedger, configure_hedging, get_hedger
+from .router import LIGHT, STRONG, ModelRouter, configure_router, get_router
+from .scheduler import Priority, RateLimitedError, RequestScheduler, configure_scheduler, get_scheduler
+
+__all__ = [
+    "CircuitOpenError",
+    "TokenBudget",
+    "configure_token_budget",
+    "get_token_budget",
+    "CancelToken",
+    "RequestCancelledError",
+    "cancellation",
+    "current_token",
+    "get_token_registry",
+    "DEFAULT_MODEL",
+    "estimate_tokens",
+    "generate",
+    "get_model",
+    "is_sdk_loaded",
+    "warm_up",
+    "get_coalescer",
+    "Hedger",
+    "configure_hedging",
+    "get_hedger",
+    "LIGHT",
+    "STRONG",
+    "ModelRouter",
+    "configure_router",
+    "get_router",
+    "Priority",
+    "RateLimitedError",
+    "RequestScheduler",
+    "configure_scheduler",
+    "get_scheduler"
+]
@@ -0,0 +1,96 @@
+"""
+Circuit Breaker - Stops calling a model/call site that keeps failing.
+
+A breaker opens after a run of consecutive upstream failures. While open,
+calls fail fast with CircuitOpenError so callers can fall back (analysis
+switches to a local heuristic scorer) instead of waiting on an outage.
+After a cool-down one probe call is let through (half-open): if it
+succeeds the breaker closes, if it fails the breaker opens again.
+"""
+
+import threading
+import time
+from typing import Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Consecutive failures that open a breaker
+FAILURE_THRESHOLD = 5
+# Seconds a breaker stays open before letting a probe through
+RESET_TIMEOUT = 30.0
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+        clock=time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go ahead.
+
+        When the cool-down has passed, the first caller is let through as
+        the probe; everyone else is refused until it reports back.
+        """
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == CLOSED or (self._state == HALF_OPEN and not self._probing):
+                self._probing = self._state == HALF_OPEN
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record(self, success: Optional[bool]):
+        """
+        Report the outcome of an allowed call.
+
+        Args:
+            success: True or False, or None if the call ended without
+                reaching the model (e.g. no quota), which says nothing
+                about its health
+        """
+        with self._lock:
+            if success is None:
+                self._probing = False
+            elif success:
+                self._state = CLOSED
+                self._failures = 0
+                self._probing = False
+            else:
+                self._failures += 1
+                if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                    if self._state != OPEN:
+                        self._stats["opened"] += 1
+                    self._state = OPEN
+                    self._opened_at = self._clock()
+                    self._probing = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, state=self._state, consecutive_failures=self._failures)
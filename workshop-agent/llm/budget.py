@@ -0,0 +1,205 @@
+"""
+Token Budget - Token accounting and per-session / per-cohort budgets.
+
+Prompt sizes are estimated locally before a call (llm.estimate_tokens) and
+the tokens Gemini actually billed are recorded from each response's usage
+metadata; the ratio between the two calibrates later estimates. Usage is
+totalled per session and for the whole cohort (every session this process
+serves, over a rolling window).
+
+Callers size the context they send (stakeholder history, analyzer
+context, summary transcript) with allowance(). Once a session or the
+cohort has used up its budget, allowances shrink so the context is trimmed
+before the call is made, rather than the overspend being noticed after.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+# Tokens (prompt + output) a session may use before its context is trimmed
+DEFAULT_SESSION_TOKENS = 400_000
+# Tokens the whole cohort may use per window before every session is trimmed (0: no limit)
+DEFAULT_COHORT_TOKENS = 0
+# Seconds the cohort budget is measured over, in hourly buckets
+COHORT_WINDOW = 24 * 3600
+COHORT_BUCKET = 3600
+
+# Share of the normal context allowance kept once a budget is exceeded
+OVER_BUDGET_SHARE = 0.25
+
+# Sessions whose usage is kept (least recently active are forgotten first)
+MAX_TRACKED_SESSIONS = 10_000
+
+# Weight of each measured call in the estimate calibration, and its bounds
+CALIBRATION_WEIGHT = 0.05
+CALIBRATION_BOUNDS = (0.5, 3.0)
+
+
+def usage_of(response) -> Optional[tuple]:
+    """
+    The tokens a response was billed for, from its usage metadata.
+
+    Returns:
+        (prompt tokens, output tokens), or None if the response has no usage
+    """
+    metadata = getattr(response, "usage_metadata", None)
+    prompt = getattr(metadata, "prompt_token_count", None)
+    if not isinstance(prompt, int) or prompt <= 0:
+        return None
+    output = getattr(metadata, "candidates_token_count", 0)
+    return prompt, output if isinstance(output, int) else 0
+
+
+class TokenBudget:
+    """Per-session and cohort token usage, and the context allowances it leaves."""
+
+    def __init__(
+        self,
+        session_tokens: int = DEFAULT_SESSION_TOKENS,
+        cohort_tokens: int = DEFAULT_COHORT_TOKENS,
+        clock=time.monotonic
+    ):
+        """
+        Args:
+            session_tokens: Tokens each session may use (0 for no limit)
+            cohort_tokens: Tokens all sessions may use per COHORT_WINDOW (0 for no limit)
+            clock: Time source (seconds)
+        """
+        self.session_tokens = session_tokens
+        self.cohort_tokens = cohort_tokens
+        self._clock = clock
+        self._lock = threading.Lock()
+        # session id -> {"prompt_tokens", "output_tokens", "calls"}
+        self._sessions = OrderedDict()
+        # [bucket number, tokens] for the cohort window
+        self._buckets = deque()
+        # Actual / estimated prompt tokens, from responses that report usage
+        self._ratio = 1.0
+        self._stats = {"calls": 0, "measured_calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+        self._trimmed = {}
+
+    def _cohort_used(self, now: float) -> int:
+        """Tokens used in the cohort window (lock held)."""
+        oldest = int((now - COHORT_WINDOW) // COHORT_BUCKET)
+        while self._buckets and self._buckets[0][0] <= oldest:
+            self._buckets.popleft()
+        return sum(tokens for _, tokens in self._buckets)
+
+    def record(
+        self,
+        session_id: Optional[str],
+        prompt_tokens: int,
+        output_tokens: int,
+        estimated_prompt: Optional[int] = None
+    ):
+        """
+        Add a call's usage to its session and the cohort.
+
+        Args:
+            session_id: Session the call belongs to (None counts for the cohort only)
+            prompt_tokens: Prompt tokens billed (or estimated if not reported)
+            output_tokens: Output tokens billed (or estimated)
+            estimated_prompt: The local estimate of the prompt, when
+                `prompt_tokens` is the billed count, to calibrate estimates
+        """
+        total = prompt_tokens + output_tokens
+        now = self._clock()
+        bucket = int(now // COHORT_BUCKET)
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["output_tokens"] += output_tokens
+            if estimated_prompt:
+                self._stats["measured_calls"] += 1
+                low, high = CALIBRATION_BOUNDS
+                ratio = min(high, max(low, prompt_tokens / estimated_prompt))
+                self._ratio += CALIBRATION_WEIGHT * (ratio - self._ratio)
+
+            if self._buckets and self._buckets[-1][0] == bucket:
+                self._buckets[-1][1] += total
+            else:
+                self._buckets.append([bucket, total])
+
+            if session_id is not None:
+                usage = self._sessions.pop(session_id, None) or {"prompt_tokens": 0, "output_tokens": 0, "calls": 0}
+                usage["prompt_tokens"] += prompt_tokens
+                usage["output_tokens"] += output_tokens
+                usage["calls"] += 1
+                self._sessions[session_id] = usage
+                while len(self._sessions) > MAX_TRACKED_SESSIONS:
+                    self._sessions.popitem(last=False)
+
+    def usage(self, session_id: str) -> dict:
+        """Tokens a session has used so far."""
+        with self._lock:
+            return dict(self._sessions.get(session_id) or {"prompt_tokens": 0, "output_tokens": 0, "calls": 0})
+
+    def exceeded(self, session_id: Optional[str]) -> bool:
+        """Whether the session or the cohort has used up its budget."""
+        with self._lock:
+            if self.cohort_tokens and self._cohort_used(self._clock()) >= self.cohort_tokens:
+                return True
+            usage = self._sessions.get(session_id)
+            return bool(
+                self.session_tokens and usage
+                and usage["prompt_tokens"] + usage["output_tokens"] >= self.session_tokens
+            )
+
+    def allowance(self, session_id: Optional[str], tokens: int) -> int:
+        """
+        How much context a call may send.
+
+        Args:
+            session_id: Session making the call
+            tokens: Context the call site sends normally, in billed tokens
+
+        Returns:
+            The allowance in llm.estimate_tokens units: the normal amount
+            (corrected for estimate error), or a fraction of it once the
+            session or cohort budget is used up
+        """
+        with self._lock:
+            ratio = self._ratio
+        if self.exceeded(session_id):
+            tokens *= OVER_BUDGET_SHARE
+        return int(tokens / ratio)
+
+    def note_trim(self, site: str):
+        """Count a call whose context was trimmed to fit its allowance."""
+        with self._lock:
+            self._trimmed[site] = self._trimmed.get(site, 0) + 1
+
+    def stats(self) -> dict:
+        """Token totals, budget use and how often each call site was trimmed."""
+        with self._lock:
+            totals = [usage["prompt_tokens"] + usage["output_tokens"] for usage in self._sessions.values()]
+            return dict(
+                self._stats,
+                session_limit=self.session_tokens,
+                cohort_limit=self.cohort_tokens,
+                cohort_used=self._cohort_used(self._clock()),
+                sessions=len(totals),
+                sessions_over_budget=sum(1 for total in totals if self.session_tokens and total >= self.session_tokens),
+                estimate_ratio=round(self._ratio, 3),
+                trimmed=dict(self._trimmed),
+            )
+
+
+_budget = TokenBudget()
+
+
+def get_token_budget() -> TokenBudget:
+    """Get the process-wide token budget."""
+    return _budget
+
+
+def configure_token_budget(
+    session_tokens: int = DEFAULT_SESSION_TOKENS,
+    cohort_tokens: int = DEFAULT_COHORT_TOKENS
+) -> TokenBudget:
+    """Replace the process-wide token budget with one using the given limits."""
+    global _budget
+    _budget = TokenBudget(session_tokens=session_tokens, cohort_tokens=cohort_tokens)
+    return _budget
@@ -0,0 +1,103 @@
+"""
+Cancellation - Cooperative cancellation tokens for LLM work.
+
+Each session has a current token, replaced when its work is superseded
+(a new use case or practice session) and cancelled when the browser tab
+closes. A token may have a parent, such as the session's token, and is
+cancelled along with it. Work captures the token when it starts - directly, or through
+cancellation() for everything called inside it - and LLM calls made under a
+cancelled token stop waiting for quota, are not retried, and have their
+results discarded with RequestCancelledError. A request already sent to the
+model cannot be interrupted, but nothing downstream of it runs.
+"""
+
+import contextlib
+import contextvars
+import threading
+from typing import Optional
+
+
+class RequestCancelledError(Exception):
+    """Raised when LLM work is abandoned because its token was cancelled."""
+
+
+class CancelToken:
+    """A flag that work checks to see whether it is still wanted."""
+
+    def __init__(self, parent: Optional["CancelToken"] = None):
+        """
+        Args:
+            parent: Token whose cancellation cancels this one too
+        """
+        self._event = threading.Event()
+        self._parent = parent
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self._parent is not None and self._parent.cancelled)
+
+    def check(self):
+        """Raise RequestCancelledError if the token or its parent has been cancelled."""
+        if self.cancelled:
+            raise RequestCancelledError("Superseded or abandoned")
+
+
+_current = contextvars.ContextVar("cancel_token", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    """The token set by the innermost cancellation() block, if any."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def cancellation(token: Optional[CancelToken]):
+    """Run the block's LLM calls under `token`."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+class TokenRegistry:
+    """The current cancel token of each session."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def current(self, key: str) -> CancelToken:
+        """The session's current token (created on first use)."""
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is None:
+                token = self._tokens[key] = CancelToken()
+            return token
+
+    def renew(self, key: str) -> CancelToken:
+        """Cancel the session's outstanding work and return a fresh token."""
+        with self._lock:
+            old = self._tokens.get(key)
+            token = self._tokens[key] = CancelToken()
+        if old is not None:
+            old.cancel()
+        return token
+
+    def cancel(self, key: str):
+        """Cancel the session's outstanding work and forget the session."""
+        with self._lock:
+            token = self._tokens.pop(key, None)
+        if token is not None:
+            token.cancel()
+
+
+_registry = TokenRegistry()
+
+
+def get_token_registry() -> TokenRegistry:
+    """Get the process-wide session token registry."""
+    return _registry
@@ -0,0 +1,208 @@
+"""
+LLM Client - Lazy access to the Google Gemini SDK.
+
+The SDK is imported and configured on first use, so importing the app
+(and starting the server) does not pay for it. All calls go through
+generate(), which admits them via the request scheduler.
+"""
+
+import sys
+import threading
+from typing import Optional
+
+from .cancel import CancelToken, RequestCancelledError
+from .coalesce import get_coalescer, request_key
+from .scheduler import Priority, RateLimitedError, get_scheduler, is_rate_limit_error
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+# Seconds a request may wait for quota before giving up, per priority.
+# Analysis gives up quickly so it can be deferred instead of stalling a turn.
+MAX_WAIT = {
+    Priority.LIVE: 60.0,
+    Priority.ANALYSIS: 5.0,
+    Priority.BACKGROUND: 120.0,
+}
+
+# Upstream 429s: pause the scheduler and retry with exponential backoff
+RATE_LIMIT_RETRIES = 2
+RATE_LIMIT_BACKOFF = 2.0
+
+# Seconds the model may take to answer before the request fails
+REQUEST_TIMEOUT = 60.0
+
+# Rough budget for the response when estimating a request's token cost
+EXPECTED_OUTPUT_TOKENS = 512
+
+_lock = threading.Lock()
+_genai = None
+_configured_key = None
+_models = {}
+
+
+def _get_genai(api_key: str):
+    """Import and configure the Gemini SDK on first use."""
+    global _genai, _configured_key
+
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable is required. Set it in a .env file or environment.")
+
+    with _lock:
+        if _genai is None:
+            import google.generativeai as genai
+            _genai = genai
+        if _configured_key != api_key:
+            _genai.configure(api_key=api_key)
+            _configured_key = api_key
+        return _genai
+
+
+def get_model(model_name: str, api_key: str):
+    """
+    Get a shared GenerativeModel, constructing it on first use.
+
+    Args:
+        model_name: Gemini model name, e.g. "gemini-2.0-flash"
+        api_key: Google API key
+
+    Returns:
+        A google.generativeai GenerativeModel
+    """
+    genai = _get_genai(api_key)
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            _models[model_name] = model
+        return model
+
+
+def is_sdk_loaded() -> bool:
+    """Whether the Gemini SDK has been imported in this process."""
+    return "google.generativeai" in sys.modules
+
+
+def warm_up(api_key: str, model_names: tuple = (DEFAULT_MODEL,)) -> threading.Thread:
+    """
+    Import the SDK and build models in a background thread.
+
+    Called once the server is accepting traffic, so the first question
+    does not pay the SDK import cost either.
+
+    Returns:
+        The started daemon thread
+    """
+    def _run():
+        if not api_key:
+            return
+        for name in model_names:
+            get_model(name, api_key)
+
+    thread = threading.Thread(target=_run, name="llm-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def estimate_tokens(contents) -> int:
+    """Rough token count for a prompt string or list of chat turns (~4 chars/token)."""
+    if isinstance(contents, str):
+        chars = len(contents)
+    else:
+        chars = sum(len(str(part)) for turn in contents for part in turn.get("parts", []))
+    return chars // 4
+
+
+def generate(
+    model,
+    contents,
+    *,
+    session_id: Optional[str] = None,
+    priority: Priority = Priority.LIVE,
+    generation_config: Optional[dict] = None,
+    max_wait: Optional[float] = None,
+    output_tokens: int = EXPECTED_OUTPUT_TOKENS,
+    stream: bool = False,
+    coalesce: bool = True,
+    coalesce_key: Optional[str] = None,
+    cancel: Optional[CancelToken] = None
+):
+    """
+    Call model.generate_content once the scheduler admits the request.
+
+    Identical requests (same model, contents and config) share one upstream
+    call while it is in flight, and reuse its result for a few minutes.
+    Once `cancel` is cancelled the call stops waiting for quota, is not
+    retried, and its result is discarded.
+
+    Args:
+        model: GenerativeModel to call
+        contents: Prompt string or list of {"role", "parts"} chat turns
+        session_id: Session the call belongs to (for per-session fairness)
+        priority: Scheduling class
+        generation_config: Optional generation config dict
+        max_wait: Seconds to wait for quota (defaults to MAX_WAIT[priority])
+        output_tokens: Expected response size, counted against the token quota
+        stream: Return the response as an iterable of chunks as they arrive
+        coalesce: Set to False for calls that must be sent on their own
+        coalesce_key: Coalesce on this instead of `contents`, for prompts
+            that vary between calls that are meant to be interchangeable
+        cancel: Token of the work this call belongs to
+
+    Returns:
+        The SDK response
+
+    Raises:
+        RateLimitedError: If quota was not available in time, or the
+            upstream kept returning 429s after retries
+        RequestCancelledError: If `cancel` was cancelled
+    """
+    def call():
+        return _generate_once(
+            model, contents, session_id, priority, generation_config, max_wait, output_tokens, stream, cancel
+        )
+
+    if not coalesce:
+        response = call()
+    else:
+        coalescer = get_coalescer()
+        key = request_key(model, coalesce_key or contents, generation_config, stream)
+        try:
+            if stream:
+                response = coalescer.stream(key, call)
+            else:
+                response = coalescer.call(key, call)
+        except RequestCancelledError:
+            # A shared call abandoned by the caller that started it is not ours
+            if cancel is not None and cancel.cancelled:
+                raise
+            response = call()
+    # Work superseded while the model was answering is discarded
+    if cancel is not None:
+        cancel.check()
+    return response
+
+
+def _generate_once(model, contents, session_id, priority, generation_config, max_wait, output_tokens, stream, cancel):
+    """Send one request through the scheduler, retrying upstream 429s."""
+    scheduler = get_scheduler()
+    tokens = estimate_tokens(contents) + output_tokens
+    timeout = MAX_WAIT[priority] if max_wait is None else max_wait
+    extra = {"request_options": {"timeout": REQUEST_TIMEOUT}}
+    if stream:
+        extra["stream"] = True
+
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        if cancel is not None:
+            cancel.check()
+        if not scheduler.acquire(session_id, priority, tokens, timeout=timeout, cancel=cancel):
+            if cancel is not None:
+                cancel.check()
+            raise RateLimitedError(f"No {priority.name.lower()} quota available within {timeout:.0f}s")
+        try:
+            return model.generate_content(contents, generation_config=generation_config, **extra)
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            if attempt == RATE_LIMIT_RETRIES:
+                raise RateLimitedError("Upstream rate limit persisted after retries") from e
+            scheduler.backoff(RATE_LIMIT_BACKOFF * 2 ** attempt)
@@ -0,0 +1,224 @@
+"""
+Request Coalescing - Share identical concurrent LLM calls and recent results.
+
+Calls are keyed by a hash of the model, contents and generation config.
+While a call is in flight, identical calls wait for its result instead of
+sending their own request (single-flight), and successful results are kept
+for a short time so a burst of identical requests costs one upstream call.
+Streamed calls are shared too: the caller that sends the request streams
+it, and identical calls made meanwhile get its chunks replayed once it ends.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator, Optional
+
+from .cancel import RequestCancelledError
+
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 300.0
+
+
+def request_key(model, contents, generation_config: Optional[dict], stream: bool = False) -> str:
+    """Hash a request into its coalescing key."""
+    model_name = getattr(model, "model_name", None) or f"id:{id(model)}"
+    payload = json.dumps([model_name, contents, generation_config, stream], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers share its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: str, fn: Callable) -> tuple:
+        """
+        Run fn() unless a call with the same key is already in flight.
+
+        Returns:
+            (result, True if this caller shared another caller's call)
+
+        Raises:
+            Whatever fn() raised, for the caller and everyone sharing it
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class ResultCache:
+    """Small LRU of recent results with a time-to-live."""
+
+    def __init__(self, size: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL, clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        """The cached result, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class _SharedStream:
+    """The leader's stream: passes chunks through and shares them once it ends."""
+
+    def __init__(self, coalescer: "Coalescer", key: str, future: Future, response: Iterable):
+        self._coalescer = coalescer
+        self._key = key
+        self._future = future
+        self._response = iter(response)
+        self._chunks = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._future.done():
+            raise StopIteration
+        try:
+            chunk = next(self._response)
+        except StopIteration:
+            self._coalescer.cache.put(self._key, self._chunks)
+            self._coalescer._finish_stream(self._key, self._future, chunks=self._chunks)
+            raise
+        except BaseException as e:
+            self._coalescer._finish_stream(self._key, self._future, error=e)
+            raise
+        self._chunks.append(chunk)
+        return chunk
+
+    def close(self):
+        """Abandon the stream; callers waiting on it send their own request."""
+        if not self._future.done():
+            self._coalescer._finish_stream(
+                self._key, self._future, error=RequestCancelledError("Shared stream abandoned")
+            )
+
+    __del__ = close
+
+
+class Coalescer:
+    """Single-flight plus result cache, with counters."""
+
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.cache = cache or ResultCache()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "cache_hits": 0, "coalesced": 0}
+        # key -> Future of the chunk list, for streams in flight
+        self._streams = {}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def call(self, key: str, fn: Callable):
+        """Return a cached or shared result for `key`, or run fn() and cache it."""
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._count("cache_hits")
+            return cached
+
+        def run():
+            result = fn()
+            self.cache.put(key, result)
+            return result
+
+        result, shared = self._flight.do(key, run)
+        self._count("coalesced" if shared else "calls")
+        return result
+
+    def stream(self, key: str, fn: Callable[[], Iterable]) -> Iterator:
+        """
+        Return a cached or shared stream for `key`, or stream fn() and cache its chunks.
+
+        The first caller's chunks arrive as the model writes them. Callers
+        that join while it is in flight wait for it to finish and get all
+        of its chunks; a stream that fails or is abandoned part way is not
+        cached, and joiners get the error.
+        """
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._count("cache_hits")
+            return iter(cached)
+
+        with self._lock:
+            future = self._streams.get(key)
+            leader = future is None
+            if leader:
+                future = self._streams[key] = Future()
+
+        if not leader:
+            chunks = future.result()
+            self._count("coalesced")
+            return iter(chunks)
+
+        self._count("calls")
+        try:
+            response = fn()
+        except BaseException as e:
+            self._finish_stream(key, future, error=e)
+            raise
+        return _SharedStream(self, key, future, response)
+
+    def _finish_stream(self, key: str, future: Future, chunks: Optional[list] = None, error=None):
+        with self._lock:
+            self._streams.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(chunks)
+
+    def stats(self) -> dict:
+        """Upstream calls made, and calls served from the cache or a shared call."""
+        with self._lock:
+            return dict(self._stats)
+
+
+_coalescer = Coalescer()
+
+
+def get_coalescer() -> Coalescer:
+    """Get the process-wide coalescer."""
+    return _coalescer
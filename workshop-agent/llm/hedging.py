@@ -0,0 +1,211 @@
+"""
+Request Hedging - Duplicates slow LLM calls to cut tail latency.
+
+Latency is recorded per call site (stakeholder replies, analysis, summaries,
+...) and model tier. When a call on a hedged site has not returned by a
+percentile of that site's recent latency, a duplicate request is sent and
+whichever answers first is used. Duplicates are limited by a global budget
+(a share of recent calls) so cost stays bounded, and they only go out if
+quota is available immediately. Only live-priority calls are hedged.
+
+The original request runs on a thread of its own as soon as it is made,
+so time spent waiting for a worker never counts toward the hedge delay.
+Duplicates run on a small bounded pool and are skipped when it is busy.
+Only original requests are timed, so duplicates cannot pull the threshold
+down. A losing request already waiting on the model cannot be interrupted,
+so its response is discarded.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+# Latency percentile after which a duplicate is sent (0 disables hedging)
+DEFAULT_HEDGE_PERCENTILE = 0.95
+# Extra requests allowed, as a share of recent calls
+DEFAULT_HEDGE_BUDGET = 0.05
+# Call sites hedged by default: the ones a trainee is waiting on
+DEFAULT_HEDGE_SITES = ("stakeholder",)
+
+# Latency samples kept per call site, and samples needed before hedging
+LATENCY_WINDOW = 500
+MIN_SAMPLES = 20
+# Recent calls the hedge budget is measured over
+BUDGET_WINDOW = 1000
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Hedger:
+    """Per-call-site latency tracking and budgeted request hedging."""
+
+    def __init__(
+        self,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        budget: float = DEFAULT_HEDGE_BUDGET,
+        sites: tuple = DEFAULT_HEDGE_SITES,
+        max_workers: int = 16
+    ):
+        """
+        Args:
+            percentile: Latency percentile (0-1) after which to hedge; 0 disables
+            budget: Maximum extra requests as a share of recent calls
+            sites: Call sites that may be hedged (others are only measured)
+            max_workers: Duplicate requests that may be in flight at once
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.sites = frozenset(sites)
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+            if percentile > 0 and budget > 0 and self.sites else None
+        )
+        self._backup_slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        # 1 for each recent call that sent a duplicate, 0 otherwise
+        self._window = deque(maxlen=BUDGET_WINDOW)
+        self._window_hedges = 0
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "over_budget": 0, "no_capacity": 0}
+
+    def _count_call(self, hedged: bool):
+        """Add a call to the budget window (lock held)."""
+        if len(self._window) == self._window.maxlen:
+            self._window_hedges -= self._window[0]
+        self._window.append(int(hedged))
+        self._window_hedges += int(hedged)
+        self._stats["calls"] += 1
+        if hedged:
+            self._stats["hedged"] += 1
+
+    def _admit(self, slow: bool) -> bool:
+        """
+        Count a call; returns whether a slow call may be hedged.
+
+        A hedged call holds one of the backup slots until its duplicate ends.
+        """
+        with self._lock:
+            hedge = slow and self._window_hedges + 1 <= self.budget * (len(self._window) + 1)
+            if slow and not hedge:
+                self._stats["over_budget"] += 1
+            if hedge and not self._backup_slots.acquire(blocking=False):
+                self._stats["no_capacity"] += 1
+                hedge = False
+            self._count_call(hedge)
+        return hedge
+
+    def hedge_delay(self, site: tuple) -> Optional[float]:
+        """Seconds to wait before hedging a call on `site`, or None if it is not hedged."""
+        if self._executor is None or site[0] not in self.sites:
+            return None
+        with self._lock:
+            samples = list(self._latencies[site])
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return _percentile(samples, self.percentile)
+
+    def _start(self, site: tuple, fn: Callable) -> Future:
+        """Run the original request, timed, on a new thread."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                future.set_result(self._timed(site, fn))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="hedge-primary", daemon=True).start()
+        return future
+
+    def _timed(self, site: tuple, fn: Callable):
+        start = time.perf_counter()
+        result = fn()
+        with self._lock:
+            self._latencies[site].append(time.perf_counter() - start)
+        return result
+
+    def call(self, site: tuple, fn: Callable, hedge_fn: Optional[Callable] = None):
+        """
+        Run fn(), hedging with hedge_fn() if it is slow for its call site.
+
+        Args:
+            site: (call site name, model tier) the latency is tracked under
+            fn: The request
+            hedge_fn: The duplicate request, or None to only time the call
+
+        Returns:
+            The first successful result
+
+        Raises:
+            The original request's error if no request succeeded
+        """
+        delay = self.hedge_delay(site) if hedge_fn is not None else None
+        if delay is None:
+            if self._executor is not None:
+                self._admit(slow=False)
+            return self._timed(site, fn)
+
+        primary = self._start(site, fn)
+        slow = not wait([primary], timeout=delay).done
+        if not self._admit(slow):
+            return primary.result()
+
+        backup = self._executor.submit(hedge_fn)
+        backup.add_done_callback(lambda _: self._backup_slots.release())
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is backup:
+                        with self._lock:
+                            self._stats["hedge_wins"] += 1
+                    return future.result()
+        return primary.result()
+
+    def stats(self) -> dict:
+        """Hedge counts, the current hedge rate and per-site latency (ms)."""
+        with self._lock:
+            stats = dict(self._stats)
+            rate = self._window_hedges / len(self._window) if self._window else 0.0
+            latencies = {site: list(samples) for site, samples in self._latencies.items()}
+        stats["hedge_rate"] = round(rate, 4)
+        stats["sites"] = {
+            f"{name}/{tier}": {
+                "samples": len(samples),
+                "latency_p50_ms": round(_percentile(samples, 0.5) * 1000, 1),
+                "latency_p95_ms": round(_percentile(samples, 0.95) * 1000, 1),
+                "latency_p99_ms": round(_percentile(samples, 0.99) * 1000, 1),
+            }
+            for (name, tier), samples in sorted(latencies.items())
+        }
+        return stats
+
+
+_hedger = Hedger()
+
+
+def get_hedger() -> Hedger:
+    """Get the process-wide hedger."""
+    return _hedger
+
+
+def configure_hedging(
+    percentile: float = DEFAULT_HEDGE_PERCENTILE,
+    budget: float = DEFAULT_HEDGE_BUDGET,
+    sites: tuple = DEFAULT_HEDGE_SITES
+) -> Hedger:
+    """Replace the process-wide hedger with one using the given policy."""
+    global _hedger
+    _hedger = Hedger(percentile=percentile, budget=budget, sites=sites)
+    return _hedger
@@ -0,0 +1,135 @@
+"""
+Partial JSON - Best-effort parsing of streamed or truncated JSON.
+
+PartialJSONParser consumes text as it arrives and can produce a best-effort
+value at any point: open strings, arrays and objects are closed, and a
+dangling key or half-written literal is dropped. feed() scans each chunk
+once to track where the document can be cut and closed; snapshot() parses
+everything up to that point, so its cost grows with the text received.
+Calling it after every chunk is fine for short documents such as a use case
+(a few KB), but not for long streams.
+"""
+
+import json
+import re
+from typing import Optional
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# A trailing backslash or unfinished \uXXXX escape inside an open string
+_PARTIAL_ESCAPE = re.compile(r"\\(u[0-9a-fA-F]{0,3})?$")
+
+
+class PartialJSONParser:
+    """Incremental scanner that can close a JSON document at any point."""
+
+    def __init__(self):
+        self.text = ""
+        # Open containers: [opening char, state], where state is one of
+        # "key", "colon", "value", "comma" (what comes next)
+        self._stack = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._start = None
+        self._done = False
+        # Last position where the text can be cut and closed, and the
+        # closing characters needed there
+        self._safe = None
+
+    def _closers(self) -> str:
+        return "".join(_CLOSERS[opening] for opening, _state in reversed(self._stack))
+
+    def _mark_safe(self, position: int):
+        self._safe = (position, self._closers())
+
+    def _value_done(self, position: int):
+        """A value inside the current container (or at top level) ended."""
+        if self._stack:
+            self._stack[-1][1] = "comma"
+            self._mark_safe(position)
+        else:
+            self._done = True
+            self._safe = (position, "")
+
+    def feed(self, chunk: str):
+        """Consume the next piece of text."""
+        offset = len(self.text)
+        self.text += chunk
+
+        for i, char in enumerate(chunk, offset):
+            if self._done:
+                break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1][1] = "colon"
+                    else:
+                        self._value_done(i + 1)
+                continue
+
+            if self._start is None:
+                # Skip anything (e.g. a code fence) before the document
+                if char in _CLOSERS:
+                    self._start = i
+                else:
+                    continue
+
+            if char in _CLOSERS:
+                self._stack.append([char, "key" if char == "{" else "value"])
+                self._mark_safe(i + 1)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._value_done(i + 1)
+            elif char == '"':
+                self._in_string = True
+                self._string_is_key = bool(self._stack) and self._stack[-1][0] == "{" and self._stack[-1][1] == "key"
+            elif char == ":":
+                if self._stack:
+                    self._stack[-1][1] = "value"
+            elif char == ",":
+                if self._stack:
+                    # The value before the comma is complete
+                    self._mark_safe(i)
+                    self._stack[-1][1] = "key" if self._stack[-1][0] == "{" else "value"
+
+    @property
+    def complete(self) -> bool:
+        """Whether a whole top-level value has been read."""
+        return self._done
+
+    def snapshot(self) -> Optional[object]:
+        """
+        Best-effort value for the text so far (parses all of it).
+
+        Returns:
+            The parsed value with open containers closed, or None if
+            nothing usable has arrived yet
+        """
+        start = self._start
+        if start is None:
+            return None
+
+        # Keep a string value that is still being written
+        if self._in_string and not self._string_is_key:
+            partial = _PARTIAL_ESCAPE.sub("", self.text[start:])
+            try:
+                return json.loads(partial + '"' + self._closers())
+            except json.JSONDecodeError:
+                pass
+
+        if self._safe is None:
+            return None
+        position, closers = self._safe
+        try:
+            return json.loads(self.text[start:position] + closers)
+        except json.JSONDecodeError:
+            return None
+
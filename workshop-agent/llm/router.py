@@ -0,0 +1,272 @@
+"""
+Model Router - Picks a model tier per task and tracks per-tier metrics.
+
+Tiers are ordered from cheapest to strongest. Each task (stakeholder
+replies, analysis, summaries, use case generation) starts on its configured
+tier; callers may escalate a task to the next tier when the cheaper model's
+output is not good enough. Latency, token and escalation counts are kept per
+tier so the cost/quality trade-off can be watched in production. Token
+counts are the ones Gemini reports when it does, and every call's usage is
+added to its session's token budget (see llm.budget).
+
+Each call site and tier also has a circuit breaker: after repeated upstream
+failures its calls fail fast with CircuitOpenError until a probe succeeds.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from .breaker import CircuitBreaker, CircuitOpenError
+from .budget import get_token_budget, usage_of
+from .cancel import RequestCancelledError, current_token
+from .client import DEFAULT_MODEL, EXPECTED_OUTPUT_TOKENS, estimate_tokens, generate, get_model
+from .hedging import _percentile, get_hedger
+from .scheduler import Priority, RateLimitedError
+
+LIGHT = "light"
+STRONG = "strong"
+TIERS = (LIGHT, STRONG)
+
+DEFAULT_LIGHT_MODEL = "gemini-2.0-flash-lite"
+
+# Starting tier per task
+DEFAULT_ROUTES = {
+    "stakeholder": STRONG,
+    "use_case": STRONG,
+    "summary": STRONG,
+    "analysis": LIGHT,
+}
+
+# Latency samples kept per tier for percentiles
+LATENCY_WINDOW = 500
+
+
+class ModelRouter:
+    """Maps tasks to model tiers and records per-tier metrics."""
+
+    def __init__(
+        self,
+        light_model: str = DEFAULT_LIGHT_MODEL,
+        strong_model: str = DEFAULT_MODEL,
+        routes: Optional[dict] = None
+    ):
+        """
+        Args:
+            light_model: Gemini model for the cheap tier
+            strong_model: Gemini model for the strong tier
+            routes: Task name -> starting tier (defaults to DEFAULT_ROUTES)
+        """
+        self.models = {LIGHT: light_model, STRONG: strong_model}
+        self.routes = dict(DEFAULT_ROUTES, **(routes or {}))
+        self._lock = threading.Lock()
+        self._metrics = {tier: self._empty_metrics() for tier in TIERS}
+        # (call site, tier) -> CircuitBreaker
+        self._breakers = {}
+
+    @staticmethod
+    def _empty_metrics() -> dict:
+        return {
+            "calls": 0,
+            "errors": 0,
+            "escalations": 0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+            "latencies": deque(maxlen=LATENCY_WINDOW),
+        }
+
+    def tier_for(self, task: str) -> str:
+        """Starting tier for a task."""
+        return self.routes.get(task, STRONG)
+
+    def next_tier(self, tier: str) -> Optional[str]:
+        """
+        The tier to escalate to from `tier`, or None if there is nothing
+        stronger (or the stronger tier runs the same model).
+        """
+        index = TIERS.index(tier)
+        for candidate in TIERS[index + 1:]:
+            if self.models[candidate] != self.models[tier]:
+                return candidate
+        return None
+
+    def escalate(self, tier: str) -> Optional[str]:
+        """Record an escalation away from `tier` and return the next tier."""
+        target = self.next_tier(tier)
+        if target is not None:
+            with self._lock:
+                self._metrics[tier]["escalations"] += 1
+        return target
+
+    def breaker(self, site: str, tier: str) -> CircuitBreaker:
+        """The circuit breaker for a call site on a tier."""
+        with self._lock:
+            breaker = self._breakers.get((site, tier))
+            if breaker is None:
+                breaker = self._breakers[(site, tier)] = CircuitBreaker()
+            return breaker
+
+    def generate(self, tier: str, api_key: str, contents, site: Optional[str] = None, **kwargs):
+        """
+        Call generate() on the tier's model and record the outcome.
+
+        Non-streamed calls are timed per call site, and live calls on
+        hedged sites may be duplicated when slow (see llm.hedging).
+        Failures other than rate limiting count against the call site's
+        circuit breaker.
+
+        Args:
+            tier: Tier to run on
+            api_key: Google API key
+            contents: Prompt string or list of chat turns
+            site: Call site name for latency tracking (defaults to the tier)
+            **kwargs: Passed through to llm.generate()
+
+        Returns:
+            The SDK response (an iterator of chunks when stream=True)
+
+        Raises:
+            CircuitOpenError: If the call site's circuit is open
+        """
+        site = site or tier
+        # Captured here: hedged calls run on other threads
+        kwargs.setdefault("cancel", current_token())
+        breaker = self.breaker(site, tier)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {site} on {self.models[tier]}")
+
+        start = time.perf_counter()
+        try:
+            model = get_model(self.models[tier], api_key)
+            if kwargs.get("stream"):
+                response = generate(model, contents, **kwargs)
+            else:
+                hedge = None
+                if kwargs.get("priority", Priority.LIVE) == Priority.LIVE:
+                    # The duplicate must not join the original's in-flight
+                    # call, and is only worth sending if quota is free now
+                    def hedge():
+                        return generate(model, contents, **dict(kwargs, coalesce=False, max_wait=0))
+                response = get_hedger().call(
+                    (site, tier),
+                    lambda: generate(model, contents, **kwargs),
+                    hedge
+                )
+        except RequestCancelledError:
+            breaker.record(None)
+            raise
+        except RateLimitedError:
+            breaker.record(None)
+            with self._lock:
+                self._metrics[tier]["errors"] += 1
+            raise
+        except Exception:
+            breaker.record(False)
+            with self._lock:
+                self._metrics[tier]["errors"] += 1
+            raise
+
+        session_id = kwargs.get("session_id")
+        if kwargs.get("stream"):
+            # A stream can still fail part way, so its outcome is recorded when it ends
+            return self._record_stream(tier, contents, start, response, session_id, breaker)
+        breaker.record(True)
+        self._record(tier, contents, start, getattr(response, "text", "") or "", usage_of(response), session_id)
+        return response
+
+    def _record(
+        self,
+        tier: str,
+        contents,
+        start: float,
+        text: str,
+        usage: Optional[tuple] = None,
+        session_id: Optional[str] = None
+    ):
+        """Record a finished call, using the billed token counts if the response had them."""
+        latency = time.perf_counter() - start
+        estimated = estimate_tokens(contents)
+        prompt_tokens, output_tokens = usage or (estimated, estimate_tokens(text) or EXPECTED_OUTPUT_TOKENS)
+        with self._lock:
+            metrics = self._metrics[tier]
+            metrics["calls"] += 1
+            metrics["prompt_tokens"] += prompt_tokens
+            metrics["output_tokens"] += output_tokens
+            metrics["latencies"].append(latency)
+        get_token_budget().record(session_id, prompt_tokens, output_tokens, estimated if usage else None)
+
+    def _record_stream(
+        self,
+        tier: str,
+        contents,
+        start: float,
+        response,
+        session_id: Optional[str],
+        breaker: CircuitBreaker
+    ):
+        """
+        Pass a streamed response through, recording it once it ends.
+
+        The breaker hears of a failure part way through the stream; a
+        stream the caller stops reading says nothing about the model.
+        """
+        received = []
+        usage = None
+        outcome = None
+        try:
+            for chunk in response:
+                received.append(getattr(chunk, "text", "") or "")
+                # Each chunk reports the running total; the last one is final
+                usage = usage_of(chunk) or usage
+                yield chunk
+            outcome = True
+        except (RequestCancelledError, RateLimitedError):
+            raise
+        except Exception:
+            outcome = False
+            with self._lock:
+                self._metrics[tier]["errors"] += 1
+            raise
+        finally:
+            breaker.record(outcome)
+            self._record(tier, contents, start, "".join(received), usage, session_id)
+
+    def metrics(self) -> dict:
+        """Snapshot of per-tier metrics (latencies in milliseconds)."""
+        with self._lock:
+            snapshot = {}
+            for tier, metrics in self._metrics.items():
+                latencies = list(metrics["latencies"])
+                snapshot[tier] = {
+                    "model": self.models[tier],
+                    "calls": metrics["calls"],
+                    "errors": metrics["errors"],
+                    "escalations": metrics["escalations"],
+                    "prompt_tokens": metrics["prompt_tokens"],
+                    "output_tokens": metrics["output_tokens"],
+                    "latency_p50_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+                    "latency_p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+                }
+            return snapshot
+
+    def circuits(self) -> dict:
+        """State and counts of each call site's circuit breaker."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {f"{site}/{tier}": breaker.stats() for (site, tier), breaker in sorted(breakers.items())}
+
+
+_router = ModelRouter()
+
+
+def get_router() -> ModelRouter:
+    """Get the process-wide model router."""
+    return _router
+
+
+def configure_router(light_model: str, strong_model: str, routes: Optional[dict] = None) -> ModelRouter:
+    """Replace the process-wide router with one using the given models."""
+    global _router
+    _router = ModelRouter(light_model=light_model, strong_model=strong_model, routes=routes)
+    return _router
@@ -0,0 +1,176 @@
+"""
+Request Scheduler - Rate-limit aware admission for all Gemini calls.
+
+Every LLM call takes a slot from a token bucket sized to the project's
+requests-per-minute and tokens-per-minute quota. When the bucket is empty,
+callers wait in priority order (live replies, then analysis, then
+background work), and round-robin across sessions within a priority so one
+busy session cannot starve the rest.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from enum import IntEnum
+from typing import Optional
+
+
+# How often a waiting request checks whether it has been cancelled
+CANCEL_POLL = 0.25
+
+
+class Priority(IntEnum):
+    """Scheduling classes, served lowest value first."""
+
+    LIVE = 0         # Stakeholder replies the trainee is waiting on
+    ANALYSIS = 1     # Question scoring (can be deferred)
+    BACKGROUND = 2   # Use case generation, summaries, pre-generation
+
+
+class RateLimitedError(Exception):
+    """Raised when a request could not be admitted within its wait budget."""
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an SDK exception is an upstream 429 / quota error."""
+    return (
+        getattr(error, "code", None) == 429
+        or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+    )
+
+
+class RequestScheduler:
+    """Token bucket with priority classes and per-session round-robin."""
+
+    def __init__(self, rpm: int = 60, tpm: int = 1_000_000, clock=time.monotonic):
+        """
+        Args:
+            rpm: Requests per minute this process may send
+            tpm: Tokens per minute this process may send
+            clock: Monotonic time source (seconds)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._last_refill = clock()
+        self._paused_until = 0.0
+        # priority -> OrderedDict(session_id -> deque of waiting tickets)
+        self._waiting = {priority: OrderedDict() for priority in Priority}
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _next_ticket(self) -> Optional[object]:
+        """The ticket that should be admitted next."""
+        for priority in Priority:
+            for tickets in self._waiting[priority].values():
+                return tickets[0]
+        return None
+
+    def _remove(self, priority: Priority, session_key: str, ticket: object):
+        sessions = self._waiting[priority]
+        tickets = sessions[session_key]
+        tickets.remove(ticket)
+        # Served sessions go to the back of the line for their priority
+        del sessions[session_key]
+        if tickets:
+            sessions[session_key] = tickets
+
+    def acquire(
+        self,
+        session_id: Optional[str],
+        priority: Priority,
+        tokens: int,
+        timeout: Optional[float] = None,
+        cancel=None
+    ) -> bool:
+        """
+        Wait for capacity to send one request.
+
+        Args:
+            session_id: Session the request belongs to (for fairness)
+            priority: Scheduling class
+            tokens: Estimated prompt + response tokens
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+            cancel: CancelToken; the request leaves the queue once it is cancelled
+
+        Returns:
+            True if admitted, False if the timeout expired (or the request
+            was cancelled) first
+        """
+        session_key = session_id or ""
+        tokens = min(max(tokens, 1), self.tpm)
+        ticket = object()
+
+        with self._cond:
+            now = self._clock()
+            deadline = None if timeout is None else now + timeout
+            self._waiting[priority].setdefault(session_key, deque()).append(ticket)
+
+            while True:
+                now = self._clock()
+                self._refill(now)
+
+                wait = None
+                if self._next_ticket() is ticket and now >= self._paused_until:
+                    if self._requests >= 1 and self._tokens >= tokens:
+                        self._requests -= 1
+                        self._tokens -= tokens
+                        self._remove(priority, session_key, ticket)
+                        self._cond.notify_all()
+                        return True
+                    # Sleep until the bucket has refilled enough for this request
+                    wait = max(
+                        (1 - self._requests) * 60 / self.rpm,
+                        (tokens - self._tokens) * 60 / self.tpm,
+                        0.01
+                    )
+                elif now < self._paused_until:
+                    wait = self._paused_until - now
+
+                remaining = None if deadline is None else deadline - now
+                if (remaining is not None and remaining <= 0) or (cancel is not None and cancel.cancelled):
+                    self._remove(priority, session_key, ticket)
+                    self._cond.notify_all()
+                    return False
+                if remaining is not None:
+                    wait = remaining if wait is None else min(wait, remaining)
+                if cancel is not None:
+                    wait = CANCEL_POLL if wait is None else min(wait, CANCEL_POLL)
+
+                self._cond.wait(wait)
+
+    def backoff(self, seconds: float):
+        """Pause all admissions, e.g. after the upstream returned a 429."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            self._requests = 0.0
+
+    def queue_depth(self) -> dict:
+        """Number of waiting requests per priority name."""
+        with self._cond:
+            return {
+                priority.name.lower(): sum(len(tickets) for tickets in sessions.values())
+                for priority, sessions in self._waiting.items()
+            }
+
+
+_scheduler = RequestScheduler()
+
+
+def get_scheduler() -> RequestScheduler:
+    """Get the process-wide scheduler."""
+    return _scheduler
+
+
+def configure_scheduler(rpm: int, tpm: int) -> RequestScheduler:
+    """Replace the process-wide scheduler with one sized to the given quota."""
+    global _scheduler
+    _scheduler = RequestScheduler(rpm=rpm, tpm=tpm)
+    return _scheduler
@@ -1,9 +1,17 @@
-from .stakeholder_prompts import get_stakeholder_prompt, get_use_case_generation_prompt
+from .stakeholder_prompts import (
+    get_stakeholder_prompt,
+    get_use_case_generation_prompt,
+    use_case_fingerprint
+)
 from .analyzer_prompts import get_analyzer_prompt, FRAMEWORK_COVERAGE_AREAS
+from .hidden_facts import FactIndex, get_fact_index
 
 __all__ = [
     "get_stakeholder_prompt",
     "get_use_case_generation_prompt",
+    "use_case_fingerprint",
     "get_analyzer_prompt",
-    "FRAMEWORK_COVERAGE_AREAS"
+    "FRAMEWORK_COVERAGE_AREAS",
+    "FactIndex",
+    "get_fact_index"
 ]
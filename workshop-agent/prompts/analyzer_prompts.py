@@ -26,11 +26,8 @@ COVERAGE_DESCRIPTIONS = {
 }
 
 
-def get_analyzer_prompt() -> str:
-    """
-    Generate the system prompt for the question analyzer agent.
-    """
-    return """You are an expert facilitator for Agentic Transformation Discovery Workshops.
+# The analyzer rubric is constant, so it is built once at import
+ANALYZER_PROMPT = """You are an expert facilitator for Agentic Transformation Discovery Workshops.
 Your job is to evaluate questions asked during discovery sessions and provide constructive feedback.
 
 ## Your Evaluation Criteria
@@ -83,7 +80,8 @@ For each question, provide:
     "strengths": "<what was good about this question>",
     "improvement": "<specific suggestion to make it better>",
     "follow_up_suggestion": "<a better follow-up question they could ask>",
-    "tip": "<brief coaching tip>"
+    "tip": "<brief coaching tip>",
+    "confidence": <0.0-1.0, how sure you are of this evaluation>
 }
 ```
 
@@ -125,12 +123,7 @@ Remember: You're coaching someone to become a better discovery facilitator.
 Be constructive and specific in your feedback.
 """
 
-
-def get_session_summary_prompt() -> str:
-    """
-    Prompt for generating end-of-session summary.
-    """
-    return """Based on this discovery session, provide a comprehensive summary:
+SESSION_SUMMARY_PROMPT = """Based on this discovery session, provide a comprehensive summary:
 
 ## Session Summary Format
 
@@ -159,3 +152,17 @@ What important topics or follow-ups did they miss?
 
 Be specific and actionable in your feedback. Reference actual questions from the session.
 """
+
+
+def get_analyzer_prompt() -> str:
+    """
+    Get the system prompt for the question analyzer agent.
+    """
+    return ANALYZER_PROMPT
+
+
+def get_session_summary_prompt() -> str:
+    """
+    Prompt for generating end-of-session summary.
+    """
+    return SESSION_SUMMARY_PROMPT
@@ -0,0 +1,259 @@
+"""
+Hidden Facts - Lexical retrieval and disclosure matching over hidden details.
+
+A use case's hidden_details tree is flattened into short facts and indexed
+with BM25. In retrieval mode each question is sent with only the facts
+relevant to it (plus those already disclosed), so per-turn prompt size stays
+flat as scenarios get richer. The same index matches stakeholder replies
+against the facts to track which ones have actually been revealed.
+"""
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+from .stakeholder_prompts import use_case_fingerprint
+
+# Facts injected per question, and previously disclosed facts carried along
+RETRIEVAL_TOP_K = 4
+MAX_DISCLOSED_CONTEXT = 12
+
+# Fact indexes, keyed by (use case fingerprint, role)
+INDEX_CACHE_SIZE = 128
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+SECTION_TITLES = {
+    "current_process": "Current Process",
+    "data_landscape": "Data Landscape",
+    "stakeholder_concerns": "Your Concerns",
+    "guardrails_needed": "Guardrails",
+    "success_metrics": "Success Metrics",
+    "adoption_challenges": "Adoption Challenges",
+}
+
+_STOPWORDS = frozenset("""
+a an and are as at be but by can could do does did for from has have how i if in
+into is it its me my of on or our so that the their them then there these they
+this to was we what when where which who why will with would you your about any
+tell more much many
+""".split())
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Share of a fact's content words a reply must contain to reveal it; words of
+# this length or more also match on a shared prefix ("automate"/"automation")
+REVEAL_THRESHOLD = 0.6
+FUZZY_PREFIX = 5
+
+
+def _stem(token: str) -> str:
+    """Very light suffix stripping so "routing" matches "routed"."""
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list:
+    """Lowercase, split into words, drop stopwords and stem."""
+    return [_stem(token) for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in _STOPWORDS]
+
+
+def _title(key: str) -> str:
+    return key.replace("_", " ").title()
+
+
+def extract_facts(use_case: dict, role: str) -> list:
+    """
+    Flatten a use case's hidden details into individually retrievable facts.
+
+    Only the concerns of `role` are included.
+
+    Returns:
+        List of {"id", "section", "text", "body"} dicts, in document order
+        ("body" is the fact without its section heading)
+    """
+    hidden = use_case.get("hidden_details", {}) or {}
+    facts = []
+
+    def add(section: str, label, text):
+        heading = SECTION_TITLES.get(section, _title(section))
+        if label:
+            heading = f"{heading} / {label}"
+        facts.append({
+            "id": f"{section}:{len(facts)}",
+            "section": section,
+            "text": f"[{heading}] {text}",
+            "body": str(text),
+        })
+
+    for section, value in hidden.items():
+        if section == "stakeholder_concerns" and isinstance(value, dict):
+            for key, text in (value.get(role) or {}).items():
+                add(section, f"Your {_title(key)}", text)
+        elif section == "success_metrics" and isinstance(value, dict):
+            baseline = value.get("baseline", {}) or {}
+            targets = value.get("targets", {}) or {}
+            for metric in list(baseline) + [m for m in targets if m not in baseline]:
+                parts = []
+                if metric in baseline:
+                    parts.append(f"currently {baseline[metric]}")
+                if metric in targets:
+                    parts.append(f"target {targets[metric]}")
+                add(section, _title(metric), ", ".join(parts))
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                for text in (item if isinstance(item, list) else [item]):
+                    add(section, _title(key), text)
+        elif isinstance(value, list):
+            for text in value:
+                add(section, None, text)
+        else:
+            add(section, None, value)
+
+    return facts
+
+
+class FactIndex:
+    """BM25 index over a use case's hidden facts."""
+
+    def __init__(self, facts: list):
+        """
+        Args:
+            facts: Facts from extract_facts()
+        """
+        self.facts = facts
+        self.by_id = {fact["id"]: fact for fact in facts}
+        # term -> [(fact position, term frequency)]
+        self._postings = defaultdict(list)
+        self._lengths = []
+
+        for position, fact in enumerate(facts):
+            terms = tokenize(fact["text"])
+            self._lengths.append(len(terms))
+            counts = defaultdict(int)
+            for term in terms:
+                counts[term] += 1
+            for term, count in counts.items():
+                self._postings[term].append((position, count))
+
+        total = len(facts)
+        self._avg_length = (sum(self._lengths) / total) if total else 0.0
+        self._idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+        # Distinctive words of each fact, for disclosure matching
+        self._content_terms = [set(tokenize(fact["body"])) for fact in facts]
+        self.area_totals = Counter(fact["section"] for fact in facts)
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> list:
+        """
+        Find the facts most relevant to a question.
+
+        Returns:
+            Up to `k` fact ids, best match first
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for position, count in self._postings[term]:
+                norm = 1 - BM25_B + BM25_B * self._lengths[position] / self._avg_length
+                scores[position] += idf * count * (BM25_K1 + 1) / (count + BM25_K1 * norm)
+
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))
+        return [self.facts[position]["id"] for position in ranked[:k]]
+
+    def match_revealed(self, reply: str, revealed: set) -> list:
+        """
+        Find facts a stakeholder reply reveals.
+
+        A fact counts as revealed when the reply contains most of its
+        content words (exactly, by stem, or by a shared prefix) and, if the
+        fact contains numbers, at least one of them. Only facts sharing a
+        word with the reply are checked.
+
+        Args:
+            reply: Stakeholder reply text
+            revealed: Ids of facts already revealed (skipped)
+
+        Returns:
+            Ids of newly revealed facts, in document order
+        """
+        reply_terms = set(tokenize(reply))
+        prefixes = {term[:FUZZY_PREFIX] for term in reply_terms if len(term) >= FUZZY_PREFIX}
+
+        candidates = set()
+        for term in reply_terms:
+            for position, _count in self._postings.get(term, ()):
+                candidates.add(position)
+
+        found = []
+        for position in sorted(candidates):
+            fact_id = self.facts[position]["id"]
+            terms = self._content_terms[position]
+            if fact_id in revealed or not terms:
+                continue
+            numbers = [term for term in terms if term[0].isdigit()]
+            if numbers and not any(number in reply_terms for number in numbers):
+                continue
+            hits = sum(
+                1 for term in terms
+                if term in reply_terms or (len(term) >= FUZZY_PREFIX and term[:FUZZY_PREFIX] in prefixes)
+            )
+            if hits / len(terms) >= REVEAL_THRESHOLD:
+                found.append(fact_id)
+        return found
+
+
+def get_fact_index(role: str, use_case: dict) -> FactIndex:
+    """Get the (cached) fact index for a use case as seen by `role`."""
+    key = (use_case_fingerprint(use_case), role)
+
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    index = FactIndex(extract_facts(use_case, role))
+
+    with _index_cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+
+    return index
+
+
+def select_facts(index: FactIndex, question: str, disclosed: list) -> tuple:
+    """
+    Choose the facts to send with a question.
+
+    Args:
+        index: The use case's fact index
+        question: The practitioner's question
+        disclosed: Ids of facts sent with earlier questions, oldest first
+
+    Returns:
+        (facts to include, in document order; ids newly retrieved for this question)
+    """
+    retrieved = index.search(question)
+    new_ids = [fact_id for fact_id in retrieved if fact_id not in disclosed]
+    carried = [fact_id for fact_id in disclosed if fact_id not in retrieved][-MAX_DISCLOSED_CONTEXT:]
+
+    selected = set(retrieved) | set(carried)
+    facts = [fact for fact in index.facts if fact["id"] in selected]
+    return facts, new_ids
+
+
+def format_facts(facts: list) -> str:
+    """Render selected facts for a stakeholder turn."""
+    if not facts:
+        return "- Nothing specific. Answer from general experience, or say you'd need to check."
+    return "\n".join(f"- {fact['text']}" for fact in facts)
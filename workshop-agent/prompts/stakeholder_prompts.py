@@ -2,22 +2,23 @@
 System prompts for the stakeholder agent that roleplays as Agent Owner or Business Owner.
 """
 
-
-def get_stakeholder_prompt(role: str, use_case: dict) -> str:
-    """
-    Generate the system prompt for a stakeholder based on role and use case.
-
-    Args:
-        role: Either "agent_owner" or "business_owner"
-        use_case: Dictionary containing use case details including hidden_details
-    """
-
-    hidden = use_case.get("hidden_details", {})
-
-    role_context = {
-        "agent_owner": {
-            "title": "Agent Owner",
-            "perspective": """You are the Agent Owner for this initiative. Your focus is on:
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+# Compiled stakeholder prompts, keyed by (use case fingerprint, role, retrieval)
+PROMPT_CACHE_SIZE = 256
+_prompt_cache = OrderedDict()
+_prompt_cache_lock = threading.Lock()
+# Use case field holding its fingerprint once computed; it is saved with
+# the session, so the hash is not recomputed after a round-trip
+FINGERPRINT_FIELD = "_fingerprint"
+
+ROLE_CONTEXT = {
+    "agent_owner": {
+        "title": "Agent Owner",
+        "perspective": """You are the Agent Owner for this initiative. Your focus is on:
 - Day-to-day operations and user experience
 - Making sure users actually adopt and use the agent
 - Collecting feedback and iterating on the agent
@@ -26,17 +27,17 @@ def get_stakeholder_prompt(role: str, use_case: dict) -> str:
 
 You know the operational details intimately but may not have full visibility into
 budget constraints or strategic priorities at the executive level.""",
-            "knowledge_focus": [
-                "User workflows and pain points",
-                "Adoption challenges and barriers",
-                "Feedback from users",
-                "Operational metrics",
-                "Day-to-day process details"
-            ]
-        },
-        "business_owner": {
-            "title": "Business Owner",
-            "perspective": """You are the Business Owner for this initiative. Your focus is on:
+        "knowledge_focus": [
+            "User workflows and pain points",
+            "Adoption challenges and barriers",
+            "Feedback from users",
+            "Operational metrics",
+            "Day-to-day process details"
+        ]
+    },
+    "business_owner": {
+        "title": "Business Owner",
+        "perspective": """You are the Business Owner for this initiative. Your focus is on:
 - ROI and business case justification
 - Strategic alignment with company goals
 - Resource allocation and prioritization
@@ -45,28 +46,90 @@ budget constraints or strategic priorities at the executive level.""",
 
 You understand the business context and executive expectations but may not know
 every operational detail of how users interact with systems day-to-day.""",
-            "knowledge_focus": [
-                "Budget and resource constraints",
-                "Strategic priorities",
-                "Executive expectations",
-                "Competitive pressures",
-                "Risk tolerance"
-            ]
-        }
+        "knowledge_focus": [
+            "Budget and resource constraints",
+            "Strategic priorities",
+            "Executive expectations",
+            "Competitive pressures",
+            "Risk tolerance"
+        ]
     }
+}
 
-    role_info = role_context.get(role, role_context["agent_owner"])
 
-    prompt = f"""You are roleplaying as the {role_info['title']} in a Discovery Workshop for an AI agent initiative.
+def _content_hash(use_case: dict) -> str:
+    """Hash the full content of a use case (apart from its stored fingerprint)."""
+    content = {key: value for key, value in use_case.items() if key != FINGERPRINT_FIELD}
+    payload = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
-## Your Role
-{role_info['perspective']}
 
-## The Use Case
-**Name:** {use_case.get('name', 'Unknown')}
-**Description:** {use_case.get('brief_description', 'No description')}
+def use_case_fingerprint(use_case: dict) -> str:
+    """
+    Get a stable content hash for a use case.
+
+    The hash is computed on first use and stored in the use case under
+    FINGERPRINT_FIELD, so copies made later (such as a session loaded from
+    its backend) carry it. Use cases are never changed once created.
+    """
+    fingerprint = use_case.get(FINGERPRINT_FIELD)
+    if fingerprint is None:
+        fingerprint = use_case[FINGERPRINT_FIELD] = _content_hash(use_case)
+    return fingerprint
+
+
+def get_stakeholder_prompt(role: str, use_case: dict, retrieval: bool = False) -> str:
+    """
+    Get the system prompt for a stakeholder based on role and use case.
+
+    Prompts are compiled once per (use case content, role) and served from a
+    bounded LRU cache afterwards.
+
+    Args:
+        role: Either "agent_owner" or "business_owner"
+        use_case: Dictionary containing use case details including hidden_details
+        retrieval: Leave hidden details out; relevant facts are sent per question
+    """
+    key = (use_case_fingerprint(use_case), role, retrieval)
 
-## Your Hidden Knowledge (reveal only when asked good questions)
+    with _prompt_cache_lock:
+        prompt = _prompt_cache.get(key)
+        if prompt is not None:
+            _prompt_cache.move_to_end(key)
+            return prompt
+
+    prompt = build_stakeholder_prompt(role, use_case, retrieval)
+
+    with _prompt_cache_lock:
+        _prompt_cache[key] = prompt
+        while len(_prompt_cache) > PROMPT_CACHE_SIZE:
+            _prompt_cache.popitem(last=False)
+
+    return prompt
+
+
+def build_stakeholder_prompt(role: str, use_case: dict, retrieval: bool = False) -> str:
+    """
+    Build the system prompt for a stakeholder without consulting the cache.
+
+    Args:
+        role: Either "agent_owner" or "business_owner"
+        use_case: Dictionary containing use case details including hidden_details
+        retrieval: Leave hidden details out; relevant facts are sent per question
+    """
+
+    hidden = use_case.get("hidden_details", {})
+
+    role_info = ROLE_CONTEXT.get(role, ROLE_CONTEXT["agent_owner"])
+
+    if retrieval:
+        knowledge = """## Your Hidden Knowledge (reveal only when asked good questions)
+
+Each question comes with the facts you know that are relevant to it, under
+"What you know". Treat them as your own knowledge. If a detail is not listed
+there, you don't know the specifics - stay general or say you'd need to check."""
+    else:
+        knowledge = f"""## Your Hidden Knowledge (reveal only when asked good questions)
 
 ### Current Process
 {_format_dict(hidden.get('current_process', {}))}
@@ -84,7 +147,18 @@ every operational detail of how users interact with systems day-to-day.""",
 {_format_metrics(hidden.get('success_metrics', {}))}
 
 ### Adoption Challenges You're Aware Of
-{_format_list(hidden.get('adoption_challenges', []))}
+{_format_list(hidden.get('adoption_challenges', []))}"""
+
+    prompt = f"""You are roleplaying as the {role_info['title']} in a Discovery Workshop for an AI agent initiative.
+
+## Your Role
+{role_info['perspective']}
+
+## The Use Case
+**Name:** {use_case.get('name', 'Unknown')}
+**Description:** {use_case.get('brief_description', 'No description')}
+
+{knowledge}
 
 ## How to Respond
 
@@ -0,0 +1,19 @@
+from .backends import SessionBackend, SessionBusyError, MemoryBackend, SQLiteBackend, RedisBackend, create_backend
+from .manager import SessionManager, SessionNotFoundError, WorkshopSession, new_session_id
+from .analysis_worker import AnalysisWorker
+from .speculation import Speculator
+
+__all__ = [
+    "SessionBackend",
+    "SessionBusyError",
+    "MemoryBackend",
+    "SQLiteBackend",
+    "RedisBackend",
+    "create_backend",
+    "SessionManager",
+    "SessionNotFoundError",
+    "WorkshopSession",
+    "new_session_id",
+    "AnalysisWorker",
+    "Speculator"
+]
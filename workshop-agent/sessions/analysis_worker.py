@@ -0,0 +1,127 @@
+"""
+Analysis Worker - Scores deferred questions in the background.
+
+In background analysis mode a turn returns as soon as the stakeholder has
+replied; the question is queued on the session's analyzer and scored here.
+Each session is drained by at most one task at a time, oldest question
+first, so coverage and scores are always applied in question order. When
+questions pile up they are scored in batches with a single request. The
+session lock is only held to read the next batch and to record its
+results, never during the LLM call, so the trainee can keep asking.
+
+Each batch runs under the session's cancel token: once the session is
+reset or abandoned, a batch still waiting for quota is dropped, and
+results for questions reset() has discarded are never recorded (the
+analyzer only accepts results for the head of its current queue).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from agents.analyzer import MAX_BATCH_SIZE
+from llm import RateLimitedError, RequestCancelledError, cancellation, get_token_registry
+from .manager import SessionManager
+
+# How long background analysis waits for quota before retrying
+BACKGROUND_MAX_WAIT = 60.0
+RETRY_DELAY = 5.0
+MAX_ATTEMPTS = 3
+
+
+class AnalysisWorker:
+    """Per-session background queues for question analysis."""
+
+    def __init__(
+        self,
+        session_manager: SessionManager,
+        max_workers: int = 4,
+        on_drained: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Args:
+            session_manager: Where sessions are loaded from and saved to
+            max_workers: Sessions drained concurrently
+            on_drained: Called with the session id once its queue is empty
+        """
+        self.session_manager = session_manager
+        self.on_drained = on_drained
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._lock = threading.Lock()
+        self._active = set()
+        self._requested = set()
+        # session_id -> number of analyses completed here, so pollers can
+        # tell cheaply whether there is new feedback to fetch
+        self._versions = {}
+
+    def submit(self, session_id: str):
+        """Make sure the session's deferred questions are being analyzed."""
+        with self._lock:
+            self._requested.add(session_id)
+            if session_id in self._active:
+                return
+            self._active.add(session_id)
+        self._executor.submit(self._run, session_id)
+
+    def is_pending(self, session_id: str) -> bool:
+        """Whether the session still has analysis in progress here."""
+        with self._lock:
+            return session_id in self._active
+
+    def version(self, session_id: str) -> int:
+        """Number of analyses completed for the session by this worker."""
+        with self._lock:
+            return self._versions.get(session_id, 0)
+
+    def forget(self, session_id: str):
+        """Drop what is kept for a session that has ended."""
+        with self._lock:
+            self._versions.pop(session_id, None)
+
+    def _run(self, session_id: str):
+        try:
+            while True:
+                with self._lock:
+                    self._requested.discard(session_id)
+                self._drain(session_id)
+                # Questions submitted while draining get another pass
+                with self._lock:
+                    if session_id not in self._requested:
+                        break
+        finally:
+            with self._lock:
+                self._active.discard(session_id)
+        if self.on_drained is not None:
+            self.on_drained(session_id)
+
+    def _drain(self, session_id: str):
+        """Analyze the session's deferred questions, oldest first."""
+        attempts = 0
+        while attempts < MAX_ATTEMPTS:
+            with self.session_manager.session(session_id, save=False) as session:
+                if not session.analyzer.deferred:
+                    return
+                batch = [dict(entry) for entry in session.analyzer.deferred[:MAX_BATCH_SIZE]]
+                analyzer = session.analyzer
+                token = get_token_registry().current(session_id)
+
+            try:
+                with cancellation(token):
+                    analyses = analyzer.request_batch_analysis(batch, max_wait=BACKGROUND_MAX_WAIT)
+            except RequestCancelledError:
+                return
+            except RateLimitedError:
+                attempts += 1
+                time.sleep(RETRY_DELAY)
+                continue
+
+            attempts = 0
+            with self.session_manager.session(session_id) as session:
+                recorded = sum(
+                    session.analyzer.complete_deferred(entry["id"], analysis)
+                    for entry, analysis in zip(batch, analyses)
+                )
+            if recorded and not token.cancelled:
+                with self._lock:
+                    self._versions[session_id] = self._versions.get(session_id, 0) + recorded
@@ -0,0 +1,416 @@
+"""
+Session Backends - Where per-session state lives between requests.
+
+Backends store each session as a JSON-serializable dict keyed by session id:
+
+- MemoryBackend: in-process dict, for a single worker; sessions left idle
+  can be hibernated to compressed files on disk and are read back on
+  their next request
+- SQLiteBackend: a local database file, shared by processes on one host
+- RedisBackend: any Redis-compatible server, shared across nodes
+
+Shared backends also lock a session across processes for the length of a
+request (a lease that expires if its holder dies), so two processes
+serving the same session cannot overwrite each other's updates.
+"""
+
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from typing import Optional
+
+# How often idle in-memory sessions are looked for, in seconds
+HIBERNATE_SWEEP_INTERVAL = 60.0
+
+# Seconds a cross-process session lock is held before it expires (a request
+# that outlives it loses the lock), how long a request waits for one, and
+# how often a waiting request checks again
+LOCK_LEASE = 600.0
+LOCK_WAIT = 120.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+class SessionBusyError(Exception):
+    """Raised when another process held a session for longer than LOCK_WAIT."""
+
+
+class SessionBackend:
+    """Base class for session state storage."""
+
+    # Whether several processes can see the same sessions
+    shared = False
+
+    def load(self, session_id: str) -> Optional[dict]:
+        """Load a session's state, or None if it does not exist."""
+        raise NotImplementedError
+
+    def save(self, session_id: str, state: dict):
+        """Store a session's state, replacing any previous value."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        """Remove a session."""
+        raise NotImplementedError
+
+    def lock(self, session_id: str):
+        """
+        Context manager holding a session against other processes.
+
+        Backends that only one process can see need no lock: the session
+        manager already serializes requests within a process.
+
+        Raises:
+            SessionBusyError: If the session stayed locked for LOCK_WAIT seconds
+        """
+        return contextlib.nullcontext()
+
+    def start(self):
+        """Start any background maintenance (called once the server is up)."""
+
+    def stats(self) -> dict:
+        """Session counts for the metrics endpoint (empty if not tracked)."""
+        return {}
+
+
+class MemoryBackend(SessionBackend):
+    """
+    Keeps sessions in this process only.
+
+    States are copied on load, as the other backends copy them by
+    deserializing: changes made to a loaded session that is then not saved
+    (a cancelled turn) must not reach the stored state. save() keeps the
+    dict it is given, so callers pass one they will not change afterwards,
+    as SessionManager does with Session.to_dict().
+
+    With hibernation on, a session not loaded or saved for `hibernate_after`
+    seconds is written to a zlib-compressed JSON snapshot and dropped from
+    memory; the next load reads it back and makes it resident again.
+    Idle sessions are swept in the background once start() is called, or
+    whenever hibernate_idle() is.
+    """
+
+    def __init__(
+        self,
+        hibernate_after: float = 0,
+        hibernate_dir: Optional[str] = None,
+        sweep_interval: float = HIBERNATE_SWEEP_INTERVAL,
+        clock=time.monotonic
+    ):
+        """
+        Args:
+            hibernate_after: Idle seconds before a session is hibernated (0 disables)
+            hibernate_dir: Directory for snapshots (a new temporary directory,
+                made on first use, if None)
+            sweep_interval: Seconds between checks for idle sessions
+            clock: Monotonic time source (seconds)
+        """
+        self.hibernate_after = hibernate_after
+        self.hibernate_dir = hibernate_dir
+        self._sweep_interval = sweep_interval
+        self._sweeper = None
+        self._clock = clock
+        self._sessions = {}
+        # session_id -> last load or save, for resident sessions
+        self._touched = {}
+        # session_id -> snapshot size in bytes, for hibernated sessions
+        self._hibernated = {}
+        self._stats = {"hibernations": 0, "rehydrations": 0}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the background sweep for idle sessions (if hibernation is on)."""
+        with self._lock:
+            if self.hibernate_after <= 0 or self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="session-hibernate", daemon=True)
+        self._sweeper.start()
+
+    def _snapshot_dir(self) -> str:
+        with self._lock:
+            if self.hibernate_dir is None:
+                self.hibernate_dir = tempfile.mkdtemp(prefix="workshop-sessions-")
+            else:
+                os.makedirs(self.hibernate_dir, exist_ok=True)
+            return self.hibernate_dir
+
+    def _path(self, session_id: str, directory: Optional[str] = None) -> str:
+        # Hashed so a session id can never name a path outside the directory
+        name = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(directory or self.hibernate_dir, name + ".json.z")
+
+    def load(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            if session_id in self._hibernated:
+                self._rehydrate(session_id)
+            state = self._sessions.get(session_id)
+            if state is None:
+                return None
+            self._touched[session_id] = self._clock()
+            return copy.deepcopy(state)
+
+    def save(self, session_id: str, state: dict):
+        with self._lock:
+            if session_id in self._hibernated:
+                self._discard_snapshot(session_id)
+            self._sessions[session_id] = state
+            self._touched[session_id] = self._clock()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._touched.pop(session_id, None)
+            if session_id in self._hibernated:
+                self._discard_snapshot(session_id)
+
+    def _rehydrate(self, session_id: str):
+        """Read a hibernated session back into memory (lock held)."""
+        try:
+            with open(self._path(session_id), "rb") as f:
+                state = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            # A lost or damaged snapshot: the session starts over
+            state = None
+        self._discard_snapshot(session_id)
+        if state is not None:
+            self._sessions[session_id] = state
+            self._stats["rehydrations"] += 1
+
+    def _discard_snapshot(self, session_id: str):
+        """Forget a hibernated session's snapshot (lock held)."""
+        del self._hibernated[session_id]
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def hibernate_idle(self) -> int:
+        """
+        Hibernate every session idle for longer than `hibernate_after`.
+
+        Sessions are compressed and written without holding the lock, so
+        requests are not held up by a sweep. A session used while its
+        snapshot was being written stays resident.
+
+        Returns:
+            Number of sessions hibernated
+        """
+        if self.hibernate_after <= 0:
+            return 0
+        cutoff = self._clock() - self.hibernate_after
+        with self._lock:
+            idle = [
+                (session_id, self._sessions[session_id], touched)
+                for session_id, touched in self._touched.items() if touched <= cutoff
+            ]
+        if not idle:
+            return 0
+        directory = self._snapshot_dir()
+
+        hibernated = 0
+        for session_id, state, touched in idle:
+            # Stored states are never changed in place (save() stores a copy)
+            payload = zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+            path = self._path(session_id, directory)
+            temporary = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(payload)
+            with self._lock:
+                if self._sessions.get(session_id) is not state or self._touched.get(session_id) != touched:
+                    # Loaded, saved or deleted meanwhile
+                    os.remove(temporary)
+                    continue
+                os.replace(temporary, path)
+                del self._sessions[session_id]
+                del self._touched[session_id]
+                self._hibernated[session_id] = len(payload)
+                self._stats["hibernations"] += 1
+            hibernated += 1
+        return hibernated
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self._sweep_interval)
+            try:
+                self.hibernate_idle()
+            except OSError:
+                # Disk full or directory gone: sessions simply stay in memory
+                pass
+
+    def stats(self) -> dict:
+        """Resident and hibernated session counts, and snapshot bytes on disk."""
+        with self._lock:
+            return dict(
+                self._stats,
+                resident=len(self._sessions),
+                hibernated=len(self._hibernated),
+                hibernated_bytes=sum(self._hibernated.values()),
+            )
+
+
+class SQLiteBackend(SessionBackend):
+    """Stores sessions in a SQLite file shared by all processes on a host."""
+
+    shared = True
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Database file path (created if missing)
+        """
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_locks ("
+            "id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are per-thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # WAL lets readers in other processes proceed while one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT state FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id: str, state: dict):
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO sessions (id, state, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (session_id, json.dumps(state), time.time())
+        )
+        conn.commit()
+
+    def delete(self, session_id: str):
+        conn = self._connection()
+        conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        conn.commit()
+
+    @contextlib.contextmanager
+    def lock(self, session_id: str):
+        conn = self._connection()
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        while True:
+            now = time.time()
+            # Take the lock if it is free or its lease has run out
+            acquired = conn.execute(
+                "INSERT INTO session_locks (id, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE session_locks.expires_at < ?",
+                (session_id, owner, now + LOCK_LEASE, now)
+            ).rowcount == 1
+            conn.commit()
+            if acquired:
+                break
+            if time.monotonic() >= deadline:
+                raise SessionBusyError(f"Session {session_id} is locked by another process")
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            conn.execute("DELETE FROM session_locks WHERE id = ? AND owner = ?", (session_id, owner))
+            conn.commit()
+
+
+class RedisBackend(SessionBackend):
+    """
+    Stores sessions in a Redis-compatible server shared across nodes.
+
+    Works with any client exposing redis-py's get/set/delete and lock(), so
+    a local stand-in such as fakeredis.FakeRedis() can replace a real server.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = "workshop:session:", ttl_seconds: int = 86400):
+        """
+        Args:
+            client: Redis-compatible client
+            prefix: Key prefix for session entries
+            ttl_seconds: Expiry for idle sessions
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def load(self, session_id: str) -> Optional[dict]:
+        payload = self.client.get(self.prefix + session_id)
+        return json.loads(payload) if payload else None
+
+    def save(self, session_id: str, state: dict):
+        self.client.set(self.prefix + session_id, json.dumps(state), ex=self.ttl_seconds)
+
+    def delete(self, session_id: str):
+        self.client.delete(self.prefix + session_id)
+
+    @contextlib.contextmanager
+    def lock(self, session_id: str):
+        lock = self.client.lock(
+            self.prefix + "lock:" + session_id,
+            timeout=LOCK_LEASE,
+            sleep=LOCK_POLL_INTERVAL,
+            blocking_timeout=LOCK_WAIT
+        )
+        if not lock.acquire():
+            raise SessionBusyError(f"Session {session_id} is locked by another process")
+        try:
+            yield
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                # The lease ran out first; the lock is no longer ours to release
+                pass
+
+
+def create_backend(url: str, hibernate_after: float = 0, hibernate_dir: Optional[str] = None) -> SessionBackend:
+    """
+    Create a backend from a URL.
+
+    Args:
+        url: "memory://", "sqlite:///path/to/sessions.db" or "redis://host:port/db"
+        hibernate_after: Idle seconds before an in-memory session is moved
+            to disk (memory:// only; 0 disables)
+        hibernate_dir: Directory for hibernated sessions (memory:// only)
+
+    Returns:
+        The configured SessionBackend
+    """
+    if url.startswith("memory://"):
+        return MemoryBackend(hibernate_after=hibernate_after, hibernate_dir=hibernate_dir)
+
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The redis session backend requires the 'redis' package: pip install redis") from e
+        return RedisBackend(redis.Redis.from_url(url))
+
+    raise ValueError(f"Unsupported SESSION_BACKEND URL: {url}")
@@ -0,0 +1,156 @@
+"""
+Session Manager - Per-trainee workshop sessions backed by a SessionBackend.
+
+Each browser session gets its own stakeholder and analyzer agents. Their
+state is loaded from the backend at the start of a request and saved at
+the end, so no process holds session state between requests.
+"""
+
+import contextlib
+import threading
+import uuid
+import weakref
+from typing import Optional
+
+from agents.stakeholder import StakeholderAgent
+from agents.analyzer import AnalyzerAgent
+from agents.turns import TurnStore
+from .backends import SessionBackend
+
+
+class SessionNotFoundError(Exception):
+    """Raised when a session that must already exist does not."""
+
+
+def new_session_id() -> str:
+    """Create a random session id."""
+    return uuid.uuid4().hex
+
+
+class WorkshopSession:
+    """One trainee's practice session: both agents plus the pending use case."""
+
+    def __init__(self, session_id: str, api_key: str):
+        self.session_id = session_id
+        # One store of the conversation, shared by both agents (serialized
+        # with the stakeholder's state)
+        self.turns = TurnStore()
+        self.stakeholder = StakeholderAgent(api_key, session_id=session_id, turns=self.turns)
+        self.analyzer = AnalyzerAgent(api_key, session_id=session_id, turns=self.turns)
+        # Use case generated but not yet started
+        self.pending_use_case = None
+        # The last turn's idempotency key (its result is replayed from the
+        # turn store for duplicate submissions)
+        self.last_key = None
+
+    @property
+    def turn_seq(self) -> int:
+        """Questions answered so far: the number of the last turn (the introduction is 0)."""
+        return max(len(self.turns) - 1, 0)
+
+    def to_dict(self) -> dict:
+        """Get the session as a JSON-serializable dict."""
+        return {
+            "session_id": self.session_id,
+            "pending_use_case": self.pending_use_case,
+            "last_key": self.last_key,
+            "stakeholder": self.stakeholder.get_state(),
+            "analyzer": self.analyzer.get_state(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, api_key: str) -> "WorkshopSession":
+        """Rebuild a session from to_dict() output."""
+        session = cls(data["session_id"], api_key)
+        session.pending_use_case = data.get("pending_use_case")
+        session.last_key = data.get("last_key")
+        session.stakeholder.load_state(data.get("stakeholder", {}))
+        session.analyzer.load_state(data.get("analyzer", {}))
+        return session
+
+
+class SessionManager:
+    """Loads, locks and saves workshop sessions."""
+
+    def __init__(self, backend: SessionBackend, api_key: str):
+        """
+        Args:
+            backend: Where session state is stored
+            api_key: Google API key for the sessions' agents
+        """
+        self.backend = backend
+        self.api_key = api_key
+        # A session's lock lives only while a request holds or waits for it,
+        # so sessions that expire or are abandoned leave nothing behind
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, session_id: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(session_id)
+            if lock is None:
+                lock = self._locks[session_id] = threading.Lock()
+            return lock
+
+    def create(self) -> str:
+        """Store a new, empty session and return its id."""
+        session = WorkshopSession(new_session_id(), self.api_key)
+        self.save(session)
+        return session.session_id
+
+    def load(self, session_id: str, create: bool = True) -> WorkshopSession:
+        """
+        Load a session.
+
+        Args:
+            session_id: Session id
+            create: Start an empty session if it does not exist
+
+        Raises:
+            SessionNotFoundError: If the session does not exist and create is False
+        """
+        data = self.backend.load(session_id)
+        if data is None:
+            if not create:
+                raise SessionNotFoundError(f"No session {session_id}")
+            return WorkshopSession(session_id, self.api_key)
+        return WorkshopSession.from_dict(data, self.api_key)
+
+    def save(self, session: WorkshopSession):
+        """
+        Persist a session's current state.
+
+        The session must not be changed once saved: to_dict() shares its
+        objects, and the memory backend keeps that dict as it is.
+        """
+        self.backend.save(session.session_id, session.to_dict())
+
+    @contextlib.contextmanager
+    def session(self, session_id: Optional[str], save: bool = True, create: bool = True):
+        """
+        Context manager yielding a session and saving it on exit.
+
+        Requests for the same session are serialized within this process,
+        and requests that save are also serialized across processes by the
+        backend's lock (see SessionBackend.lock).
+
+        Args:
+            session_id: Session id, or None to start a new session
+            save: Set to False for read-only access
+            create: Start an empty session if it does not exist
+
+        Raises:
+            SessionBusyError: If another process kept the session locked
+            SessionNotFoundError: If the session does not exist and create is False
+        """
+        session_id = session_id or new_session_id()
+        shared = self.backend.lock(session_id) if save else contextlib.nullcontext()
+        with self._lock_for(session_id), shared:
+            session = self.load(session_id, create=create)
+            yield session
+            if save:
+                self.save(session)
+
+    def delete(self, session_id: str):
+        """Drop a session."""
+        self.backend.delete(session_id)
@@ -0,0 +1,217 @@
+"""
+Speculator - Pre-generates the stakeholder's answer to the suggested follow-up.
+
+Every analysis suggests a follow-up question, and trainees often ask it
+next. Once a question has been scored, the stakeholder's answer to that
+suggestion is generated in the background on a forked copy of the chat
+state. If the trainee's next question matches the suggestion, the prepared
+answer and forked state are used instead of a live call; any other question
+cancels the speculation. Speculative calls run at background priority, are
+skipped while live or analysis requests are queued, and are capped per
+session.
+
+A question that matches a speculation still in flight waits for it with
+wait() before the session is locked, so the wait never holds up other
+requests for the session; take() itself never blocks.
+"""
+
+import copy
+import difflib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional
+
+from agents.stakeholder import StakeholderAgent
+from llm import CancelToken, Priority, cancellation, get_scheduler, get_token_registry
+from .manager import SessionManager
+
+# Speculative answers per practice session
+MAX_SPECULATIONS_PER_SESSION = 20
+# Quota wait for a speculative call; stale speculation is worthless
+SPECULATION_MAX_WAIT = 10.0
+# How long a matching question waits for a speculation still in flight
+# (before the session is locked)
+SERVE_WAIT = 30.0
+# Similarity at which a question counts as the suggested one
+MATCH_THRESHOLD = 0.92
+
+
+def _normalize(question: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9']+", question.lower()))
+
+
+def is_same_question(asked: str, suggested: str) -> bool:
+    """Whether two questions are identical up to case, punctuation and small edits."""
+    asked, suggested = _normalize(asked), _normalize(suggested)
+    if asked == suggested:
+        return True
+    return difflib.SequenceMatcher(None, asked, suggested).ratio() >= MATCH_THRESHOLD
+
+
+class Speculator:
+    """Per-session speculative answers to the suggested follow-up question."""
+
+    def __init__(
+        self,
+        session_manager: SessionManager,
+        max_workers: int = 2,
+        max_per_session: int = MAX_SPECULATIONS_PER_SESSION
+    ):
+        """
+        Args:
+            session_manager: Where sessions are loaded from
+            max_workers: Speculative calls in flight at once (0 disables speculation)
+            max_per_session: Speculative calls allowed per practice session
+        """
+        self.session_manager = session_manager
+        self.max_per_session = max_per_session
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculation")
+            if max_workers > 0 else None
+        )
+        self._lock = threading.Lock()
+        # session_id -> {"question", "base_turns", "future", "token"}
+        self._pending = {}
+        self._counts = {}
+        self._stats = {"started": 0, "hits": 0, "misses": 0, "cancelled": 0, "skipped": 0}
+
+    def schedule(self, session_id: str):
+        """
+        Start speculating on the session's latest suggested follow-up.
+
+        Does nothing while analysis is still pending for the session, when
+        the session's budget is used up, or when the scheduler has live or
+        analysis requests waiting.
+        """
+        if self._executor is None:
+            return
+        with self._lock:
+            if self._counts.get(session_id, 0) >= self.max_per_session:
+                self._stats["skipped"] += 1
+                return
+        queued = get_scheduler().queue_depth()
+        if queued["live"] or queued["analysis"]:
+            with self._lock:
+                self._stats["skipped"] += 1
+            return
+
+        with self.session_manager.session(session_id, save=False) as session:
+            analyzer = session.analyzer
+            latest = analyzer.last_analysis()
+            if analyzer.deferred or latest is None or not session.turns:
+                return
+            question = latest.get("follow_up_suggestion")
+            # Deep copy: the fork must not share state with the live session
+            state = copy.deepcopy(session.stakeholder.get_state())
+            # Cancelled on its own when discarded, or with the session's work
+            token = CancelToken(parent=get_token_registry().current(session_id))
+        if not isinstance(question, str) or not question.strip():
+            return
+
+        base_turns = len(state["turns"])
+        future = self._executor.submit(self._speculate, session_id, question, state, token)
+        with self._lock:
+            self._discard(self._pending.pop(session_id, None))
+            self._pending[session_id] = {
+                "question": question,
+                "base_turns": base_turns,
+                "future": future,
+                "token": token,
+            }
+            self._counts[session_id] = self._counts.get(session_id, 0) + 1
+            self._stats["started"] += 1
+
+    def _speculate(self, session_id: str, question: str, state: dict, token: CancelToken) -> tuple:
+        """Answer `question` on a forked stakeholder; returns (answer, state)."""
+        fork = StakeholderAgent(self.session_manager.api_key, session_id=session_id)
+        fork.load_state(state)
+        # Abandoned if discarded, or the session is reset or closed, meanwhile
+        with cancellation(token):
+            answer = fork.respond(question, priority=Priority.BACKGROUND, max_wait=SPECULATION_MAX_WAIT)
+        return answer, fork.get_state()
+
+    def _discard(self, entry: Optional[dict]):
+        """Cancel a speculation that will not be used (lock held)."""
+        if entry is None:
+            return
+        # Stops it waiting for quota if it has already started
+        entry["token"].cancel()
+        if entry["future"].cancel():
+            self._stats["cancelled"] += 1
+        else:
+            self._stats["misses"] += 1
+
+    def wait(self, session_id: str, question: str, timeout: float = SERVE_WAIT):
+        """
+        Wait for the session's speculation to finish, if it matches `question`.
+
+        Call this before locking the session, so that take() finds the
+        answer ready. Returns at once when there is nothing to wait for.
+
+        Args:
+            session_id: Session asking the question
+            question: The trainee's question
+            timeout: Most seconds to wait
+        """
+        with self._lock:
+            entry = self._pending.get(session_id)
+        if entry is not None and is_same_question(question, entry["question"]):
+            wait([entry["future"]], timeout=timeout)
+
+    def take(self, session_id: str, question: str, stakeholder: StakeholderAgent) -> Optional[str]:
+        """
+        Serve a question from the session's speculation, if it matches.
+
+        On a hit the forked state is loaded into `stakeholder`, exactly as
+        if it had answered the question itself. Any other question cancels
+        the speculation, as does a matching one whose answer is not ready
+        (see wait()).
+
+        Args:
+            session_id: Session asking the question
+            question: The trainee's question
+            stakeholder: The session's live stakeholder agent
+
+        Returns:
+            The prepared answer, or None if the question must be answered live
+        """
+        with self._lock:
+            entry = self._pending.pop(session_id, None)
+            if entry is None:
+                return None
+            if (
+                entry["base_turns"] != len(stakeholder.turns)
+                or not is_same_question(question, entry["question"])
+                or not entry["future"].done()
+            ):
+                self._discard(entry)
+                return None
+
+        try:
+            answer, state = entry["future"].result()
+        except Exception:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        # Show the question as the trainee worded it
+        state["turns"][-1][0] = question
+        stakeholder.load_state(state)
+        with self._lock:
+            self._stats["hits"] += 1
+        return answer
+
+    def reset(self, session_id: str):
+        """Cancel the session's speculation and restore its budget (new practice session)."""
+        with self._lock:
+            self._discard(self._pending.pop(session_id, None))
+            self._counts.pop(session_id, None)
+
+    def stats(self) -> dict:
+        """Counts of speculations started, served, wasted, cancelled and skipped."""
+        with self._lock:
+            stats = dict(self._stats)
+        served = stats["hits"] + stats["misses"] + stats["cancelled"]
+        stats["hit_rate"] = round(stats["hits"] / served, 3) if served else 0.0
+        return stats
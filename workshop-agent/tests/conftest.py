@@ -0,0 +1,103 @@
+"""
+Shared fixtures: a fake Gemini model, so tests make no network calls, and
+a clock tests can move by hand.
+
+Run from the workshop-agent directory with `python -m pytest`.
+"""
+
+import itertools
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llm import configure_scheduler  # noqa: E402
+
+ANALYSIS = {
+    "score": 4,
+    "coverage_areas": ["process_mapping"],
+    "strengths": "Asks about the current process",
+    "improvement": "Quantify it",
+    "follow_up_suggestion": "How many tickets a day?",
+    "tip": "Ask for numbers",
+}
+
+USE_CASE = {
+    "name": "Refund Assistant",
+    "brief_description": "An agent that handles refund requests",
+    "hidden_details": {"guardrails_needed": ["No refunds over $500 without approval"]},
+}
+
+
+class Clock:
+    """A time source that only moves when a test sets `now`."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """Answers JSON prompts with a use case or an analysis and chat with numbered replies."""
+
+    def __init__(self):
+        self.calls = []
+        self.replies = itertools.count()
+        # Called with the prompt before answering (to block or cancel mid-call)
+        self.hook = None
+        # What analysis prompts are answered with
+        self.analysis = ANALYSIS
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        self.calls.append(contents)
+        if self.hook:
+            self.hook(contents)
+        config = generation_config or {}
+        if isinstance(config, dict) and config.get("response_mime_type") == "application/json":
+            data = USE_CASE if "Generate a unique" in str(contents) else self.analysis
+            text = json.dumps(data)
+        else:
+            text = f"reply {next(self.replies)}"
+        if stream:
+            return [FakeResponse(text[i:i + 20]) for i in range(0, len(text), 20)]
+        return FakeResponse(text)
+
+
+class NamedModel:
+    """One model name served by a shared FakeModel (names keep coalescing keys apart)."""
+
+    def __init__(self, model: FakeModel, name: str):
+        self.model_name = name
+        self._model = model
+
+    def generate_content(self, *args, **kwargs):
+        return self._model.generate_content(*args, **kwargs)
+
+
+@pytest.fixture
+def clock() -> Clock:
+    """A Clock starting at 0, for components that take a `clock` argument."""
+    return Clock()
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Route every model call to one FakeModel, with quota that never runs out and no cached results."""
+    import llm.coalesce
+    import llm.router
+
+    model = FakeModel()
+    monkeypatch.setattr(llm.router, "get_model", lambda name, api_key: NamedModel(model, name))
+    monkeypatch.setattr(llm.coalesce, "_coalescer", llm.coalesce.Coalescer())
+    configure_scheduler(rpm=100_000, tpm=10 ** 9)
+    return model
@@ -0,0 +1,134 @@
+"""Background analysis: in-order completion and sessions reset mid-batch."""
+
+import threading
+
+import pytest
+
+import app
+from data import SAMPLE_USE_CASES
+from sessions import AnalysisWorker, new_session_id
+
+QUESTIONS = [
+    "What does the current process look like?",
+    "How many refunds come in each day?",
+    "Who approves refunds over the limit?",
+]
+
+
+@pytest.fixture
+def session_id(fake_model):
+    """A started practice session."""
+    session_id = new_session_id()
+    with app.session_manager.session(session_id) as session:
+        session.pending_use_case = SAMPLE_USE_CASES[0]
+        assert app._start_practice(session, "agent_owner")
+    yield session_id
+    app.end_browser_session(session_id)
+
+
+@pytest.fixture
+def worker():
+    """A worker that signals `drained` each time a session's queue empties."""
+    worker = AnalysisWorker(app.session_manager, max_workers=1, on_drained=lambda session_id: worker.drained.set())
+    worker.drained = threading.Event()
+    return worker
+
+
+def _defer(session_id: str, questions: list):
+    """Ask questions, leaving their analysis to the background worker."""
+    for question in questions:
+        with app.session_manager.session(session_id) as session:
+            app._run_turn(session, question, app.turn_key(session.turn_seq, question), defer=True)
+
+
+def _block_analysis(fake_model) -> tuple:
+    """Hold background analysis calls; returns (started, release) events."""
+    started, release = threading.Event(), threading.Event()
+
+    def hook(contents):
+        if threading.current_thread().name.startswith("analysis"):
+            started.set()
+            release.wait(5)
+
+    fake_model.hook = hook
+    return started, release
+
+
+def test_deferred_questions_are_scored_in_order(session_id, worker, fake_model):
+    recorded = []
+    complete = app.AnalyzerAgent.complete_deferred
+
+    def track(analyzer, entry_id, analysis):
+        turn = analyzer.deferred[0]["turn"] if analyzer.deferred else None
+        done = complete(analyzer, entry_id, analysis)
+        if done:
+            recorded.append(turn)
+        return done
+
+    _defer(session_id, QUESTIONS)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(app.AnalyzerAgent, "complete_deferred", track)
+        assert worker.is_pending(session_id) is False
+        worker.submit(session_id)
+        assert worker.drained.wait(5)
+
+    assert recorded == sorted(recorded) and len(recorded) == len(QUESTIONS)
+    assert worker.version(session_id) == len(QUESTIONS)
+    assert not worker.is_pending(session_id)
+    with app.session_manager.session(session_id, save=False) as session:
+        assert session.analyzer.deferred == []
+        assert [turn.question for turn in session.turns if turn.analysis] == QUESTIONS
+
+
+def test_questions_asked_while_draining_get_another_pass(session_id, worker, fake_model):
+    started, release = _block_analysis(fake_model)
+    _defer(session_id, QUESTIONS[:1])
+    worker.submit(session_id)
+    assert started.wait(5)
+
+    _defer(session_id, QUESTIONS[1:])
+    worker.submit(session_id)
+    release.set()
+    assert worker.drained.wait(5)
+
+    assert worker.version(session_id) == len(QUESTIONS)
+    with app.session_manager.session(session_id, save=False) as session:
+        assert session.analyzer.deferred == []
+
+
+def test_session_restarted_mid_batch_gets_no_stale_results(session_id, worker, fake_model):
+    started, release = _block_analysis(fake_model)
+    _defer(session_id, QUESTIONS)
+    worker.submit(session_id)
+    assert started.wait(5)
+
+    app.session_tokens.renew(session_id)
+    with app.session_manager.session(session_id) as session:
+        assert app._start_practice(session, "agent_owner")
+    release.set()
+    assert worker.drained.wait(5)
+
+    assert worker.version(session_id) == 0
+    with app.session_manager.session(session_id, save=False) as session:
+        assert session.analyzer.deferred == []
+        assert all(turn.analysis is None for turn in session.turns)
+        assert sum(session.analyzer.coverage_tracker.values()) == 0
+
+
+def test_results_for_reset_questions_are_ignored(session_id, worker, fake_model):
+    started, release = _block_analysis(fake_model)
+    _defer(session_id, QUESTIONS[:2])
+    worker.submit(session_id)
+    assert started.wait(5)
+
+    # Reset without cancelling: the queue is replaced under the batch in flight
+    with app.session_manager.session(session_id) as session:
+        session.analyzer.reset()
+    _defer(session_id, QUESTIONS[2:])
+    fake_model.hook = None
+    release.set()
+    assert worker.drained.wait(5)
+
+    with app.session_manager.session(session_id, save=False) as session:
+        analyzed = [turn.question for turn in session.turns if turn.analysis]
+    assert analyzed == QUESTIONS[2:]
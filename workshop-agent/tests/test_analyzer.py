@@ -0,0 +1,64 @@
+"""Question analysis: validation, escalation and the heuristic fallback."""
+
+import json
+
+from agents.analyzer import AnalyzerAgent, _parse_batch
+from conftest import ANALYSIS
+
+CONTEXT = [{"role": "stakeholder", "content": "I run the support desk.", "turn": 0}]
+QUESTION = "How many refund requests come in each day?"
+
+
+def test_good_analysis_is_kept(fake_model):
+    analysis = AnalyzerAgent(None).request_analysis(QUESTION, "About 300.", CONTEXT)
+    assert analysis["score"] == 4
+    assert "degraded" not in analysis
+    assert len(fake_model.calls) == 1
+
+
+def test_malformed_analysis_on_every_tier_is_scored_locally(fake_model):
+    fake_model.analysis = dict(ANALYSIS, score="4")
+    analysis = AnalyzerAgent(None).request_analysis(QUESTION, "About 300.", CONTEXT)
+
+    # Escalated once, then fell back to the heuristic
+    assert len(fake_model.calls) == 2
+    assert analysis["degraded"] is True
+    assert isinstance(analysis["score"], int) and 1 <= analysis["score"] <= 5
+
+
+def test_low_confidence_on_the_last_tier_is_still_kept(fake_model):
+    fake_model.analysis = dict(ANALYSIS, confidence=0.2)
+    analysis = AnalyzerAgent(None).request_analysis(QUESTION, "About 300.", CONTEXT)
+    assert len(fake_model.calls) == 2
+    assert analysis["score"] == 4
+    assert "degraded" not in analysis
+
+
+def _item(score: int, **fields) -> dict:
+    return dict(ANALYSIS, score=score, **fields)
+
+
+def test_parse_batch_fans_out_by_index():
+    text = json.dumps([_item(2, index=2), _item(1, index=1), _item(3, index=3)])
+    assert [analysis["score"] for analysis in _parse_batch(text, 3)] == [1, 2, 3]
+
+
+def test_parse_batch_defaults_to_position_and_accepts_string_indexes():
+    text = json.dumps([_item(1), _item(2, index="3")])
+    analyses = _parse_batch(text, 3)
+    assert analyses[0]["score"] == 1
+    assert analyses[1] is None
+    assert analyses[2]["score"] == 2
+    assert "index" not in analyses[2]
+
+
+def test_parse_batch_accepts_a_wrapper_or_a_bare_object():
+    assert _parse_batch(json.dumps({"analyses": [_item(4)]}), 1)[0]["score"] == 4
+    assert _parse_batch(json.dumps(_item(5)), 1)[0]["score"] == 5
+
+
+def test_parse_batch_drops_malformed_items():
+    text = json.dumps([_item(1), "not an analysis", _item(3, index="three"), _item(4, index=9), _item(5, index=1)])
+    assert _parse_batch(text, 3) == [_item(1), None, None]
+    assert _parse_batch("not json", 2) == [None, None]
+    assert _parse_batch("42", 2) == [None, None]
@@ -0,0 +1,98 @@
+"""The headless JSON API."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+
+
+@pytest.fixture
+def client(fake_model, monkeypatch):
+    monkeypatch.setattr(app, "ANALYSIS_MODE", "inline")
+    api = TestClient(app.create_api())
+    session_id = api.post("/sessions").json()["session_id"]
+    api.session_id = session_id
+    return api
+
+
+def _start(client) -> str:
+    session_id = client.session_id
+    use_case = client.post(f"/sessions/{session_id}/use-case", json={"role": "agent_owner"}).json()["use_case"]
+    assert use_case == {"name": "Refund Assistant", "brief_description": "An agent that handles refund requests"}
+    started = client.post(f"/sessions/{session_id}/start", json={"role": "agent_owner"}).json()
+    assert started["turn"] == 0
+    return session_id
+
+
+def test_question_needs_a_started_session(client):
+    response = client.post(f"/sessions/{client.session_id}/questions", json={"question": "Hi?", "seen_turn": 0})
+    assert response.status_code == 409
+
+
+def test_seen_turn_is_required(client):
+    session_id = _start(client)
+    response = client.post(f"/sessions/{session_id}/questions", json={"question": "How many refunds a day?"})
+    assert response.status_code == 422
+
+
+def test_retried_question_is_answered_once(client, fake_model):
+    session_id = _start(client)
+    body = {"question": "How many refunds a day?", "seen_turn": 0}
+    first = client.post(f"/sessions/{session_id}/questions", json=body).json()
+    calls = len(fake_model.calls)
+    retry = client.post(f"/sessions/{session_id}/questions", json=body).json()
+
+    assert first["turn"] == 1 and not first["replayed"]
+    assert first["analysis"]["score"] == 4
+    assert retry["replayed"] and retry["turn"] == 1 and retry["answer"] == first["answer"]
+    assert len(fake_model.calls) == calls
+
+    again = client.post(f"/sessions/{session_id}/questions", json=dict(body, seen_turn=1)).json()
+    assert not again["replayed"] and again["turn"] == 2
+    assert client.get(f"/sessions/{session_id}/progress").json()["questions"] == 2
+
+
+def test_stream_sends_answer_then_analysis(client):
+    session_id = _start(client)
+    body = {"question": "Why do refunds fail?", "seen_turn": 0}
+    with client.stream("POST", f"/sessions/{session_id}/questions/stream", json=body) as response:
+        events = [line[len("event: "):] for line in response.iter_lines() if line.startswith("event: ")]
+    assert events == ["answer", "analysis", "done"]
+
+
+def test_hidden_details_are_not_returned(client):
+    session_id = _start(client)
+    assert "hidden_details" not in str(client.get(f"/sessions/{session_id}").json())
+
+
+def test_created_session_is_stored(client):
+    response = client.get(f"/sessions/{client.session_id}")
+    assert response.status_code == 200
+    assert response.json()["started"] is False
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("get", "", None),
+    ("delete", "", None),
+    ("post", "/use-case", {"role": "agent_owner"}),
+    ("post", "/start", {"role": "agent_owner"}),
+    ("post", "/questions", {"question": "Hi?", "seen_turn": 0}),
+    ("post", "/questions/stream", {"question": "Hi?", "seen_turn": 0}),
+    ("get", "/progress", None),
+    ("post", "/summary", None),
+])
+def test_unknown_session_is_not_found(client, fake_model, method, path, body):
+    session_id = app.new_session_id()
+    kwargs = {"json": body} if body is not None else {}
+
+    response = getattr(client, method)(f"/sessions/{session_id}{path}", **kwargs)
+
+    assert response.status_code == 404
+    assert fake_model.calls == []
+    assert app.session_manager.backend.load(session_id) is None
+    assert session_id not in app.session_tokens._tokens
+
+
+def test_deleted_session_is_gone(client):
+    assert client.delete(f"/sessions/{client.session_id}").status_code == 204
+    assert client.get(f"/sessions/{client.session_id}").status_code == 404
@@ -0,0 +1,124 @@
+"""Session backends: copies, hibernation and restore."""
+
+import os
+import threading
+
+import pytest
+
+from sessions import SessionBusyError, SessionManager, backends
+from sessions.backends import MemoryBackend, SQLiteBackend
+
+
+def _hibernating(tmp_path, clock) -> MemoryBackend:
+    return MemoryBackend(hibernate_after=10, hibernate_dir=str(tmp_path / "snapshots"), clock=clock)
+
+
+def test_nothing_starts_until_start(tmp_path, clock):
+    threads = threading.active_count()
+    backend = _hibernating(tmp_path, clock)
+    assert threading.active_count() == threads
+    assert not os.path.exists(backend.hibernate_dir)
+    assert MemoryBackend(hibernate_after=10).hibernate_dir is None
+
+
+def test_idle_sessions_hibernate_and_restore(tmp_path, clock):
+    backend = _hibernating(tmp_path, clock)
+    backend.save("idle", {"turns": [["q", "a " * 500, None]]})
+    backend.save("busy", {"turns": []})
+    clock.now = 5
+    backend.load("busy")
+    clock.now = 12
+
+    assert backend.hibernate_idle() == 1
+    stats = backend.stats()
+    assert stats["resident"] == 1 and stats["hibernated"] == 1
+    assert 0 < stats["hibernated_bytes"] < 1000
+    assert len(os.listdir(backend.hibernate_dir)) == 1
+
+    assert backend.load("idle") == {"turns": [["q", "a " * 500, None]]}
+    assert backend.stats()["rehydrations"] == 1
+    assert os.listdir(backend.hibernate_dir) == []
+
+
+def test_saving_a_hibernated_session_replaces_its_snapshot(tmp_path, clock):
+    backend = _hibernating(tmp_path, clock)
+    backend.save("s", {"v": 1})
+    clock.now = 20
+    backend.hibernate_idle()
+    backend.save("s", {"v": 2})
+    assert os.listdir(backend.hibernate_dir) == []
+    assert backend.load("s") == {"v": 2}
+
+
+def test_damaged_snapshot_starts_the_session_over(tmp_path, clock):
+    backend = _hibernating(tmp_path, clock)
+    backend.save("s", {"v": 1})
+    clock.now = 20
+    backend.hibernate_idle()
+    with open(backend._path("s"), "wb") as f:
+        f.write(b"not zlib")
+    assert backend.load("s") is None
+    assert backend.stats()["hibernated"] == 0
+
+
+def test_session_used_while_being_written_stays_resident(tmp_path, monkeypatch, clock):
+    backend = _hibernating(tmp_path, clock)
+    backend.save("s", {"v": 1})
+    clock.now = 20
+    compress = backends.zlib.compress
+
+    def compress_during_request(data):
+        backend.save("s", {"v": 2})
+        return compress(data)
+
+    monkeypatch.setattr(backends.zlib, "compress", compress_during_request)
+    assert backend.hibernate_idle() == 0
+    assert backend.stats()["resident"] == 1
+    assert os.listdir(backend.hibernate_dir) == []
+    assert backend.load("s") == {"v": 2}
+
+
+def test_sqlite_backend_round_trip(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "sessions.db"))
+    backend.save("s", {"turns": [["q", "a", {"score": 3}]]})
+    assert backend.load("s") == {"turns": [["q", "a", {"score": 3}]]}
+    backend.delete("s")
+    assert backend.load("s") is None
+
+
+def test_sqlite_lock_excludes_other_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(backends, "LOCK_WAIT", 0.1)
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    with first.lock("s"):
+        with pytest.raises(SessionBusyError):
+            with second.lock("s"):
+                pass
+        with second.lock("other"):
+            pass
+    with second.lock("s"):
+        pass
+
+
+def test_sqlite_lock_expired_lease_is_taken_over(tmp_path, monkeypatch):
+    monkeypatch.setattr(backends, "LOCK_WAIT", 0.1)
+    monkeypatch.setattr(backends, "LOCK_LEASE", -1.0)
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    with first.lock("s"):
+        # The holder died mid-request: its lease has run out
+        with second.lock("s"):
+            pass
+
+
+def test_manager_holds_backend_lock_only_when_saving(tmp_path, monkeypatch):
+    monkeypatch.setattr(backends, "LOCK_WAIT", 0.1)
+    path = str(tmp_path / "sessions.db")
+    manager, other = SessionManager(SQLiteBackend(path), "test-key"), SQLiteBackend(path)
+    with manager.session("s"):
+        with pytest.raises(SessionBusyError):
+            with other.lock("s"):
+                pass
+    with manager.session("s", save=False):
+        with other.lock("s"):
+            pass
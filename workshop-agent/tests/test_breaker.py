@@ -0,0 +1,109 @@
+"""Circuit breakers and how the router reports to them."""
+
+import pytest
+
+from llm import CircuitOpenError, RateLimitedError
+from llm.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from llm.router import ModelRouter
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False)
+    breaker.record(True)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_quota_waits_do_not_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, clock=clock)
+    for _ in range(5):
+        breaker.record(None)
+    assert breaker.state == CLOSED
+
+
+def test_single_probe_after_cool_down(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record(False)
+    clock.now = 31
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record(False)
+    assert breaker.state == OPEN
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+class Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class BrokenStreamModel:
+    """Streams one chunk, then fails."""
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        def chunks():
+            yield Chunk("{")
+            raise ConnectionError("stream reset")
+        return chunks()
+
+
+@pytest.fixture
+def router(fake_model, monkeypatch):
+    import llm.router
+
+    model = BrokenStreamModel()
+    monkeypatch.setattr(llm.router, "get_model", lambda name, api_key: model)
+    return ModelRouter()
+
+
+def test_stream_failing_part_way_counts_as_a_failure(router):
+    breaker = router.breaker("use_case", "strong")
+    breaker.failure_threshold = 2
+    for attempt in range(2):
+        response = router.generate("strong", None, f"prompt {attempt}", site="use_case", stream=True)
+        with pytest.raises(ConnectionError):
+            list(response)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        router.generate("strong", None, "prompt", site="use_case", stream=True)
+
+
+def test_abandoned_stream_releases_the_probe(router, fake_model, monkeypatch):
+    import llm.router
+
+    monkeypatch.setattr(llm.router, "get_model", lambda name, api_key: fake_model)
+    breaker = router.breaker("use_case", "strong")
+    breaker.failure_threshold = 1
+    breaker.reset_timeout = 0
+    breaker.record(False)
+    response = router.generate("strong", None, "Generate a unique use case", site="use_case", stream=True)
+    next(response)
+    response.close()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_rate_limited_calls_leave_the_breaker_closed(router, monkeypatch):
+    import llm.router
+
+    def no_quota(*args, **kwargs):
+        raise RateLimitedError("no quota")
+
+    monkeypatch.setattr(llm.router, "generate", no_quota)
+    for _ in range(10):
+        with pytest.raises(RateLimitedError):
+            router.generate("strong", None, "prompt", site="stakeholder", priority=llm.router.Priority.BACKGROUND)
+    assert router.breaker("stakeholder", "strong").state == CLOSED
@@ -0,0 +1,30 @@
+"""Token accounting and budgets."""
+
+from llm.budget import COHORT_WINDOW, OVER_BUDGET_SHARE, TokenBudget
+
+
+def test_allowance_shrinks_once_a_session_is_over_budget(clock):
+    budget = TokenBudget(session_tokens=1000, clock=clock)
+    assert budget.allowance("s", 4000) == 4000
+    budget.record("s", 900, 200)
+    assert budget.exceeded("s")
+    assert not budget.exceeded("other")
+    assert budget.allowance("s", 4000) == int(4000 * OVER_BUDGET_SHARE)
+    assert budget.usage("s") == {"prompt_tokens": 900, "output_tokens": 200, "calls": 1}
+
+
+def test_cohort_budget_rolls_over(clock):
+    budget = TokenBudget(session_tokens=0, cohort_tokens=1000, clock=clock)
+    budget.record("a", 600, 0)
+    budget.record("b", 600, 0)
+    assert budget.exceeded("c")
+    clock.now = COHORT_WINDOW + 3600
+    assert not budget.exceeded("c")
+
+
+def test_billed_counts_calibrate_estimates(clock):
+    budget = TokenBudget(clock=clock)
+    for _ in range(200):
+        budget.record(None, 2000, 0, estimated_prompt=1000)
+    assert budget.stats()["estimate_ratio"] > 1.9
+    assert budget.allowance("s", 4000) < 2200
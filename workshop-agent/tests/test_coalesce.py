@@ -0,0 +1,141 @@
+"""Request coalescing: single-flight, the result cache and shared streams."""
+
+import threading
+import time
+
+import pytest
+
+from llm import RequestCancelledError
+from llm.coalesce import Coalescer, ResultCache, SingleFlight
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {result for result, _ in results} == {"result"}
+
+
+def test_single_flight_propagates_errors_and_forgets_the_call():
+    flight = SingleFlight()
+
+    def boom():
+        raise ValueError("upstream failed")
+
+    with pytest.raises(ValueError):
+        flight.do("k", boom)
+    assert flight.do("k", lambda: 1) == (1, False)
+
+
+def test_result_cache_expires_and_evicts(clock):
+    cache = ResultCache(size=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    clock.now = 11
+    assert cache.get("a") is None
+
+
+def test_coalescer_caches_results():
+    coalescer = Coalescer()
+    calls = []
+    for _ in range(3):
+        assert coalescer.call("k", lambda: calls.append(1) or "result") == "result"
+    assert len(calls) == 1
+    assert coalescer.stats() == {"calls": 1, "cache_hits": 2, "coalesced": 0}
+
+
+def test_stream_is_replayed_to_joiners_and_cached():
+    coalescer = Coalescer()
+    started = []
+
+    def upstream():
+        started.append(1)
+        return iter(["a", "b", "c"])
+
+    leader = coalescer.stream("k", upstream)
+    assert next(leader) == "a"
+
+    joined = []
+    joiner = threading.Thread(target=lambda: joined.extend(coalescer.stream("k", upstream)))
+    joiner.start()
+    time.sleep(0.1)
+    assert joined == []
+    assert list(leader) == ["b", "c"]
+    joiner.join(5)
+
+    assert joined == ["a", "b", "c"]
+    assert list(coalescer.stream("k", upstream)) == ["a", "b", "c"]
+    assert len(started) == 1
+    assert coalescer.stats() == {"calls": 1, "cache_hits": 1, "coalesced": 1}
+
+
+def test_abandoned_stream_is_not_cached():
+    coalescer = Coalescer()
+    leader = coalescer.stream("k", lambda: iter(["a", "b"]))
+    next(leader)
+
+    errors = []
+
+    def join():
+        try:
+            list(coalescer.stream("k", lambda: iter(["x"])))
+        except RequestCancelledError as e:
+            errors.append(e)
+
+    joiner = threading.Thread(target=join)
+    joiner.start()
+    time.sleep(0.1)
+    leader.close()
+    joiner.join(5)
+
+    assert len(errors) == 1
+    assert list(coalescer.stream("k", lambda: iter(["x"]))) == ["x"]
+
+
+def test_generate_coalesces_streamed_calls(fake_model):
+    from llm import generate
+
+    prompt = "Generate a unique use case for coalescing"
+    config = {"response_mime_type": "application/json"}
+    first = "".join(chunk.text for chunk in generate(fake_model, prompt, generation_config=config, stream=True))
+    second = "".join(chunk.text for chunk in generate(fake_model, prompt, generation_config=config, stream=True))
+    assert first == second
+    assert fake_model.calls.count(prompt) == 1
+
+
+def test_use_case_generation_is_shared_per_role(fake_model):
+    from agents.stakeholder import StakeholderAgent
+
+    def generate_use_case(session_id, role):
+        *_, use_case = StakeholderAgent("test-key", session_id=session_id).stream_use_case(role)
+        return use_case
+
+    # Each call builds a fresh prompt with its own random seed
+    first = generate_use_case("a", "agent_owner")
+    second = generate_use_case("b", "agent_owner")
+    assert first == second
+    assert len(fake_model.calls) == 1
+
+    generate_use_case("c", "business_owner")
+    assert len(fake_model.calls) == 2
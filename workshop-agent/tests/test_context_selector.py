@@ -0,0 +1,31 @@
+"""Choosing the earlier conversation sent with an analyzed question."""
+
+from agents.context_selector import prior_exchanges, select_context
+
+
+def _conversation(topics: list) -> list:
+    messages = [{"role": "stakeholder", "content": "Hi, I run the support desk.", "turn": 0}]
+    for number, topic in enumerate(topics, 1):
+        messages.append({"role": "practitioner", "content": f"Tell me about {topic}?", "turn": number})
+        messages.append({"role": "stakeholder", "content": f"{topic} " * 20, "turn": number})
+    return messages
+
+
+def test_question_being_analyzed_is_left_out():
+    conversation = _conversation(["billing", "refunds"])
+    exchanges = prior_exchanges(conversation, "Tell me about refunds?")
+    assert [exchange[0]["turn"] for exchange in exchanges] == [0, 1]
+
+
+def test_everything_is_kept_when_it_fits():
+    conversation = _conversation(["billing", "refunds"])
+    assert len(select_context(conversation, "What else?", budget=10_000)) == len(conversation)
+
+
+def test_relevant_old_turn_beats_recent_irrelevant_ones():
+    conversation = _conversation(["escalations", "billing", "weather", "parking", "lunch"])
+    selected = select_context(conversation, "Going back to escalations, who approves them?", budget=150)
+    turns = {entry["turn"] for entry in selected}
+    assert 1 in turns
+    assert 5 in turns
+    assert 3 not in turns
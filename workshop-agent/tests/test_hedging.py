@@ -0,0 +1,69 @@
+"""Request hedging."""
+
+import threading
+import time
+
+from llm.hedging import MIN_SAMPLES, Hedger
+
+SITE = ("stakeholder", "strong")
+
+
+def _warmed(latency: float = 0.01, **kwargs) -> Hedger:
+    hedger = Hedger(percentile=0.5, budget=1.0, **kwargs)
+    with hedger._lock:
+        hedger._latencies[SITE].extend([latency] * MIN_SAMPLES)
+    return hedger
+
+
+def test_fast_calls_are_not_hedged():
+    hedger = _warmed()
+    backups = []
+    assert hedger.call(SITE, lambda: "primary", lambda: backups.append(1)) == "primary"
+    assert backups == []
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_slow_call_is_hedged_and_backup_latency_is_not_recorded():
+    hedger = _warmed()
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "primary"
+
+    assert hedger.call(SITE, slow, lambda: "backup") == "backup"
+    stats = hedger.stats()
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    # Only the warm-up samples so far: the backup's latency was not recorded
+    assert stats["sites"]["stakeholder/strong"]["samples"] == MIN_SAMPLES
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while hedger.stats()["sites"]["stakeholder/strong"]["samples"] == MIN_SAMPLES and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert hedger.stats()["sites"]["stakeholder/strong"]["samples"] == MIN_SAMPLES + 1
+
+
+def test_backups_are_skipped_when_no_worker_is_free():
+    hedger = _warmed(max_workers=1)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "primary"
+
+    def stuck_backup():
+        release.wait(5)
+        return "backup"
+
+    first = threading.Thread(target=lambda: hedger.call(SITE, slow, stuck_backup))
+    first.start()
+    deadline = time.monotonic() + 5
+    while hedger.stats()["hedged"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert hedger.call(SITE, lambda: time.sleep(0.2) or "primary", stuck_backup) == "primary"
+    assert hedger.stats()["no_capacity"] == 1
+    release.set()
+    first.join(5)
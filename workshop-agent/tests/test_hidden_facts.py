@@ -0,0 +1,123 @@
+"""Hidden-detail retrieval and disclosure matching."""
+
+import pytest
+
+from prompts.hidden_facts import MAX_DISCLOSED_CONTEXT, FactIndex, extract_facts, select_facts
+
+USE_CASE = {
+    "name": "Refund Assistant",
+    "hidden_details": {
+        "current_process": {
+            "steps": ["Agents copy refund requests from email into SAP by hand"],
+            "pain_points": ["Refunds take 5 days to approve"],
+            "volume": "1200 refund requests a week",
+        },
+        "guardrails_needed": ["No refunds over $500 without manager approval"],
+        "stakeholder_concerns": {
+            "agent_owner": {"fear": "Agents fear losing their jobs"},
+            "business_owner": {"budget": "Budget is capped at 200k"},
+        },
+        "success_metrics": {"baseline": {"approval_time": "5 days"}, "targets": {"approval_time": "1 day"}},
+    },
+}
+
+
+@pytest.fixture
+def index() -> FactIndex:
+    return FactIndex(extract_facts(USE_CASE, "agent_owner"))
+
+
+def test_facts_cover_only_the_roles_concerns(index):
+    texts = [fact["text"] for fact in index.facts]
+    assert "[Your Concerns / Your Fear] Agents fear losing their jobs" in texts
+    assert not any("Budget" in text for text in texts)
+    assert "[Success Metrics / Approval Time] currently 5 days, target 1 day" in texts
+
+
+@pytest.mark.parametrize("question, best", [
+    ("How many refund requests do you get each week?", "current_process:2"),
+    ("Is it copied by hand from email into SAP?", "current_process:0"),
+    ("What approval does a large refund over $500 need from a manager?", "guardrails_needed:3"),
+    ("Are your agents worried about their jobs?", "stakeholder_concerns:4"),
+])
+def test_search_ranks_the_relevant_fact_first(index, question, best):
+    assert index.search(question)[0] == best
+
+
+def test_search_without_matching_words_finds_nothing(index):
+    assert index.search("Hello there!") == []
+
+
+def test_search_returns_at_most_k(index):
+    assert len(index.search("refund requests approve days", k=2)) == 2
+
+
+def test_select_facts_carries_disclosed_facts_in_document_order(index):
+    facts, new_ids = select_facts(index, "How many refund requests do you get each week?", ["stakeholder_concerns:4"])
+
+    ids = [fact["id"] for fact in facts]
+    assert "stakeholder_concerns:4" in ids
+    assert "current_process:2" in new_ids
+    assert "stakeholder_concerns:4" not in new_ids
+    assert ids == sorted(ids, key=[fact["id"] for fact in index.facts].index)
+
+
+def test_select_facts_caps_carried_facts():
+    facts = [{"id": f"s:{i}", "section": "s", "text": f"fact number{i}", "body": f"number{i}"} for i in range(30)]
+    index = FactIndex(facts)
+    disclosed = [fact["id"] for fact in facts]
+
+    selected, new_ids = select_facts(index, "Hello there!", disclosed)
+
+    assert new_ids == []
+    # The most recently disclosed are kept
+    assert [fact["id"] for fact in selected] == disclosed[-MAX_DISCLOSED_CONTEXT:]
+
+
+def test_retrieval_mode_sends_only_relevant_facts(fake_model, monkeypatch):
+    from agents import stakeholder
+
+    monkeypatch.setitem(stakeholder._context, "mode", "retrieval")
+    agent = stakeholder.StakeholderAgent("test-key", session_id="retrieval")
+    agent.start_session("agent_owner", use_case=dict(USE_CASE, brief_description="Handles refunds"))
+    assert "1200 refund requests" not in str(fake_model.calls[-1])
+
+    agent.respond("How many refund requests do you get each week?")
+
+    sent = str(fake_model.calls[-1])
+    assert "1200 refund requests a week" in sent
+    assert "Agents fear losing their jobs" not in sent
+
+
+@pytest.mark.parametrize("reply, revealed", [
+    ("We get about 1200 refund requests a week.", ["current_process:2"]),
+    # The fact's number must be in the reply
+    ("We get thousands of refund requests a week.", []),
+    ("Refunds are a pain.", []),
+    (
+        "Honestly, agents are afraid of losing their jobs, and approvals take 5 days for refunds.",
+        ["current_process:1", "stakeholder_concerns:4"],
+    ),
+])
+def test_match_revealed(index, reply, revealed):
+    assert index.match_revealed(reply, set()) == revealed
+
+
+def test_match_revealed_skips_facts_already_revealed(index):
+    reply = "We get about 1200 refund requests a week and they take 5 days to approve."
+    assert index.match_revealed(reply, {"current_process:2"}) == ["current_process:1"]
+
+
+def test_stakeholder_tracks_disclosure_per_area(fake_model):
+    from agents.stakeholder import StakeholderAgent
+
+    agent = StakeholderAgent("test-key", session_id="disclosure")
+    agent.start_session("agent_owner", use_case=dict(USE_CASE, brief_description="Handles refunds"))
+
+    assert agent._track_revealed("We get about 1200 refund requests a week.") == ["1200 refund requests a week"]
+    assert agent._track_revealed("Yes, 1200 refund requests a week.") == []
+
+    status = agent.get_disclosure_status()
+    assert status["current_process"] == {"revealed": 1, "total": 3}
+    assert status["guardrails_needed"] == {"revealed": 0, "total": 1}
+    assert agent.get_revealed_facts() == ["[Current Process / Volume] 1200 refund requests a week"]
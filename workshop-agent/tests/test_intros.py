@@ -0,0 +1,73 @@
+"""Cached and prefetched stakeholder introductions."""
+
+import threading
+import uuid
+
+import pytest
+
+from agents.stakeholder import StakeholderAgent, get_cached_intro, prefetch_intro
+
+
+@pytest.fixture
+def use_case() -> dict:
+    """A use case no other test has introduced."""
+    return {
+        "name": f"Refund Assistant {uuid.uuid4().hex[:8]}",
+        "brief_description": "An agent that handles refund requests",
+        "hidden_details": {"guardrails_needed": ["No refunds over $500 without approval"]},
+    }
+
+
+def _start(use_case: dict, role: str = "agent_owner") -> str:
+    return StakeholderAgent("test-key", session_id="intro").start_session(role, use_case=use_case)
+
+
+def test_prefetched_intro_starts_the_session_without_a_call(fake_model, use_case):
+    prefetch_intro("test-key", "agent_owner", use_case).join(5)
+    calls = len(fake_model.calls)
+
+    intro = _start(use_case)
+
+    assert intro == get_cached_intro("agent_owner", use_case)
+    assert len(fake_model.calls) == calls
+
+
+def test_intros_are_cached_per_role(fake_model, use_case):
+    first = _start(use_case)
+    calls = len(fake_model.calls)
+
+    assert _start(use_case) == first
+    assert len(fake_model.calls) == calls
+    _start(use_case, role="business_owner")
+    assert len(fake_model.calls) == calls + 1
+
+
+def test_prefetch_runs_once(fake_model, use_case):
+    release = threading.Event()
+    fake_model.hook = lambda contents: release.wait(5)
+    thread = prefetch_intro("test-key", "agent_owner", use_case)
+
+    assert prefetch_intro("test-key", "agent_owner", use_case) is None
+    release.set()
+    thread.join(5)
+    assert prefetch_intro("test-key", "agent_owner", use_case) is None
+    assert len(fake_model.calls) == 1
+
+
+def test_start_waits_for_a_prefetch_in_flight(fake_model, use_case):
+    started, release = threading.Event(), threading.Event()
+
+    def hook(contents):
+        if threading.current_thread().name == "intro-prefetch":
+            started.set()
+            release.wait(5)
+
+    fake_model.hook = hook
+    prefetch_intro("test-key", "agent_owner", use_case)
+    assert started.wait(5)
+    threading.Timer(0.05, release.set).start()
+
+    intro = _start(use_case)
+
+    assert intro == get_cached_intro("agent_owner", use_case)
+    assert len(fake_model.calls) == 1
@@ -0,0 +1,57 @@
+"""Parsing streamed and truncated JSON."""
+
+import json
+
+import pytest
+
+from llm.partial_json import PartialJSONParser
+
+DOCUMENT = {
+    "name": "Refund Assistant",
+    "brief_description": "Handles refunds \"end to end\"\nfor support",
+    "hidden_details": {"volume": 1200, "guardrails_needed": ["No refunds over $500", "Escalate fraud"], "live": True},
+}
+
+
+def _fed(text: str, chunk: int = 7) -> PartialJSONParser:
+    parser = PartialJSONParser()
+    for i in range(0, len(text), chunk):
+        parser.feed(text[i:i + chunk])
+    return parser
+
+
+def test_whole_document_in_chunks():
+    parser = _fed("```json\n" + json.dumps(DOCUMENT) + "\n```")
+    assert parser.complete
+    assert parser.snapshot() == DOCUMENT
+
+
+@pytest.mark.parametrize("cut", range(1, len(json.dumps(DOCUMENT))))
+def test_every_prefix_gives_a_partial_value(cut):
+    text = json.dumps(DOCUMENT)
+    snapshot = _fed(text[:cut]).snapshot()
+    if snapshot is None:
+        return
+    assert isinstance(snapshot, dict)
+    for key, value in snapshot.items():
+        assert key in DOCUMENT
+        if isinstance(value, str):
+            assert DOCUMENT[key].startswith(value)
+
+
+def test_open_string_value_is_kept():
+    snapshot = _fed('{"name": "Refund Assis').snapshot()
+    assert snapshot == {"name": "Refund Assis"}
+
+
+def test_dangling_key_and_partial_literal_are_dropped():
+    assert _fed('{"name": "A", "brief').snapshot() == {"name": "A"}
+    assert _fed('{"name": "A", "live": tr').snapshot() == {"name": "A"}
+
+
+def test_partial_escape_is_dropped():
+    assert _fed('{"name": "A\\u00').snapshot() == {"name": "A"}
+
+
+def test_nothing_before_the_document_starts():
+    assert _fed("Here is the use case:").snapshot() is None
@@ -0,0 +1,58 @@
+"""Stakeholder prompt caching."""
+
+import copy
+import json
+
+from data import SAMPLE_USE_CASES
+from prompts import get_stakeholder_prompt, stakeholder_prompts, use_case_fingerprint
+from prompts.hidden_facts import get_fact_index
+
+
+def _count_hashes(monkeypatch) -> list:
+    calls = []
+    content_hash = stakeholder_prompts._content_hash
+    monkeypatch.setattr(stakeholder_prompts, "_content_hash", lambda use_case: calls.append(1) or content_hash(use_case))
+    return calls
+
+
+def _unstamped(use_case: dict) -> dict:
+    """A copy of a use case without the fingerprint other tests may have stored in it."""
+    use_case = copy.deepcopy(use_case)
+    use_case.pop(stakeholder_prompts.FINGERPRINT_FIELD, None)
+    return use_case
+
+
+def test_fingerprint_depends_on_content_only():
+    use_case = _unstamped(SAMPLE_USE_CASES[0])
+    changed = dict(_unstamped(use_case), name="Another name")
+    assert use_case_fingerprint(use_case) == use_case_fingerprint(copy.deepcopy(SAMPLE_USE_CASES[0]))
+    assert use_case_fingerprint(use_case) != use_case_fingerprint(changed)
+
+
+def test_fingerprint_survives_a_round_trip(monkeypatch):
+    use_case = _unstamped(SAMPLE_USE_CASES[1])
+    fingerprint = use_case_fingerprint(use_case)
+    calls = _count_hashes(monkeypatch)
+
+    # As a session backend stores and loads it
+    loaded = json.loads(json.dumps(use_case))
+    assert use_case_fingerprint(loaded) == fingerprint
+    get_stakeholder_prompt("agent_owner", loaded)
+    get_fact_index("agent_owner", loaded)
+    assert calls == []
+
+
+def test_prompt_is_built_once_per_use_case_and_role(monkeypatch):
+    built = []
+    build = stakeholder_prompts.build_stakeholder_prompt
+    monkeypatch.setattr(
+        stakeholder_prompts, "build_stakeholder_prompt",
+        lambda *args: built.append(args[0]) or build(*args)
+    )
+    monkeypatch.setattr(stakeholder_prompts, "_prompt_cache", type(stakeholder_prompts._prompt_cache)())
+    use_case = copy.deepcopy(SAMPLE_USE_CASES[2])
+
+    first = get_stakeholder_prompt("agent_owner", use_case)
+    assert get_stakeholder_prompt("agent_owner", copy.deepcopy(use_case)) == first
+    assert get_stakeholder_prompt("business_owner", use_case) != first
+    assert built == ["agent_owner", "business_owner"]
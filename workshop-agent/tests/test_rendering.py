@@ -0,0 +1,96 @@
+"""Server-side HTML fragments."""
+
+import re
+
+import app
+from agents.analyzer import FRAMEWORK_COVERAGE_AREAS
+from conftest import ANALYSIS
+
+
+def _coverage(counts: dict) -> dict:
+    def level(count):
+        return "well_covered" if count >= 3 else "partially_covered" if count == 2 else (
+            "lightly_covered" if count == 1 else "not_covered"
+        )
+    return {area: {"count": counts.get(area, 0), "level": level(counts.get(area, 0))} for area in FRAMEWORK_COVERAGE_AREAS}
+
+
+def test_coverage_is_rendered_once_per_coverage_state():
+    app._render_coverage.cache_clear()
+    first = app.get_coverage_html(_coverage({"process_mapping": 1}))
+    again = app.get_coverage_html(_coverage({"process_mapping": 1}))
+    changed = app.get_coverage_html(_coverage({"process_mapping": 2}))
+
+    assert first is again
+    assert changed != first
+    assert app._render_coverage.cache_info().misses == 2
+
+
+def test_coverage_groups_areas_by_level():
+    html = app.get_coverage_html(_coverage({"process_mapping": 3}))
+    well_covered = html.index("Well Covered")
+    assert well_covered < html.index("Process Mapping") < html.index("Not Yet Explored")
+    assert "3 questions" in html
+
+
+def test_feedback_marks_heuristic_scores_and_uncovered_facts():
+    plain = app.format_feedback_html(ANALYSIS)
+    assert "Approximate Feedback" not in plain
+    assert "★★★★☆" in plain
+    assert "Process Mapping" in plain
+
+    degraded = app.format_feedback_html(dict(ANALYSIS, degraded=True, facts_uncovered=2))
+    assert "Approximate Feedback" in degraded
+    assert "Uncovered 2 hidden fact(s)" in degraded
+
+
+def test_fragment_classes_are_defined_in_the_shared_css():
+    fragments = [
+        app.format_feedback_html(dict(ANALYSIS, degraded=True, facts_uncovered=1)),
+        app.get_coverage_html(_coverage({"process_mapping": 1, "guardrails": 3})),
+        app.DEFERRED_FEEDBACK_TEMPLATE.format(pending=1),
+        app.render_turn_html("Why?", "Because.", "Agent Owner", 1),
+    ] + [app.get_score_html(score) for score in range(1, 6)]
+    used = set()
+    for fragment in fragments:
+        for classes in re.findall(r'class="([^"]+)"', fragment):
+            used.update(name for name in classes.split() if name.startswith("ws-"))
+    defined = set(re.findall(r"\.(ws-[\w-]+)", app.SHARED_CSS))
+    assert used <= defined, used - defined
+
+
+def test_messages_escape_raw_html():
+    html = app.render_turn_html("<script>alert(1)</script> **why**?", "Fine", "Agent Owner", 3)
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
+    assert "<strong>why</strong>" in html
+    assert 'data-turn="3"' in html
+
+
+def test_each_question_returns_only_its_message_pair(fake_model, monkeypatch):
+    from data import SAMPLE_USE_CASES
+    from sessions import new_session_id
+
+    monkeypatch.setattr(app, "ANALYSIS_MODE", "inline")
+    session_id = new_session_id()
+    with app.session_manager.session(session_id) as session:
+        session.pending_use_case = SAMPLE_USE_CASES[0]
+        assert app._start_practice(session, "agent_owner")
+
+    first, *_, seq = app.submit_question("What is the current process?", session_id, 0)
+    second, *_, seq = app.submit_question("How many people run it?", session_id, seq)
+    replayed, *_ = app.submit_question("How many people run it?", session_id, 1)
+
+    assert seq == 2
+    assert 'data-turn="2"' in second
+    assert "How many people run it?" in second
+    assert "current process" not in second
+    # A duplicate submit gets the same turn back, which the browser skips
+    assert replayed == second
+
+    with app.session_manager.session(session_id, save=False) as session:
+        transcript = app.render_transcript_html(
+            session.stakeholder.get_conversation_history(), session.stakeholder.get_role_display()
+        )
+    assert transcript.count("ws-msg-user") == 2
+    app.end_browser_session(session_id)
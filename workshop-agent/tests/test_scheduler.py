@@ -0,0 +1,94 @@
+"""Request scheduler: priority classes and per-session round-robin."""
+
+import threading
+import time
+
+import pytest
+
+from llm import CancelToken, Priority
+from llm.scheduler import RequestScheduler
+
+
+@pytest.fixture
+def scheduler():
+    """A scheduler with an empty bucket that refills too slowly to matter (one request a minute)."""
+    scheduler = RequestScheduler(rpm=1, tpm=100_000)
+    scheduler._requests = 0.0
+    return scheduler
+
+
+def _wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _queue(scheduler, admitted: list, label: str, session_id: str, priority: Priority) -> threading.Thread:
+    """Start a request waiting for admission; its label is recorded once admitted."""
+    waiting = sum(scheduler.queue_depth().values())
+
+    def run():
+        if scheduler.acquire(session_id, priority, tokens=1, timeout=5):
+            admitted.append(label)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    _wait_for(lambda: sum(scheduler.queue_depth().values()) == waiting + 1)
+    return thread
+
+
+def _admit_one(scheduler, admitted: list):
+    count = len(admitted)
+    with scheduler._cond:
+        scheduler._requests += 1
+        scheduler._cond.notify_all()
+    _wait_for(lambda: len(admitted) == count + 1)
+
+
+def test_priority_then_round_robin_across_sessions(scheduler):
+    admitted = []
+    threads = [
+        _queue(scheduler, admitted, "background", "d", Priority.BACKGROUND),
+        _queue(scheduler, admitted, "analysis", "c", Priority.ANALYSIS),
+        _queue(scheduler, admitted, "a1", "a", Priority.LIVE),
+        _queue(scheduler, admitted, "a2", "a", Priority.LIVE),
+        _queue(scheduler, admitted, "b1", "b", Priority.LIVE),
+    ]
+    assert scheduler.queue_depth() == {"live": 3, "analysis": 1, "background": 1}
+
+    for _ in threads:
+        _admit_one(scheduler, admitted)
+    for thread in threads:
+        thread.join(5)
+
+    # A busy session yields to others at the same priority
+    assert admitted == ["a1", "b1", "a2", "analysis", "background"]
+    assert scheduler.queue_depth() == {"live": 0, "analysis": 0, "background": 0}
+
+
+def test_timed_out_request_leaves_the_queue(scheduler):
+    assert scheduler.acquire("a", Priority.LIVE, tokens=1, timeout=0.05) is False
+    assert scheduler.queue_depth()["live"] == 0
+
+
+def test_cancelled_request_leaves_the_queue(scheduler, monkeypatch):
+    monkeypatch.setattr("llm.scheduler.CANCEL_POLL", 0.01)
+    token = CancelToken()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(scheduler.acquire("a", Priority.LIVE, 1, cancel=token)))
+    thread.start()
+    _wait_for(lambda: scheduler.queue_depth()["live"] == 1)
+
+    token.cancel()
+    thread.join(5)
+
+    assert result == [False]
+    assert scheduler.queue_depth()["live"] == 0
+
+
+def test_backoff_pauses_admission():
+    scheduler = RequestScheduler(rpm=6000, tpm=100_000)
+    scheduler.backoff(0.2)
+    assert scheduler.acquire("a", Priority.LIVE, tokens=1, timeout=0.05) is False
+    assert scheduler.acquire("a", Priority.LIVE, tokens=1, timeout=2) is True
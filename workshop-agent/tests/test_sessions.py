@@ -0,0 +1,120 @@
+"""Session storage and turn handling."""
+
+import threading
+import time
+
+import pytest
+
+import app
+from data import SAMPLE_USE_CASES
+from llm import RequestCancelledError
+from sessions import MemoryBackend, SessionManager, new_session_id
+
+
+@pytest.fixture
+def session_id(fake_model, monkeypatch):
+    """A started practice session (on the app's in-memory backend)."""
+    monkeypatch.setattr(app, "ANALYSIS_MODE", "inline")
+    session_id = new_session_id()
+    with app.session_manager.session(session_id) as session:
+        session.pending_use_case = SAMPLE_USE_CASES[0]
+        assert app._start_practice(session, "agent_owner")
+    return session_id
+
+
+def _ask(session_id: str, question: str):
+    with app.cancellation(app.session_tokens.current(session_id)):
+        with app.session_manager.session(session_id) as session:
+            return app._run_turn(session, question, app.turn_key(session.turn_seq, question))
+
+
+def test_cancelled_turn_leaves_stored_session_untouched(session_id, fake_model):
+    def cancel_during_analysis(contents):
+        if "coverage_areas" in str(contents):
+            app.session_tokens.cancel(session_id)
+            raise RequestCancelledError("cancelled")
+
+    fake_model.hook = cancel_during_analysis
+    with pytest.raises(RequestCancelledError):
+        _ask(session_id, "What does the current process look like?")
+
+    fake_model.hook = None
+    app.session_tokens.renew(session_id)
+    turn, replayed = _ask(session_id, "What does the current process look like?")
+
+    assert not replayed
+    assert turn.analysis is not None
+    with app.session_manager.session(session_id, save=False) as session:
+        assert len(session.turns) == 2
+        assert session.turn_seq == 1
+        assert session.analyzer.deferred == []
+        assert session.analyzer.coverage_tracker["process_mapping"] == 1
+
+
+def test_memory_backend_returns_copies():
+    backend = MemoryBackend()
+    backend.save("s", {"analyzer": {"deferred": []}})
+    backend.load("s")["analyzer"]["deferred"].append({"turn": 2})
+    assert backend.load("s") == {"analyzer": {"deferred": []}}
+
+
+def test_session_locks_are_not_kept_after_use():
+    manager = SessionManager(MemoryBackend(), None)
+    for number in range(100):
+        with manager.session(f"s{number}", save=False):
+            pass
+    assert len(manager._locks) == 0
+
+
+def test_requests_for_one_session_are_serialized():
+    manager = SessionManager(MemoryBackend(), None)
+    inside, overlaps = [], []
+
+    def request():
+        with manager.session("s"):
+            inside.append(1)
+            overlaps.append(len(inside))
+            time.sleep(0.01)
+            inside.pop()
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == [1] * 8
+
+
+def test_duplicate_submission_is_replayed_without_model_calls(session_id, fake_model):
+    question = "How many refund requests do you get a day?"
+    first = app.submit_question(question, session_id, 0)
+    calls = len(fake_model.calls)
+    duplicate = app.submit_question(question, session_id, 0)
+
+    assert len(fake_model.calls) == calls
+    assert duplicate[0] == first[0]
+    assert first[5] == duplicate[5] == 1
+    assert 'data-turn="1"' in first[0]
+
+    # The same question asked again after seeing turn 1 is a new turn
+    again = app.submit_question(question, session_id, 1)
+    assert again[5] == 2
+    with app.session_manager.session(session_id, save=False) as session:
+        assert len(session.analyzer.question_scores) == 2
+
+
+def test_concurrent_duplicates_are_answered_once(session_id, fake_model):
+    question = "What happens to a refund over $500?"
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(app.submit_question(question, session_id, 0)))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {result[5] for result in results} == {1}
+    with app.session_manager.session(session_id, save=False) as session:
+        assert len(session.turns) == 2
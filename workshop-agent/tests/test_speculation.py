@@ -0,0 +1,141 @@
+"""Speculative answers to the suggested follow-up."""
+
+import threading
+
+import pytest
+
+import app
+from conftest import ANALYSIS
+from data import SAMPLE_USE_CASES
+from llm import RequestCancelledError
+from sessions import Speculator, new_session_id
+from sessions.speculation import is_same_question
+
+FOLLOW_UP = ANALYSIS["follow_up_suggestion"]
+
+
+@pytest.fixture
+def session_id(fake_model, monkeypatch):
+    """A started practice session with one scored turn, whose follow-up can be speculated on."""
+    monkeypatch.setattr(app, "ANALYSIS_MODE", "inline")
+    session_id = new_session_id()
+    with app.session_manager.session(session_id) as session:
+        session.pending_use_case = SAMPLE_USE_CASES[0]
+        assert app._start_practice(session, "agent_owner")
+    _ask(session_id, "What does the current process look like?", None)
+    yield session_id
+    app.end_browser_session(session_id)
+
+
+@pytest.fixture
+def speculator():
+    return Speculator(app.session_manager, max_workers=1)
+
+
+def _ask(session_id: str, question: str, speculator):
+    """Ask a question, serving it from `speculator` when it matches."""
+    with app.session_manager.session(session_id) as session:
+        answer = speculator.take(session_id, question, session.stakeholder) if speculator else None
+        if answer is None:
+            answer = session.stakeholder.respond(question)
+            session.analyzer.analyze_or_defer(question, answer, session.stakeholder.last_revealed)
+        return answer
+
+
+def _block_speculation(fake_model) -> threading.Event:
+    """Hold speculative calls until the returned event is set."""
+    release = threading.Event()
+
+    def hook(contents):
+        if threading.current_thread().name.startswith("speculation"):
+            release.wait(5)
+
+    fake_model.hook = hook
+    return release
+
+
+def test_matching_questions():
+    assert is_same_question("how many tickets a day", FOLLOW_UP)
+    assert is_same_question("How many ticket a day?", FOLLOW_UP)
+    assert not is_same_question("Who approves refunds?", FOLLOW_UP)
+
+
+def test_suggested_follow_up_is_served_from_speculation(session_id, speculator, fake_model):
+    speculator.schedule(session_id)
+    speculator.wait(session_id, FOLLOW_UP)
+    calls = len(fake_model.calls)
+
+    answer = _ask(session_id, "how many tickets a day", speculator)
+
+    assert answer.startswith("reply")
+    assert len(fake_model.calls) == calls
+    with app.session_manager.session(session_id, save=False) as session:
+        assert session.stakeholder.turns[-1].question == "how many tickets a day"
+        assert session.stakeholder.turns[-1].answer == answer
+    assert speculator.stats()["hits"] == 1
+
+
+def test_other_question_is_answered_live(session_id, speculator, fake_model):
+    speculator.schedule(session_id)
+    speculator.wait(session_id, FOLLOW_UP)
+
+    answer = _ask(session_id, "Who approves refunds?", speculator)
+
+    with app.session_manager.session(session_id, save=False) as session:
+        assert session.stakeholder.turns[-1].question == "Who approves refunds?"
+        assert session.stakeholder.turns[-1].answer == answer
+    stats = speculator.stats()
+    assert stats["hits"] == 0
+    assert stats["misses"] == 1
+
+
+def test_discarded_speculation_is_cancelled(session_id, speculator, fake_model):
+    release = _block_speculation(fake_model)
+    speculator.schedule(session_id)
+    entry = speculator._pending[session_id]
+
+    _ask(session_id, "Who approves refunds?", speculator)
+    release.set()
+
+    assert entry["token"].cancelled
+    with pytest.raises(RequestCancelledError):
+        entry["future"].result(5)
+    # The session's own work is not cancelled
+    assert not app.session_tokens.current(session_id).cancelled
+
+
+def test_take_does_not_wait_for_speculation_in_flight(session_id, speculator, fake_model):
+    release = _block_speculation(fake_model)
+    speculator.schedule(session_id)
+    entry = speculator._pending[session_id]
+
+    speculator.wait(session_id, FOLLOW_UP, timeout=0.05)
+    with app.session_manager.session(session_id, save=False) as session:
+        assert speculator.take(session_id, FOLLOW_UP, session.stakeholder) is None
+    release.set()
+
+    assert entry["token"].cancelled
+    assert speculator.stats()["hits"] == 0
+
+
+def test_session_reset_cancels_speculation(session_id, speculator, fake_model):
+    release = _block_speculation(fake_model)
+    speculator.schedule(session_id)
+    entry = speculator._pending[session_id]
+
+    app.session_tokens.renew(session_id)
+    release.set()
+
+    with pytest.raises(RequestCancelledError):
+        entry["future"].result(5)
+
+
+def test_ended_session_is_forgotten(session_id):
+    app.speculator.schedule(session_id)
+    app.analysis_worker._versions[session_id] = 1
+
+    app.end_browser_session(session_id)
+
+    assert session_id not in app.speculator._pending
+    assert session_id not in app.speculator._counts
+    assert session_id not in app.analysis_worker._versions
@@ -0,0 +1,68 @@
+"""The turn store and the views built from it."""
+
+from agents import TurnStore
+from agents.stakeholder import StakeholderAgent
+from data import SAMPLE_USE_CASES
+from sessions import WorkshopSession
+
+
+def _store(questions: int) -> TurnStore:
+    turns = TurnStore()
+    turns.add(None, "Hello, I run support.")
+    for number in range(1, questions + 1):
+        turns.add(f"Question {number}?", f"Answer {number}.")
+    return turns
+
+
+def test_round_trip_through_to_list():
+    turns = _store(3)
+    turns[2].analysis = {"score": 4}
+    restored = TurnStore()
+    restored.load(turns.to_list())
+
+    assert restored.to_list() == turns.to_list()
+    assert [turn.question for turn in restored.analyzed()] == ["Question 2?"]
+    assert restored.messages(end=2) == [
+        {"role": "stakeholder", "content": "Hello, I run support.", "turn": 0},
+        {"role": "practitioner", "content": "Question 1?", "turn": 1},
+        {"role": "stakeholder", "content": "Answer 1.", "turn": 1},
+    ]
+
+
+def test_load_replaces_in_place_for_views_sharing_the_store():
+    turns = _store(1)
+    shared = turns
+    turns.load(_store(4).to_list())
+    assert len(shared) == 5
+
+
+def test_chat_history_is_extended_not_rebuilt():
+    agent = StakeholderAgent(None)
+    agent.role, agent.use_case = "agent_owner", SAMPLE_USE_CASES[0]
+    agent.turns.load(_store(2).to_list())
+
+    history = agent.chat_history
+    assert len(history) == 6
+    first_entry = history[0]
+
+    agent.turns.add("Question 3?", "Answer 3.")
+    history = agent.chat_history
+    assert len(history) == 8
+    assert history[0] is first_entry
+    assert "Question 3?" in history[-2]["parts"][0]
+    assert history[-1] == {"role": "model", "parts": ["Answer 3."]}
+
+    agent.turns.load(_store(1).to_list())
+    assert len(agent.chat_history) == 4
+
+
+def test_turn_numbers_follow_the_store_across_save_and_restore():
+    session = WorkshopSession("s", None)
+    session.turns.load(_store(3).to_list())
+    assert session.turn_seq == 3
+
+    data = session.to_dict()
+    data["turn_seq"] = 99  # state saved before turn numbers were derived
+    restored = WorkshopSession.from_dict(data, None)
+    assert restored.turn_seq == 3
+    assert len(restored.turns) == 4